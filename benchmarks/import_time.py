@@ -0,0 +1,95 @@
+"""Benchmark of the time taken by ``import geoh5vista``.
+
+The package is imported in a new interpreter each time, so nothing is cached in
+``sys.modules``, and the heavy dependencies it loaded are listed. Importing the
+package must not load pyvista, VTK, geoh5py, h5py or pillow, which are only
+imported once a function using them is called. The results are written as JSON,
+and the run fails if the median import time exceeds ``--max-time`` or a heavy
+dependency was loaded.
+
+Example:
+    python benchmarks/import_time.py --output import_time.json --max-time 0.05
+"""
+
+
+__all__ = [
+    "HEAVY_MODULES",
+    "measure_import",
+]
+
+__displayname__ = "Import Time"
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Modules that importing the package alone must not load
+HEAVY_MODULES = ["pyvista", "vtk", "vtkmodules", "geoh5py", "h5py", "PIL"]
+
+_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {statement}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"time": elapsed, "modules": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(statement="geoh5vista", repeat=10):
+    """Times an import in new interpreters and returns the times and the heavy
+    modules it loaded.
+
+    Args:
+        statement (str): the module imported, e.g. ``"geoh5vista.wrapper"``
+        repeat (int): number of interpreters the import is timed in
+    """
+    script = _SCRIPT.format(statement=statement, heavy=HEAVY_MODULES)
+    times, modules = [], set()
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        times.append(result["time"])
+        modules.update(result["modules"])
+    return {
+        "times": times,
+        "min": min(times),
+        "median": statistics.median(times),
+        "heavy_modules": sorted(modules),
+    }
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10, help="number of timed imports")
+    parser.add_argument("--output", default="import_time.json", help="JSON results file")
+    parser.add_argument(
+        "--max-time", type=float, default=0.05, help="median import time flagged, in seconds"
+    )
+    options = parser.parse_args(args)
+
+    results = {
+        "geoh5vista": measure_import("geoh5vista", options.repeat),
+        # For reference, the cost deferred to the first read
+        "geoh5vista.wrapper": measure_import("geoh5vista.wrapper", options.repeat),
+    }
+    for name, result in results.items():
+        print(
+            f"import {name:<24} {result['median']:>9.4f} s  "
+            f"loads {', '.join(result['heavy_modules']) or 'nothing heavy'}"
+        )
+    with open(options.output, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2)
+    print(f"Results written to {options.output}")
+
+    package = results["geoh5vista"]
+    if package["heavy_modules"] or package["median"] > options.max_time:
+        print("REGRESSION: importing geoh5vista is no longer cheap")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
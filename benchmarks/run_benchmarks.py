@@ -0,0 +1,236 @@
+"""Benchmarks of the conversion of geoh5 workspaces to VTK data objects.
+
+A synthetic workspace is generated (see :mod:`synthetic`), then ``read_workspace`` and
+each converter are timed on it. Each benchmark is run ``--repeat`` times, every time on
+a newly opened workspace so the HDF5 reads are included, then once more to measure the
+peak memory allocated with :mod:`tracemalloc`. The results are written as JSON, and can
+be compared to those of an earlier run to flag regressions.
+
+Example:
+    python benchmarks/run_benchmarks.py --size medium --output results.json
+    python benchmarks/run_benchmarks.py --size medium --compare results.json
+"""
+
+
+__all__ = [
+    "BENCHMARKS",
+    "run_benchmarks",
+    "compare_results",
+]
+
+__displayname__ = "Benchmarks"
+
+import argparse
+from datetime import datetime, timezone
+import json
+from pathlib import Path
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import geoh5py
+from geoh5py.workspace import Workspace
+import numpy as np
+import pyvista
+
+import geoh5vista
+from geoh5vista.blockmodel import blockmodel_to_vtk
+from geoh5vista.cache import get_nbytes
+from geoh5vista.curve import curve_to_vtk
+from geoh5vista.drillholes import drillholes_to_vtk
+from geoh5vista.grid2d import grid2d_to_vtk
+from geoh5vista.octree import octree_to_vtk
+from geoh5vista.points import points_to_vtk
+from geoh5vista.surface import surface_to_vtk
+
+sys.path.insert(0, str(Path(__file__).parent))
+from synthetic import SIZES, make_workspace  # noqa: E402  pylint: disable=wrong-import-position
+
+# Converter benchmarks: name, converter, entity name in the synthetic workspace and
+# converter keyword arguments
+BENCHMARKS = [
+    ("points_to_vtk", points_to_vtk, "Points", {}),
+    ("curve_to_vtk", curve_to_vtk, "Curves", {}),
+    ("surface_to_vtk", surface_to_vtk, "Surface", {}),
+    ("grid2d_to_vtk", grid2d_to_vtk, "Grid2D", {}),
+    ("blockmodel_to_vtk", blockmodel_to_vtk, "Block Model", {}),
+    ("blockmodel_to_vtk[compact]", blockmodel_to_vtk, "Block Model", {"compact": True}),
+    ("blockmodel_to_vtk[categorical]", blockmodel_to_vtk, "Block Model", {"categorical": True}),
+    ("octree_to_vtk", octree_to_vtk, "Octree", {}),
+    ("octree_to_vtk[hypertree]", octree_to_vtk, "Octree", {"hypertree": True}),
+    ("drillholes_to_vtk", drillholes_to_vtk, "Drillholes", {}),
+    ("drillholes_to_vtk[merged]", drillholes_to_vtk, "Drillholes", {"merged": True}),
+]
+
+
+def _read_workspace_benchmarks(workers):
+    """Returns the ``read_workspace`` benchmarks, as functions of the file path."""
+    benchmarks = [("read_workspace", lambda path: geoh5vista.read_workspace(path))]
+    if workers and workers > 1:
+        benchmarks.append(
+            (
+                f"read_workspace[workers={workers}]",
+                lambda path: geoh5vista.read_workspace(path, workers=workers),
+            )
+        )
+    return benchmarks
+
+
+def _convert_entity(path, converter, entity_name, kwargs):
+    """Converts an entity of a newly opened workspace."""
+    with Workspace(path, mode="r") as workspace:
+        return converter(workspace.get_entity(entity_name)[0], **kwargs)
+
+
+def _measure(function, repeat):
+    """Returns the run times, peak allocated memory and output size of a function."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = function()
+        times.append(time.perf_counter() - start)
+        del output
+
+    # Memory is measured apart from the timings, which tracing slows down
+    tracemalloc.start()
+    try:
+        output = function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "times": times,
+        "min": min(times),
+        "median": statistics.median(times),
+        "peak_memory": peak,
+        # VTK allocations are not traced, so the size of the output is reported too
+        "output_nbytes": get_nbytes(output),
+    }
+
+
+def _environment():
+    return {
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "geoh5vista": geoh5vista.__version__,
+        "geoh5py": geoh5py.__version__,
+        "pyvista": pyvista.__version__,
+        "vtk": ".".join(str(part) for part in pyvista.vtk_version_info),
+        "numpy": np.__version__,
+    }
+
+
+def run_benchmarks(path, repeat=3, workers=None, select=None, verbose=True):
+    """Runs the benchmarks on a workspace and returns their results.
+
+    Args:
+        path (str): path of a workspace made by :func:`synthetic.make_workspace`
+        repeat (int): number of timed runs of each benchmark
+        workers (int): also time ``read_workspace`` with this many workers
+        select (list): only run the benchmarks whose name contains one of these
+            strings
+        verbose (bool): print each result as it is measured
+    """
+    benchmarks = [
+        (name, lambda function=function: function(path))
+        for name, function in _read_workspace_benchmarks(workers)
+    ]
+    benchmarks += [
+        (name, lambda args=(converter, entity, kwargs): _convert_entity(path, *args))
+        for name, converter, entity, kwargs in BENCHMARKS
+    ]
+
+    with Workspace(path, mode="r") as workspace:
+        names = {entity.name for entity in workspace.fetch_children(workspace.root)}
+
+    results = {}
+    for name, function in benchmarks:
+        if select and not any(pattern in name for pattern in select):
+            continue
+        entity = next((item[2] for item in BENCHMARKS if item[0] == name), None)
+        if entity is not None and entity not in names:
+            continue
+        results[name] = _measure(function, repeat)
+        if verbose:
+            print(
+                f"{name:<36} {results[name]['median']:>9.4f} s "
+                f"{results[name]['peak_memory'] / 1024**2:>10.1f} MiB",
+                flush=True,
+            )
+    return results
+
+
+def compare_results(results, baseline, threshold=1.2):
+    """Prints the ratios of the median times and peak memory of two runs, and
+    returns the names of the benchmarks slower than ``threshold`` times the
+    baseline.
+
+    Args:
+        results (dict): the results of the current run
+        baseline (dict): the results of an earlier run
+        threshold (float): the ratio of the median times flagged as a regression
+    """
+    regressions = []
+    print(f"{'benchmark':<36} {'time':>8} {'memory':>8}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        time_ratio = result["median"] / baseline[name]["median"]
+        memory_ratio = result["peak_memory"] / max(baseline[name]["peak_memory"], 1)
+        flag = ""
+        if time_ratio > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<36} {time_ratio:>7.2f}x {memory_ratio:>7.2f}x{flag}")
+    return regressions
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", choices=SIZES, default="small", help="preset workspace size")
+    parser.add_argument("--workspace", help="benchmark an existing synthetic workspace")
+    parser.add_argument("--repeat", type=int, default=3, help="number of timed runs")
+    parser.add_argument("--workers", type=int, default=4, help="workers of the parallel read")
+    parser.add_argument("--select", nargs="*", help="only run the benchmarks matching these")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON results file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare to")
+    parser.add_argument(
+        "--threshold", type=float, default=1.2, help="time ratio flagged as a regression"
+    )
+    options = parser.parse_args(args)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = options.workspace
+        config = None
+        if path is None:
+            path = str(Path(directory) / f"synthetic_{options.size}.geoh5")
+            config = SIZES[options.size]
+            start = time.perf_counter()
+            make_workspace(path, **config)
+            print(f"Generated {options.size} workspace in {time.perf_counter() - start:.1f} s")
+        results = run_benchmarks(path, options.repeat, options.workers, options.select)
+
+    report = {
+        "environment": _environment(),
+        "size": options.size if options.workspace is None else None,
+        "workspace": config,
+        "repeat": options.repeat,
+        "results": results,
+    }
+    with open(options.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {options.output}")
+
+    if options.compare:
+        with open(options.compare, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+        if compare_results(results, baseline, options.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""Generator of synthetic geoh5 workspaces of configurable size, for benchmarks.
+
+Example:
+    python benchmarks/synthetic.py synthetic.geoh5 --points 1000000 --holes 500
+"""
+
+
+__all__ = [
+    "SIZES",
+    "make_workspace",
+]
+
+__displayname__ = "Synthetic Workspace"
+
+import argparse
+import json
+
+import numpy as np
+from geoh5py.groups import DrillholeGroup
+from geoh5py.objects import BlockModel, Curve, Drillhole, Grid2D, Octree, Points, Surface
+from geoh5py.workspace import Workspace
+
+# Preset workspace sizes, see make_workspace for the meaning of each entry
+SIZES = {
+    "small": {
+        "n_points": 10_000,
+        "n_curves": 10,
+        "n_segments": 1_000,
+        "surface_size": 100,
+        "block_model": (20, 20, 10),
+        "grid2d": (100, 100),
+        "octree_levels": 3,
+        "n_holes": 20,
+        "n_intervals": 50,
+    },
+    "medium": {
+        "n_points": 1_000_000,
+        "n_curves": 100,
+        "n_segments": 10_000,
+        "surface_size": 1_000,
+        "block_model": (100, 100, 50),
+        "grid2d": (1_000, 1_000),
+        "octree_levels": 4,
+        "n_holes": 200,
+        "n_intervals": 200,
+    },
+    "large": {
+        "n_points": 10_000_000,
+        "n_curves": 1_000,
+        "n_segments": 10_000,
+        "surface_size": 3_000,
+        "block_model": (300, 300, 100),
+        "grid2d": (3_000, 3_000),
+        "octree_levels": 5,
+        "n_holes": 1_000,
+        "n_intervals": 500,
+    },
+}
+
+LITHOLOGIES = {1: "Overburden", 2: "Oxide", 3: "Transition", 4: "Fresh"}
+
+
+def _referenced(rng, n_values):
+    """Returns the add_data arguments of random lithology codes."""
+    return {
+        "values": rng.integers(1, len(LITHOLOGIES) + 1, n_values).astype(np.uint32),
+        "type": "referenced",
+        "value_map": LITHOLOGIES,
+    }
+
+
+def _add_points(workspace, rng, n_points):
+    points = Points.create(
+        workspace, name="Points", vertices=rng.random((n_points, 3)) * [1000, 1000, 200]
+    )
+    points.add_data(
+        {
+            "Au": {"values": rng.lognormal(size=n_points)},
+            "Sample": {"values": np.arange(n_points, dtype=np.int32)},
+            "Lithology": _referenced(rng, n_points),
+        }
+    )
+    return points
+
+
+def _add_curves(workspace, rng, n_curves, n_segments):
+    # Random walks, one polyline of n_segments segments per curve
+    steps = rng.normal(size=(n_curves, n_segments + 1, 3))
+    starts = rng.random((n_curves, 1, 3)) * [1000, 1000, 200]
+    vertices = (np.cumsum(steps, axis=1) + starts).reshape((-1, 3))
+    first = (np.arange(n_curves)[:, None] * (n_segments + 1) + np.arange(n_segments)).ravel()
+    cells = np.c_[first, first + 1].astype(np.uint32)
+    curve = Curve.create(workspace, name="Curves", vertices=vertices, cells=cells)
+    curve.add_data(
+        {
+            "Elevation": {"values": vertices[:, 2]},
+            "Segment": {"values": np.arange(len(cells), dtype=np.int32), "association": "CELL"},
+        }
+    )
+    return curve
+
+
+def _add_surface(workspace, rng, size):
+    # A size x size grid of vertices with two triangles per grid cell
+    x, y = np.meshgrid(np.linspace(0, 1000, size), np.linspace(0, 1000, size), indexing="ij")
+    z = 50 * np.sin(x / 100) * np.cos(y / 150) + rng.normal(size=x.shape)
+    vertices = np.c_[x.ravel(), y.ravel(), z.ravel()]
+    corner = (np.arange(size - 1)[:, None] * size + np.arange(size - 1)).ravel()
+    cells = np.r_[
+        np.c_[corner, corner + size, corner + 1],
+        np.c_[corner + 1, corner + size, corner + size + 1],
+    ].astype(np.uint32)
+    surface = Surface.create(workspace, name="Surface", vertices=vertices, cells=cells)
+    surface.add_data(
+        {
+            "Elevation": {"values": vertices[:, 2]},
+            "Slope": {"values": rng.random(len(cells)), "association": "CELL"},
+        }
+    )
+    return surface
+
+
+def _add_block_model(workspace, rng, shape):
+    n_u, n_v, n_z = shape
+    block_model = BlockModel.create(
+        workspace,
+        name="Block Model",
+        origin=[0.0, 0.0, 0.0],
+        u_cell_delimiters=np.arange(n_u + 1) * 10.0,
+        v_cell_delimiters=np.arange(n_v + 1) * 10.0,
+        z_cell_delimiters=-np.arange(n_z + 1)[::-1] * 5.0,
+        rotation=30.0,
+    )
+    n_cells = block_model.n_cells
+    block_model.add_data(
+        {
+            "Au": {"values": rng.lognormal(size=n_cells)},
+            "Density": {"values": rng.normal(2.7, 0.1, n_cells)},
+            "Domain": {"values": rng.integers(0, 10, n_cells).astype(np.int32)},
+            "Lithology": _referenced(rng, n_cells),
+        }
+    )
+    return block_model
+
+
+def _add_grid2d(workspace, rng, shape):
+    n_u, n_v = shape
+    grid = Grid2D.create(
+        workspace,
+        name="Grid2D",
+        origin=[0.0, 0.0, 100.0],
+        u_cell_size=1000.0 / n_u,
+        v_cell_size=1000.0 / n_v,
+        u_count=n_u,
+        v_count=n_v,
+        rotation=15.0,
+    )
+    grid.add_data({"TMI": {"values": rng.normal(size=n_u * n_v)}})
+    return grid
+
+
+def _add_octree(workspace, rng, levels):
+    # A 16 x 16 x 8 base mesh, refined towards its centre down to single cells
+    size = 2**levels
+    counts = np.array([16, 16, 8]) * size
+    i, j, k = np.meshgrid(np.arange(16), np.arange(16), np.arange(8), indexing="ij")
+    cells = np.c_[i.ravel(), j.ravel(), k.ravel()] * size
+    widths = np.full(len(cells), size)
+    offsets = np.array([[a, b, c] for c in (0, 1) for b in (0, 1) for a in (0, 1)])
+    for _ in range(levels):
+        radius = np.linalg.norm((cells + widths[:, None] / 2) / counts - 0.5, axis=1)
+        split = (radius < 0.25) & (widths > 1)
+        half = widths[split] // 2
+        children = cells[split][:, None, :] + offsets[None] * half[:, None, None]
+        cells = np.r_[cells[~split], children.reshape((-1, 3))]
+        widths = np.r_[widths[~split], np.repeat(half, 8)]
+
+    octree = Octree.create(
+        workspace,
+        name="Octree",
+        origin=[0.0, 0.0, 0.0],
+        u_count=int(counts[0]),
+        v_count=int(counts[1]),
+        w_count=int(counts[2]),
+        u_cell_size=5.0,
+        v_cell_size=5.0,
+        w_cell_size=-5.0,
+        octree_cells=np.rec.fromarrays(
+            [cells[:, 0], cells[:, 1], cells[:, 2], widths],
+            dtype=[("I", "<i4"), ("J", "<i4"), ("K", "<i4"), ("NCells", "<i4")],
+        ),
+    )
+    octree.add_data({"Value": {"values": rng.random(octree.n_cells)}})
+    return octree
+
+
+def _add_drillholes(workspace, rng, n_holes, n_intervals):
+    group = DrillholeGroup.create(workspace, name="Drillholes")
+    side = int(np.ceil(np.sqrt(n_holes)))
+    length = 2.0 * n_intervals + 20
+    for index in range(n_holes):
+        collar = [(index % side) * 50.0, (index // side) * 50.0, 100.0]
+        hole = Drillhole.create(
+            workspace,
+            name=f"DH{index:05d}",
+            collar=collar,
+            parent=group,
+            surveys=np.c_[
+                [0.0, length / 2, length],
+                rng.uniform(0, 360, 3),
+                rng.uniform(-90, -50, 3),
+            ],
+        )
+        # geoh5py does not compute the trace, which Geoscience ANALYST stores
+        depths = np.linspace(0, length, 21)
+        trace = hole.desurvey(depths)
+        hole._trace = np.rec.fromarrays(  # pylint: disable=protected-access
+            trace.T, dtype=[("x", "<f8"), ("y", "<f8"), ("z", "<f8")]
+        )
+        workspace.update_attribute(hole, "trace")
+
+        tops = np.arange(n_intervals) * 2.0 + rng.uniform(0, 0.5, n_intervals)
+        from_to = np.c_[tops, tops + rng.uniform(1.0, 1.5, n_intervals)]
+        hole.add_data(
+            {
+                "Au": {"values": rng.lognormal(size=n_intervals), "from-to": from_to},
+                "Lithology": {**_referenced(rng, n_intervals), "from-to": from_to},
+            }
+        )
+    return group
+
+
+def make_workspace(
+    path,
+    n_points=10_000,
+    n_curves=10,
+    n_segments=1_000,
+    surface_size=100,
+    block_model=(20, 20, 10),
+    grid2d=(100, 100),
+    octree_levels=3,
+    n_holes=20,
+    n_intervals=50,
+    seed=0,
+):
+    """Creates a geoh5 workspace holding one entity of each supported type, with
+    float, integer and referenced data. Entities with a size of zero are left out.
+
+    Args:
+        path (str): path of the geoh5 file to create
+        n_points (int): number of points
+        n_curves (int): number of polylines of the curve
+        n_segments (int): number of segments of each polyline
+        surface_size (int): the surface is a grid of ``surface_size**2`` vertices,
+            with two triangles per grid cell
+        block_model (tuple): number of ``(u, v, z)`` cells of the block model
+        grid2d (tuple): number of ``(u, v)`` cells of the 2D grid
+        octree_levels (int): number of refinement levels of the octree
+        n_holes (int): number of drillholes
+        n_intervals (int): number of data intervals per drillhole
+        seed (int): seed of the random values
+
+    Returns:
+        dict: the number of points and cells of each entity
+    """
+    rng = np.random.default_rng(seed)
+    counts = {}
+    with Workspace.create(path) as workspace:
+        entities = []
+        if n_points:
+            entities.append(_add_points(workspace, rng, n_points))
+        if n_curves and n_segments:
+            entities.append(_add_curves(workspace, rng, n_curves, n_segments))
+        if surface_size:
+            entities.append(_add_surface(workspace, rng, surface_size))
+        if block_model and np.prod(block_model):
+            entities.append(_add_block_model(workspace, rng, block_model))
+        if grid2d and np.prod(grid2d):
+            entities.append(_add_grid2d(workspace, rng, grid2d))
+        if octree_levels:
+            entities.append(_add_octree(workspace, rng, octree_levels))
+        for entity in entities:
+            entity.add_default_visual_parameters()
+            entity.visual_parameters.colour = [int(c) for c in rng.integers(0, 256, 3)]
+            counts[entity.name] = {
+                "type": entity.__class__.__name__,
+                "n_vertices": int(getattr(entity, "n_vertices", None) or 0),
+                "n_cells": int(getattr(entity, "n_cells", None) or 0),
+            }
+        if n_holes and n_intervals:
+            _add_drillholes(workspace, rng, n_holes, n_intervals)
+            counts["Drillholes"] = {
+                "type": "DrillholeGroup",
+                "n_holes": n_holes,
+                "n_intervals": n_holes * n_intervals,
+            }
+    return counts
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="path of the geoh5 file to create")
+    parser.add_argument("--size", choices=SIZES, default="small", help="preset size")
+    parser.add_argument("--points", type=int, dest="n_points")
+    parser.add_argument("--curves", type=int, dest="n_curves")
+    parser.add_argument("--segments", type=int, dest="n_segments")
+    parser.add_argument("--surface-size", type=int, dest="surface_size")
+    parser.add_argument("--block-model", type=int, nargs=3, dest="block_model")
+    parser.add_argument("--grid2d", type=int, nargs=2)
+    parser.add_argument("--octree-levels", type=int, dest="octree_levels")
+    parser.add_argument("--holes", type=int, dest="n_holes")
+    parser.add_argument("--intervals", type=int, dest="n_intervals")
+    parser.add_argument("--seed", type=int, default=0)
+    options = parser.parse_args(args)
+
+    config = dict(SIZES[options.size])
+    config.update(
+        {key: value for key, value in vars(options).items() if key in config and value is not None}
+    )
+    counts = make_workspace(options.path, seed=options.seed, **config)
+    print(json.dumps(counts, indent=2))
+
+
+if __name__ == "__main__":
+    main()
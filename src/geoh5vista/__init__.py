@@ -1,7 +1,8 @@
 """``geoh5vista``: 3D visualization for the Geoh5 format (geoh5)
-"""
 
-from geoh5vista.wrapper import read_workspace, entities_to_vtk
+The public functions and classes are imported on first access, so that importing
+the package does not import pyvista, geoh5py or the converters until they are used.
+"""
 
 # Package meta data
 __author__ = "Derek Kinakin"
@@ -11,11 +12,54 @@ __version__ = "0.0.5"
 __displayname__ = "GEOH5-VTK"
 __name__ = "geoh5vista"
 
+# Modules of the public names, imported on first access
+_LAZY_IMPORTS = {
+    "read_workspace": "geoh5vista.wrapper",
+    "entities_to_vtk": "geoh5vista.wrapper",
+    "iter_workspace": "geoh5vista.wrapper",
+    "write_workspace": "geoh5vista.wrapper",
+    "LazyMultiBlock": "geoh5vista.lazy",
+    "DiskCache": "geoh5vista.cache",
+    "ConversionCache": "geoh5vista.cache",
+    "Recorder": "geoh5vista.instrumentation",
+    "instrument": "geoh5vista.instrumentation",
+    "read_catalog": "geoh5vista.catalog",
+    "read_workspace_async": "geoh5vista.aio",
+    "iter_workspace_async": "geoh5vista.aio",
+    "export_workspace": "geoh5vista.export",
+    "Box": "geoh5vista.spatial",
+    "OrientedBox": "geoh5vista.spatial",
+    "Polygon": "geoh5vista.spatial",
+}
+
+__all__ = list(_LAZY_IMPORTS) + ["ignore_warnings"]
+
+
+def __getattr__(name):
+    from importlib import import_module
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        # Submodules, e.g. ``geoh5vista.wrapper``, were loaded by the package
+        # before it imported its names lazily, and are still imported on access
+        try:
+            return import_module(f"{__name__}.{name}")
+        except ModuleNotFoundError as error:
+            if error.name != f"{__name__}.{name}":
+                raise
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
+
 
 def ignore_warnings():
-    """Sets a warning filter for pillow's annoying ``DecompressionBombWarning``"""
+    """Sets a warning filter for pillow's annoying ``DecompressionBombWarning``,
+    by its message so that pillow is not imported"""
     import warnings
-    from PIL import Image
-    warnings.simplefilter(action="ignore", category=Image.DecompressionBombWarning)
+    warnings.filterwarnings(action="ignore", message=".*could be decompression bomb")
 
 ignore_warnings()
@@ -0,0 +1,281 @@
+"""asyncio interface to read GEOH5 workspaces without blocking the event loop"""
+
+
+__all__ = [
+    "read_workspace_async",
+    "iter_workspace_async",
+    "get_limiter",
+]
+
+__displayname__ = "Async"
+
+import asyncio
+from contextlib import nullcontext
+import contextvars
+from functools import partial
+import threading
+import weakref
+
+import pyvista
+from geoh5py.workspace.workspace import Workspace
+
+from geoh5vista.cache import as_cache
+from geoh5vista.instrumentation import Recorder
+from geoh5vista.spatial import as_region
+from geoh5vista.utilities import get_entity_info
+from geoh5vista.wrapper import (
+    check_multiblock_options,
+    convert_entity,
+    list_entities,
+    release_entity,
+)
+
+# Number of blocking reads and conversions run at once by the default limiter of
+# each event loop, over all the workspaces being read
+DEFAULT_CONCURRENCY = 4
+
+_LIMITERS = weakref.WeakKeyDictionary()
+
+
+def get_limiter(concurrency=None):
+    """Returns the semaphore bounding the number of blocking calls run at once by
+    the readers of the running event loop, creating it if needed.
+
+    Args:
+        concurrency (int): the bound of a newly created limiter, by default
+            ``DEFAULT_CONCURRENCY``
+    """
+    loop = asyncio.get_running_loop()
+    limiter = _LIMITERS.get(loop)
+    if limiter is None:
+        limiter = _LIMITERS[loop] = asyncio.Semaphore(concurrency or DEFAULT_CONCURRENCY)
+    return limiter
+
+
+class _WorkspaceSession:
+    """A read-only workspace whose blocking calls run in an executor, one at a
+    time, under a limiter shared with other sessions.
+
+    The permit of the limiter is held until the call returns in its thread, even
+    when the awaiting task is cancelled, so the bound holds. Closing waits for
+    the call in progress, if any."""
+
+    def __init__(self, workspace_path, executor, limiter):
+        self.workspace_path = workspace_path
+        self.executor = executor
+        self.limiter = limiter
+        self.workspace = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _locked(self, function, *args):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"The workspace ({self.workspace_path}) is closed.")
+            return function(*args)
+
+    async def run(self, function, *args):
+        """Runs ``function(*args)`` in the executor and returns its result."""
+        loop = asyncio.get_running_loop()
+        await self.limiter.acquire()
+        try:
+            context = contextvars.copy_context()
+            future = loop.run_in_executor(
+                self.executor, context.run, partial(self._locked, function, *args)
+            )
+        except BaseException:
+            self.limiter.release()
+            raise
+        future.add_done_callback(self._done)
+        return await asyncio.shield(future)
+
+    def _done(self, future):
+        self.limiter.release()
+        if not future.cancelled():
+            # Retrieves the errors of calls whose awaiting task was cancelled
+            future.exception()
+
+    def _open(self):
+        # Kept from the thread, so that a workspace opened after the awaiting
+        # task was cancelled is still closed
+        self.workspace = Workspace(self.workspace_path, mode="r")
+        return self.workspace
+
+    async def open(self):
+        """Opens the workspace in the executor and returns it."""
+        return await self.run(self._open)
+
+    def _close(self):
+        with self._lock:
+            self._closed = True
+            if self.workspace is not None:
+                self.workspace.close()
+
+    def close(self):
+        """Closes the workspace in the executor once the call in progress is done.
+        Returns the future of the closing, which does not need to be awaited."""
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self.executor, self._close)
+
+
+def _convert_entity(
+    entity, recorder, converter_options, fields, exclude_fields, cache, categorical, region
+):
+    """Converts an entity and releases the values read for it, see
+    :func:`geoh5vista.wrapper.iter_workspace`."""
+    with recorder.activate() if recorder is not None else nullcontext():
+        mesh = convert_entity(
+            entity, converter_options, fields, exclude_fields, cache, categorical, region
+        )
+    release_entity(entity)
+    return mesh
+
+
+async def iter_workspace_async(
+    workspace_path,
+    converter_options=None,
+    entity_types=None,
+    names=None,
+    groups=None,
+    fields=None,
+    exclude_fields=None,
+    cache=None,
+    categorical=False,
+    instrumentation=None,
+    limiter=None,
+    executor=None,
+    region=None,
+):
+    """Iterates asynchronously over the entities of a GEOH5 workspace, converting
+    them one at a time. Yields the ``(entity_info, mesh)`` pairs of
+    :func:`geoh5vista.wrapper.iter_workspace`.
+
+    Opening the workspace and converting each entity run in ``executor``, so
+    the event loop keeps serving other tasks meanwhile. The number of these
+    blocking calls running at once, over all the workspaces read by the loop, is
+    bounded by ``limiter``.
+
+    Cancelling the task iterating, e.g. when a client disconnects, stops the
+    iteration: the conversion in progress completes in its thread and is
+    discarded, no further entity is converted, and the workspace is closed once
+    that conversion is done. The workspace is closed as well when the iteration
+    ends or the generator is closed.
+
+    Args:
+        workspace_path (str): path to the geoh5 file
+        converter_options (dict): keyword arguments for the converters, keyed by
+            entity class name, see :func:`geoh5vista.wrapper.entities_to_vtk`
+        entity_types (list): only load entities of these class names
+        names (list): only load entities whose name or UID matches one of these
+            glob patterns
+        groups (list): only load entities held under a group whose path matches
+            one of these glob patterns
+        fields (list or dict): glob patterns of the data fields to read
+        exclude_fields (list or dict): glob patterns of the data fields to skip
+        cache (DiskCache, ConversionCache or str): a cache of converted
+            entities, or the path of a cache directory
+        categorical (bool): store referenced data as integer codes with a value
+            map
+        instrumentation (:class:`geoh5vista.instrumentation.Recorder` or callable):
+            a recorder of the conversions, see
+            :func:`geoh5vista.wrapper.read_workspace`
+        limiter (:class:`asyncio.Semaphore`): bounds the blocking calls run at
+            once, by default the limiter of the running loop, see
+            :func:`get_limiter`
+        executor (:class:`concurrent.futures.Executor`): runs the blocking calls,
+            by default the default executor of the loop
+        region (:class:`geoh5vista.spatial.Region` or tuple): only convert the
+            parts of the entities inside this region, see
+            :func:`geoh5vista.wrapper.read_workspace`. Entities outside of it are
+            not yielded.
+
+    Example:
+        >>> async for info, mesh in iter_workspace_async('test_file.geoh5'):
+        ...     await websocket.send_bytes(serialize(mesh))
+    """
+    recorder = instrumentation
+    if recorder is not None and not isinstance(recorder, Recorder):
+        recorder = Recorder(callback=instrumentation)
+    cache = as_cache(cache)
+    region = as_region(region)
+    session = _WorkspaceSession(workspace_path, executor, limiter or get_limiter())
+
+    try:
+        workspace = await session.open()
+        entities = await session.run(
+            list_entities, workspace, entity_types, names, groups
+        )
+        for entity in entities:
+            mesh = await session.run(
+                _convert_entity,
+                entity,
+                recorder,
+                converter_options,
+                fields,
+                exclude_fields,
+                cache,
+                categorical,
+                region,
+            )
+            if mesh is None:
+                continue
+            yield get_entity_info(entity), mesh
+            del mesh
+    finally:
+        session.close()
+
+
+async def read_workspace_async(
+    workspace_path,
+    converter_options=None,
+    entity_types=None,
+    names=None,
+    groups=None,
+    fields=None,
+    exclude_fields=None,
+    cache=None,
+    categorical=False,
+    instrumentation=None,
+    limiter=None,
+    executor=None,
+    region=None,
+):
+    """Loads a GEOH5 workspace without blocking the event loop, returning the
+    :class:`pyvista.MultiBlock` of :func:`geoh5vista.wrapper.read_workspace`.
+
+    The entities are converted one at a time as by
+    :func:`iter_workspace_async`, which describes the arguments, the bound on
+    concurrency and cancellation.
+
+    Example:
+        >>> project = await read_workspace_async('test_file.geoh5', categorical=True)
+    """
+    check_multiblock_options(converter_options)
+    data = pyvista.MultiBlock()
+    iterator = iter_workspace_async(
+        workspace_path,
+        converter_options=converter_options,
+        entity_types=entity_types,
+        names=names,
+        groups=groups,
+        fields=fields,
+        exclude_fields=exclude_fields,
+        cache=cache,
+        categorical=categorical,
+        instrumentation=instrumentation,
+        limiter=limiter,
+        executor=executor,
+        region=region,
+    )
+    try:
+        async for _, mesh in iterator:
+            data.append(mesh, name=mesh.user_dict["name"])
+    finally:
+        await iterator.aclose()
+    return data
+
+
+# Now set up the display names for the docs
+read_workspace_async.__displayname__ = "Read Workspace Async" # type: ignore
+iter_workspace_async.__displayname__ = "Iterate Workspace Async" # type: ignore
+get_limiter.__displayname__ = "Limiter" # type: ignore
@@ -2,17 +2,31 @@
 
 __all__ = [
     "get_blockmodel_shape",
+    "get_blockmodel_delimiters",
+    "get_blockmodel_window",
     "blockmodel_grid_geom_to_vtk",
+    "blockmodel_compact_geom_to_vtk",
+    "blockmodel_compact_to_structured",
     "blockmodel_to_vtk",
+    "vtk_geom_to_blockmodel",
+    "vtk_to_blockmodel",
 ]
 
 __displayname__ = "Blockmodel"
 
+from itertools import product
+
 import numpy as np
 import pyvista
 
+from geoh5py.objects.block_model import BlockModel
 from geoh5py.shared.utils import xy_rotation_matrix
-from geoh5vista.utilities import add_data_to_vtk_grid, add_entity_metadata
+from geoh5vista.utilities import (
+    add_data_to_geoh5,
+    add_data_to_vtk_grid,
+    add_entity_metadata,
+    add_entity_metadata_to_geoh5,
+)
 
 
 def get_blockmodel_shape(bm):
@@ -37,20 +51,94 @@ def create_blockmodel_rot_matrix(blkmdl):
     return rotation_mtx
 
 
-def blockmodel_grid_geom_to_vtk(blkmdl, rotation_matrix=None):
+def get_blockmodel_delimiters(blkmdl, window=None):
+    """Returns the u, v and z cell delimiters of a block model, optionally sliced
+    to a window of cells.
+
+    Args:
+        blkmdl (:class:`geoh5py.objects.block_model.BlockModel`): the block model
+        window (tuple): ``((i0, i1), (j0, j1), (k0, k1))`` cell index ranges, as
+            returned by :func:`get_blockmodel_window`
+    """
+    delimiters = [blkmdl.u_cell_delimiters, blkmdl.v_cell_delimiters, blkmdl.z_cell_delimiters]
+    if window is None:
+        return delimiters
+    return [d[start:stop + 1] for d, (start, stop) in zip(delimiters, window)]
+
+
+def get_blockmodel_window(blkmdl, ijk=None, bounds=None, rotation_matrix=None, region=None):
+    """Returns the ``((i0, i1), (j0, j1), (k0, k1))`` cell index ranges of a
+    sub-volume of a block model. Ranges are half-open, like Python slices.
+
+    Args:
+        blkmdl (:class:`geoh5py.objects.block_model.BlockModel`): the block model
+        ijk (tuple): ``(i, j, k)`` index ranges, each a ``(start, stop)`` pair or
+            ``None`` for the whole axis. Either bound of a pair may be ``None``.
+        bounds (tuple): world-space bounding box ``(xmin, xmax, ymin, ymax, zmin,
+            zmax)``. The box is taken into the rotated frame of the model and every
+            cell it intersects is kept.
+        rotation_matrix (:class:`numpy.ndarray`): the rotation of the model, as
+            returned by :func:`create_blockmodel_rot_matrix`
+        region (:class:`geoh5vista.spatial.Region`): a region, whose corners are
+            taken into the rotated frame of the model like those of ``bounds``
+
+    When several of ``ijk``, ``bounds`` and ``region`` are given, the window is
+    their intersection.
+    """
+    window = [[0, n] for n in get_blockmodel_shape(blkmdl)]
+
+    if ijk is not None:
+        for axis, index_range in enumerate(ijk):
+            if index_range is None:
+                continue
+            start, stop = slice(*index_range).indices(window[axis][1])[:2]
+            window[axis] = [max(window[axis][0], start), min(window[axis][1], stop)]
+
+    corner_sets = []
+    if bounds is not None:
+        corner_sets.append(list(product(bounds[0:2], bounds[2:4], bounds[4:6])))
+    if region is not None:
+        corner_sets.append(region.corners())
+
+    for corners in corner_sets:
+        if rotation_matrix is None:
+            rotation_matrix = create_blockmodel_rot_matrix(blkmdl)
+        origin = np.array([blkmdl.origin[0], blkmdl.origin[1], blkmdl.origin[2]], dtype=float)
+        # Unbounded sides would turn into NaN through the rotation
+        corners = np.clip(np.asarray(corners, dtype=float), -1e30, 1e30)
+        # Nodes are placed with ``local.dot(rotation_matrix) + origin``
+        local = (corners - origin).dot(np.asarray(rotation_matrix).T)
+        lower, upper = local.min(axis=0), local.max(axis=0)
+        for axis, delimiters in enumerate(get_blockmodel_delimiters(blkmdl)):
+            cell_lower = np.minimum(delimiters[:-1], delimiters[1:])
+            cell_upper = np.maximum(delimiters[:-1], delimiters[1:])
+            hits = np.flatnonzero((cell_upper > lower[axis]) & (cell_lower < upper[axis]))
+            start, stop = (hits[0], hits[-1] + 1) if len(hits) else (0, 0)
+            window[axis] = [max(window[axis][0], start), min(window[axis][1], stop)]
+
+    return tuple((int(start), int(max(start, stop))) for start, stop in window)
+
+
+def blockmodel_grid_geom_to_vtk(blkmdl, rotation_matrix=None, compact=False, window=None):
     """Convert the block model to a :class:`pyvista.StructuredGrid`
     object containing the 3D grid.
 
     Args:
         blkmdl (:class:`geoh5py.objects.block_model.BlockModel`): the grid geometry
             to convert
+        compact (bool): if ``True``, return the compact geometry from
+            :func:`blockmodel_compact_geom_to_vtk` instead
+        window (tuple): optional cell index ranges of the sub-volume to convert,
+            see :func:`get_blockmodel_window`
     """
+    if compact:
+        return blockmodel_compact_geom_to_vtk(
+            blkmdl, rotation_matrix=rotation_matrix, window=window
+        )
 
     origin = np.array([blkmdl.origin[0], blkmdl.origin[1], blkmdl.origin[2]], "float32")
     
-    xc = blkmdl.u_cell_delimiters
-    yc = blkmdl.v_cell_delimiters
-    zc = blkmdl.z_cell_delimiters
+    xc, yc, zc = get_blockmodel_delimiters(blkmdl, window)
 
     # Use a vtkStructuredGrid
     # Build out all nodes in the mesh
@@ -66,22 +154,205 @@ def blockmodel_grid_geom_to_vtk(blkmdl, rotation_matrix=None):
     return output
 
 
-def blockmodel_to_vtk(blkmdl):
+def _compact_axis(delimiters):
+    """Returns the local coordinates of an axis made increasing, the sign used to
+    make them so and whether the axis is uniformly spaced."""
+    delimiters = np.asarray(delimiters, dtype=float)
+    steps = np.diff(delimiters)
+    sign = -1.0 if len(steps) and steps[0] < 0 else 1.0
+    uniform = len(steps) > 0 and np.allclose(steps, steps[0], rtol=1e-9, atol=0.0)
+    return sign * delimiters, sign, uniform
+
+
+def blockmodel_compact_geom_to_vtk(blkmdl, rotation_matrix=None, window=None):
+    """Convert the block model to a compact VTK grid that only stores the cell
+    delimiters, instead of the coordinates of every node.
+
+    Uniformly spaced delimiters give a :class:`pyvista.ImageData` with the
+    rotation in its ``direction_matrix``. Otherwise a
+    :class:`pyvista.RectilinearGrid` is returned in the local (rotated) frame of
+    the model, with the 4x4 local to world transform stored in
+    ``user_dict["transform"]``. Use :func:`blockmodel_compact_to_structured` to
+    get explicit :class:`pyvista.StructuredGrid` points when needed.
+
+    The memory used by the geometry is O(nu + nv + nz) and the cell ordering is
+    the same as :func:`blockmodel_grid_geom_to_vtk`.
+
+    Args:
+        blkmdl (:class:`geoh5py.objects.block_model.BlockModel`): the grid geometry
+            to convert
+        rotation_matrix (:class:`numpy.ndarray`): the rotation of the model, as
+            returned by :func:`create_blockmodel_rot_matrix`
+        window (tuple): optional cell index ranges of the sub-volume to convert,
+            see :func:`get_blockmodel_window`
+    """
+    if rotation_matrix is None:
+        rotation_matrix = create_blockmodel_rot_matrix(blkmdl)
+
+    origin = np.array([blkmdl.origin[0], blkmdl.origin[1], blkmdl.origin[2]], dtype=float)
+    axes = [_compact_axis(d) for d in get_blockmodel_delimiters(blkmdl, window)]
+
+    # Nodes are placed with ``local.dot(rotation_matrix)``, i.e. the columns of the
+    # transposed rotation are the model axes. Decreasing delimiters are made
+    # increasing by flipping the matching axis.
+    direction = np.asarray(rotation_matrix, dtype=float).T * [sign for _, sign, _ in axes]
+
+    if all(uniform for _, _, uniform in axes):
+        output = pyvista.ImageData()
+        output.dimensions = [len(coords) for coords, _, _ in axes]
+        output.spacing = [coords[1] - coords[0] for coords, _, _ in axes]
+        output.origin = origin + direction.dot([coords[0] for coords, _, _ in axes])
+        output.direction_matrix = direction
+        return output
+
+    output = pyvista.RectilinearGrid(*[coords for coords, _, _ in axes])
+    transform = np.eye(4)
+    transform[:3, :3] = direction
+    transform[:3, 3] = origin
+    output.user_dict["transform"] = transform.tolist()
+    return output
+
+
+def blockmodel_compact_to_structured(output):
+    """Convert a compact block model grid from :func:`blockmodel_compact_geom_to_vtk`
+    to a :class:`pyvista.StructuredGrid` with explicit world coordinates, keeping
+    its data arrays.
+
+    Args:
+        output (:class:`pyvista.ImageData` or :class:`pyvista.RectilinearGrid`):
+            the compact grid
+    """
+    user_dict = dict(output.user_dict)
+    transform = user_dict.pop("transform", None)
+    structured = output.cast_to_structured_grid()
+    if transform is not None:
+        transform = np.asarray(transform)
+        structured.points = structured.points.dot(transform[:3, :3].T) + transform[:3, 3]
+    structured.user_dict = user_dict
+    return structured
+
+
+def blockmodel_to_vtk(
+    blkmdl, compact=False, ijk=None, bounds=None, fields=None, categorical=False, region=None
+):
     """Convert the block model to a VTK data object.
 
     Args:
         blkmdl (:class:`geoh5py.objects.block_model.BlockModel`): The block model
         to convert
+        compact (bool): if ``True``, return a :class:`pyvista.ImageData` or
+            :class:`pyvista.RectilinearGrid` that only stores the cell delimiters
+            instead of a :class:`pyvista.StructuredGrid`, see
+            :func:`blockmodel_compact_geom_to_vtk`
+        ijk (tuple): only convert the cells within these ``(i, j, k)`` index
+            ranges, see :func:`get_blockmodel_window`
+        bounds (tuple): only convert the cells intersecting this world-space
+            bounding box ``(xmin, xmax, ymin, ymax, zmin, zmax)``
+        fields (list): only read the data with these names, if given
+        categorical (bool): store referenced data as integer codes and a value
+            map, see :func:`geoh5vista.utilities.add_data_to_vtk`
+        region (:class:`geoh5vista.spatial.Region`): only convert the cells
+            intersecting the bounding box of the region in the rotated frame of
+            the model. The grid stays structured, so the cells of that window
+            outside an oriented box or a polygon are kept.
+
+    With ``ijk``, ``bounds`` or ``region``, only the delimiters and the hyperslab
+    of each data array inside the window are read, so memory and time scale with
+    the window. The window is stored in ``user_dict["window"]``, and an empty
+    window gives an empty :class:`pyvista.StructuredGrid`.
 
     """
     rotation_mtx = create_blockmodel_rot_matrix(blkmdl)
-    output = blockmodel_grid_geom_to_vtk(blkmdl, rotation_matrix=rotation_mtx)
-    output = add_data_to_vtk_grid(output, blkmdl)
+    window = None
+    if ijk is not None or bounds is not None or region is not None:
+        window = get_blockmodel_window(
+            blkmdl, ijk=ijk, bounds=bounds, rotation_matrix=rotation_mtx, region=region
+        )
+
+    if window is not None and any(start == stop for start, stop in window):
+        output = pyvista.StructuredGrid()
+    else:
+        output = blockmodel_grid_geom_to_vtk(
+            blkmdl, rotation_matrix=rotation_mtx, compact=compact, window=window
+        )
+        output = add_data_to_vtk_grid(
+            output, blkmdl, window=window, fields=fields, categorical=categorical
+        )
+    if window is not None:
+        output.user_dict["window"] = [list(index_range) for index_range in window]
     output = add_entity_metadata(output, blkmdl)
     return output
 
 
+def vtk_geom_to_blockmodel(vtk, workspace, name, parent=None):
+    """Convert a VTK grid to a geoh5py BlockModel object.
+
+    :class:`pyvista.StructuredGrid` objects from :func:`blockmodel_grid_geom_to_vtk`
+    and compact grids from :func:`blockmodel_compact_geom_to_vtk` are supported, or
+    any grid whose axes are the x, y and z axes rotated about the vertical.
+
+    Args:
+        vtk (:class:`pyvista.StructuredGrid`, :class:`pyvista.ImageData` or
+            :class:`pyvista.RectilinearGrid`): the grid to convert
+        workspace (:class:`geoh5py.workspace.workspace.Workspace`): the workspace
+            to create the block model in
+        name (str): the name of the block model
+        parent: the group holding the block model, if any
+    """
+    if not isinstance(vtk, pyvista.StructuredGrid):
+        vtk = blockmodel_compact_to_structured(vtk)
+    nodes = np.asarray(vtk.points).reshape((*vtk.dimensions, 3), order="F")
+    origin = nodes[0, 0, 0]
+
+    # Nodes are placed with ``local.dot(rotation_matrix) + origin``, so the u axis
+    # is the first row of the rotation matrix
+    u_axis = nodes[1, 0, 0] - origin
+    rotation = np.arctan2(-u_axis[1], u_axis[0])
+    rotation_matrix = xy_rotation_matrix(rotation)
+    local = (nodes - origin).dot(rotation_matrix.T)
+    if not (
+        np.allclose(local[:, 0, 0, 1:], 0.0)
+        and np.allclose(local[0, :, 0, [0, 2]], 0.0)
+        and np.allclose(local[0, 0, :, :2], 0.0)
+    ):
+        raise ValueError("Only grids rotated about the vertical axis are supported.")
+
+    blockmodel = BlockModel.create(
+        workspace,
+        name=name,
+        origin=origin,
+        u_cell_delimiters=local[:, 0, 0, 0],
+        v_cell_delimiters=local[0, :, 0, 1],
+        z_cell_delimiters=local[0, 0, :, 2],
+        rotation=float(np.rad2deg(rotation)),
+        parent=parent,
+    )
+    return blockmodel
+
+
+def vtk_to_blockmodel(vtk, workspace, name, parent=None):
+    """Convert a VTK grid and its cell data to a geoh5py BlockModel object, see
+    :func:`vtk_geom_to_blockmodel`."""
+    blockmodel = vtk_geom_to_blockmodel(vtk, workspace, name, parent=parent)
+    n_u, n_v, n_z = get_blockmodel_shape(blockmodel)
+
+    def reorder(values):
+        # VTK cells are ordered with u fastest, then v, then z. Block model values
+        # are stored with z fastest, then u, then v.
+        return values.reshape((n_z, n_v, n_u)).transpose(1, 2, 0).ravel()
+
+    blockmodel = add_data_to_geoh5(blockmodel, vtk, point_association=None, reorder=reorder)
+    blockmodel = add_entity_metadata_to_geoh5(blockmodel, vtk)
+    return blockmodel
+
+
 # Now set up the display names for the docs
 blockmodel_to_vtk.__displayname__ = "Blockmodel to VTK" # type: ignore
 blockmodel_grid_geom_to_vtk.__displayname__ = "Blockmodel Grid Geometry to VTK" # type: ignore
+blockmodel_compact_geom_to_vtk.__displayname__ = "Blockmodel Compact Geometry to VTK" # type: ignore
+blockmodel_compact_to_structured.__displayname__ = "Blockmodel Compact Grid to Structured" # type: ignore
 get_blockmodel_shape.__displayname__ = "Blockmodel Shape" # type: ignore
+get_blockmodel_delimiters.__displayname__ = "Blockmodel Delimiters" # type: ignore
+get_blockmodel_window.__displayname__ = "Blockmodel Window" # type: ignore
+vtk_geom_to_blockmodel.__displayname__ = "VTK Geometry to Blockmodel" # type: ignore
+vtk_to_blockmodel.__displayname__ = "VTK to Blockmodel" # type: ignore
@@ -0,0 +1,319 @@
+"""Caches of converted GEOH5 entities"""
+
+
+__all__ = [
+    "as_cache",
+    "get_cache_key",
+    "get_nbytes",
+    "save_vtk",
+    "DiskCache",
+    "ConversionCache",
+]
+
+__displayname__ = "Cache"
+
+from collections import OrderedDict
+import hashlib
+import json
+import os
+from pathlib import Path
+import shutil
+import threading
+import uuid
+
+import pyvista
+from geoh5py.groups.base import Group
+
+# VTK XML format used to store each type of converted object
+CACHE_EXTENSIONS = {
+    "PolyData": ".vtp",
+    "PointSet": ".vtp",
+    "UnstructuredGrid": ".vtu",
+    "StructuredGrid": ".vts",
+    "ImageData": ".vti",
+    "RectilinearGrid": ".vtr",
+    "MultiBlock": ".vtm",
+}
+
+
+def _hash(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def _data_signature(entity):
+    """Returns the names and UIDs of the data of an entity, or of the children of a
+    group, without reading any values."""
+    children = entity.children
+    if isinstance(entity, Group):
+        children = [data for child in children for data in child.children]
+    return sorted((child.name, str(child.uid)) for child in children)
+
+
+def get_cache_key(entity, kwargs=None):
+    """Returns the ``(uid, state, options)`` key of the conversion of an entity, or
+    ``None`` if the entity does not live in a geoh5 file.
+
+    ``state`` hashes the modification time and size of the geoh5 file and the
+    names and UIDs of the data of the entity, so any change to the file gives a
+    new key. ``options`` hashes the converter keyword arguments (e.g. the selected
+    ``fields``).
+
+    Args:
+        entity: the GEOH5 entity
+        kwargs (dict): the keyword arguments of the converter
+    """
+    h5file = entity.workspace.h5file
+    if not isinstance(h5file, (str, Path)) or not Path(h5file).is_file():
+        return None
+    stat = os.stat(h5file)
+    state = _hash(
+        [str(Path(h5file).resolve()), stat.st_mtime_ns, stat.st_size, _data_signature(entity)]
+    )
+    return str(entity.uid), state, _hash(kwargs or {})
+
+
+def _block_metadata(output):
+    """Returns what the VTK XML formats do not keep of a converted object: its
+    type, ``user_dict`` and, for a :class:`pyvista.MultiBlock`, its block names."""
+    metadata = {"type": output.__class__.__name__, "user_dict": dict(output.user_dict)}
+    if isinstance(output, pyvista.MultiBlock):
+        metadata["blocks"] = [
+            {"name": output.get_block_name(i), **_block_metadata(block)}
+            for i, block in enumerate(output)
+        ]
+    return metadata
+
+
+def _restore_block(output, metadata):
+    """Restores the metadata from :func:`_block_metadata` on an object read back from
+    the cache."""
+    if metadata["type"] == "PointSet":
+        output = output.cast_to_pointset()
+    if "_PYVISTA_USER_DICT" in output.field_data:
+        output.field_data.remove("_PYVISTA_USER_DICT")
+    if isinstance(output, pyvista.MultiBlock):
+        for i, block_metadata in enumerate(metadata.get("blocks", [])):
+            output[i] = _restore_block(output[i], block_metadata)
+            output.set_block_name(i, block_metadata["name"])
+    output.user_dict = metadata["user_dict"]
+    return output
+
+
+def _cacheable(output):
+    """Returns the object to write, with point sets cast to poly data, keeping
+    their field data."""
+    if isinstance(output, pyvista.PointSet):
+        polydata = output.cast_to_polydata(deep=False)
+        polydata.field_data.update(output.field_data)
+        return polydata
+    if isinstance(output, pyvista.MultiBlock):
+        blocks = pyvista.MultiBlock()
+        for i, block in enumerate(output):
+            blocks.append(_cacheable(block), name=output.get_block_name(i))
+        return blocks
+    return output
+
+
+def save_vtk(output, stem):
+    """Writes a converted object to a VTK XML file in the format of its type, see
+    ``CACHE_EXTENSIONS``, and returns the path of the file. Point sets are
+    written as poly data, keeping their ``user_dict`` in the field data.
+
+    Args:
+        output (pyvista.DataSet or pyvista.MultiBlock): the object to write
+        stem (str): the path of the file, without its extension
+    """
+    path = Path(f"{stem}{CACHE_EXTENSIONS[output.__class__.__name__]}")
+    _cacheable(output).save(path)
+    return path
+
+
+class DiskCache:
+    """A persistent cache of converted entities, stored in a directory in the VTK
+    XML formats (``.vtp``, ``.vtu``, ``.vts``, ``.vti``, ``.vtr`` and ``.vtm``).
+
+    Entries are keyed with :func:`get_cache_key`: by entity UID, converter options,
+    data names and the modification time and size of the geoh5 file. Saving the
+    workspace again invalidates its entries, and stale entries of an entity are
+    removed when it is stored again. Entries are written to a temporary directory
+    then renamed into place, so concurrent readers never see partial files.
+
+    Args:
+        directory (str): the cache directory, created if needed
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory).expanduser()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({str(self.directory)!r})"
+
+    def _entry(self, key):
+        uid, state, options = key
+        return self.directory / uid / f"{state}-{options}"
+
+    def get(self, entity, kwargs=None):
+        """Returns the cached conversion of an entity, or ``None`` on a miss."""
+        key = get_cache_key(entity, kwargs)
+        if key is None:
+            return None
+        entry = self._entry(key)
+        try:
+            with open(entry / "metadata.json", encoding="utf-8") as file:
+                metadata = json.load(file)
+            output = pyvista.read(entry / f"mesh{CACHE_EXTENSIONS[metadata['type']]}")
+        except (OSError, ValueError, KeyError):
+            return None
+        return _restore_block(output, metadata)
+
+    def put(self, entity, kwargs, output):
+        """Stores the conversion of an entity. Objects of types without a VTK XML
+        format, and entities not living in a geoh5 file, are not stored."""
+        key = get_cache_key(entity, kwargs)
+        if key is None or output.__class__.__name__ not in CACHE_EXTENSIONS:
+            return
+        entry = self._entry(key)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+
+        temporary = entry.parent / f".tmp-{uuid.uuid4().hex}"
+        temporary.mkdir()
+        try:
+            metadata = _block_metadata(output)
+            save_vtk(output, temporary / "mesh")
+            with open(temporary / "metadata.json", "w", encoding="utf-8") as file:
+                json.dump(metadata, file, default=str)
+            try:
+                os.replace(temporary, entry)
+            except OSError:
+                # Stored by another writer in the meantime
+                pass
+        finally:
+            shutil.rmtree(temporary, ignore_errors=True)
+
+        # Drop the entries of earlier states of the workspace
+        for stale in entry.parent.iterdir():
+            if not stale.name.startswith((key[1], ".tmp-")):
+                shutil.rmtree(stale, ignore_errors=True)
+
+    def clear(self):
+        """Removes every entry of the cache."""
+        for entry in self.directory.iterdir():
+            if entry.is_dir():
+                shutil.rmtree(entry, ignore_errors=True)
+
+
+def get_nbytes(output):
+    """Returns the memory used by a VTK data object in bytes, summed over the
+    blocks of a :class:`pyvista.MultiBlock`."""
+    if output is None:
+        return 0
+    if isinstance(output, pyvista.MultiBlock):
+        return sum(get_nbytes(block) for block in output)
+    # VTK reports the memory size in kibibytes
+    return int(output.GetActualMemorySize()) * 1024
+
+
+class ConversionCache:
+    """An in-process least recently used cache of converted entities, bounded by
+    the total memory of the cached objects.
+
+    Entries are keyed with :func:`get_cache_key`, so the selected fields and other
+    converter options are part of the key, and changes to the geoh5 file are never
+    served from the cache. Cached objects are returned as is, not copied: modify a
+    copy of a returned block rather than the block itself.
+
+    Args:
+        max_bytes (int): the memory budget. The least recently used entries are
+            evicted once the cached objects use more, and objects larger than the
+            whole budget are not cached.
+
+    Example:
+        >>> cache = ConversionCache(max_bytes=2 * 1024**3)
+        >>> mesh = geoh5wrap(block_model, cache=cache)
+        >>> cache.stats
+        {'hits': 0, 'misses': 1, 'evictions': 0, 'entries': 1, ...}
+    """
+
+    def __init__(self, max_bytes=1024**3):
+        self.max_bytes = int(max_bytes)
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}({len(self)} entries, "
+            f"{self.nbytes}/{self.max_bytes} bytes)"
+        )
+
+    @property
+    def stats(self):
+        """Hit, miss and eviction counts and the current size of the cache"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "nbytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def get(self, entity, kwargs=None):
+        """Returns the cached conversion of an entity, or ``None`` on a miss."""
+        key = get_cache_key(entity, kwargs)
+        with self._lock:
+            if key is None or key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+
+    def put(self, entity, kwargs, output):
+        """Stores the conversion of an entity, evicting the least recently used
+        entries to stay within the memory budget."""
+        key = get_cache_key(entity, kwargs)
+        nbytes = get_nbytes(output)
+        if key is None or nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+            self._entries[key] = (output, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+                self.evictions += 1
+
+    def clear(self):
+        """Removes every entry of the cache and resets the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = self.hits = self.misses = self.evictions = 0
+
+
+def as_cache(cache):
+    """Returns a cache object from a cache, the path of a cache directory (a
+    :class:`DiskCache`) or ``None``.
+
+    Args:
+        cache (DiskCache, ConversionCache or str): the cache
+    """
+    if isinstance(cache, (str, Path)):
+        return DiskCache(cache)
+    return cache
+
+
+as_cache.__displayname__ = "As Cache"  # type: ignore
+get_cache_key.__displayname__ = "Cache Key"  # type: ignore
+get_nbytes.__displayname__ = "Memory Size"  # type: ignore
+save_vtk.__displayname__ = "Save VTK"  # type: ignore
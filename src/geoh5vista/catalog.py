@@ -0,0 +1,303 @@
+"""Index of the entities of a workspace, read from the HDF5 metadata only"""
+
+
+__all__ = [
+    "read_catalog",
+    "estimate_nbytes",
+]
+
+__displayname__ = "Catalog"
+
+import h5py
+
+import geoh5py.groups
+import geoh5py.objects
+from geoh5py.shared.concatenation import Concatenator
+
+from geoh5vista.selection import matches_selection
+from geoh5vista.utilities import SKIPDATA
+from geoh5vista.registry import SUPPORTED
+
+# Primitive types of the data converted to VTK arrays
+CONVERTED_TYPES = ("Float", "Integer", "Referenced")
+
+# Approximate bytes of the VTK arrays per point and per cell of each converted
+# entity type, from the converters' output: points, connectivity, offsets and cell
+# types. 2D grids are image data, without explicit points.
+POINT_NBYTES = {
+    "Points": 24,
+    "Curve": 24,
+    "Surface": 24,
+    "Grid2D": 0,
+    "BlockModel": 24,
+    "Octree": 24,
+    "DrillholeGroup": 32,
+}
+CELL_NBYTES = {
+    "Points": 0,
+    "Curve": 32,
+    "Surface": 32,
+    "Grid2D": 0,
+    "BlockModel": 0,
+    "Octree": 73,
+    "DrillholeGroup": 24,
+}
+
+_TYPE_CLASSES = {}
+
+
+def _str(value):
+    if isinstance(value, bytes):
+        return value.decode("utf-8")
+    return str(value)
+
+
+def _uid(value):
+    """Returns a UID attribute as the string of :class:`uuid.UUID`."""
+    return _str(value).strip("{}").lower()
+
+
+def _type_class(uid):
+    """Returns the geoh5py class of an object or group type UID, or ``None``."""
+    if not _TYPE_CLASSES:
+        for module in (geoh5py.objects, geoh5py.groups):
+            for member in vars(module).values():
+                type_uid = getattr(member, "_TYPE_UID", None)
+                if isinstance(member, type) and type_uid is not None:
+                    _TYPE_CLASSES.setdefault(str(type_uid), member)
+    return _TYPE_CLASSES.get(uid)
+
+
+def _class_names(h5group):
+    """Returns the class name of an entity and those of its base classes, as
+    geoh5py would create it."""
+    cls = _type_class(_uid(h5group["Type"].attrs.get("ID", "")))
+    if cls is None:
+        return ["ObjectBase" if "Vertices" in h5group else "Group"]
+    names = [c.__name__ for c in cls.__mro__ if c is not object]
+    if "Concatenated Data" in h5group:
+        names = ["Concatenator" + cls.__name__, Concatenator.__name__] + names
+    return names
+
+
+def _field(name, dataset, primitive_type=None, association=None):
+    return {
+        "name": name,
+        "primitive_type": primitive_type,
+        "association": association,
+        "dtype": str(dataset.dtype) if dataset is not None else None,
+        "size": int(dataset.shape[0]) if dataset is not None and dataset.shape else 0,
+    }
+
+
+def _object_fields(h5object):
+    """Returns the fields of an object from the attributes of its data."""
+    fields = []
+    for h5data in h5object.get("Data", {}).values():
+        name = _str(h5data.attrs.get("Name", ""))
+        primitive_type = _str(h5data["Type"].attrs.get("Primitive type", ""))
+        if name in SKIPDATA or primitive_type not in CONVERTED_TYPES:
+            continue
+        association = h5data.attrs.get("Association")
+        fields.append(
+            _field(
+                name,
+                h5data.get("Data"),
+                primitive_type,
+                None if association is None else _str(association),
+            )
+        )
+    return fields
+
+
+def _object_geometry(entity_type, h5object):
+    """Returns the vertex and cell counts of an object, and the shape of grids."""
+    attrs = h5object.attrs
+    geometry = {}
+    if "Vertices" in h5object:
+        geometry["n_vertices"] = int(h5object["Vertices"].shape[0])
+    if "Cells" in h5object:
+        geometry["n_cells"] = int(h5object["Cells"].shape[0])
+
+    if entity_type == "BlockModel":
+        shape = tuple(
+            max(int(h5object[f"{axis} cell delimiters"].shape[0]) - 1, 0)
+            for axis in "UVZ"
+            if f"{axis} cell delimiters" in h5object
+        )
+        if len(shape) == 3:
+            geometry["shape"] = shape
+            geometry["n_cells"] = shape[0] * shape[1] * shape[2]
+            geometry["n_points"] = (shape[0] + 1) * (shape[1] + 1) * (shape[2] + 1)
+    elif entity_type == "Grid2D" and "U Count" in attrs and "V Count" in attrs:
+        shape = (int(attrs["U Count"]), int(attrs["V Count"]))
+        geometry["shape"] = shape
+        geometry["n_points"] = shape[0] * shape[1]
+        geometry["n_cells"] = max(shape[0] - 1, 0) * max(shape[1] - 1, 0)
+    elif entity_type == "Octree":
+        if all(key in attrs for key in ("NU", "NV", "NW")):
+            geometry["shape"] = (int(attrs["NU"]), int(attrs["NV"]), int(attrs["NW"]))
+        if "Octree Cells" in h5object:
+            geometry["n_cells"] = int(h5object["Octree Cells"].shape[0])
+            # Neighbouring cells share their corners, about one point per cell
+            geometry["n_points"] = geometry["n_cells"]
+    else:
+        geometry["n_points"] = geometry.get("n_vertices", 0)
+    return geometry
+
+
+def _drillhole_group(h5group):
+    """Returns the geometry and fields of a drillhole group, from the shapes of
+    its concatenated arrays or of the arrays of each hole."""
+    fields = {}
+    geometry = {"n_holes": 0, "n_surveys": 0, "n_trace_points": 0, "n_intervals": 0}
+
+    def add(field):
+        if field["name"] in SKIPDATA:
+            return
+        if field["name"] in fields:
+            fields[field["name"]]["size"] += field["size"]
+        else:
+            fields[field["name"]] = field
+
+    if "Concatenated Data" in h5group:
+        concatenated = h5group["Concatenated Data"]
+        if "Concatenated object IDs" in h5group:
+            geometry["n_holes"] = int(h5group["Concatenated object IDs"].shape[0])
+        for key, label in (("n_surveys", "Surveys"), ("n_trace_points", "Trace")):
+            if label in concatenated:
+                geometry[key] = int(concatenated[label].shape[0])
+        for name, dataset in concatenated.get("Data", {}).items():
+            add(_field(name.replace("\u2044", "/"), dataset))
+    else:
+        for h5hole in h5group.get("Objects", {}).values():
+            geometry["n_holes"] += 1
+            for key, label in (("n_surveys", "Surveys"), ("n_trace_points", "Trace")):
+                if label in h5hole:
+                    geometry[key] += int(h5hole[label].shape[0])
+            for field in _object_fields(h5hole):
+                add(field)
+
+    if "FROM" in fields:
+        geometry["n_intervals"] = fields["FROM"]["size"]
+    # One point per interval boundary and trace point, and a segment between each
+    geometry["n_points"] = 2 * geometry["n_intervals"] + geometry["n_trace_points"]
+    geometry["n_cells"] = max(geometry["n_points"] - geometry["n_holes"], 0)
+    return geometry, list(fields.values())
+
+
+def estimate_nbytes(entity_type, geometry, fields):
+    """Returns a rough estimate of the memory used by the VTK data object an
+    entity converts to, in bytes, from its catalog entry. Data values are counted
+    as 64 bit numbers, and referenced data with its array of names.
+
+    Args:
+        entity_type (str): the class name of the entity, or of a base class
+        geometry (dict): the ``geometry`` of the catalog entry
+        fields (list): the ``fields`` of the catalog entry
+    """
+    base = next((name for name in CELL_NBYTES if name in entity_type), None)
+    n_points = geometry.get("n_points", 0)
+    n_cells = geometry.get("n_cells", 0)
+    nbytes = POINT_NBYTES.get(base, 24) * n_points + CELL_NBYTES.get(base, 0) * n_cells
+    for field in fields:
+        size = field["size"]
+        if "DrillholeGroup" in entity_type:
+            # Interval values are spread onto the segments of the traces
+            size = n_cells
+        nbytes += (16 if field["primitive_type"] == "Referenced" else 8) * size
+    return int(nbytes)
+
+
+def _entry(h5group, class_names, path):
+    entity_type = class_names[0]
+    if "DrillholeGroup" in class_names:
+        geometry, fields = _drillhole_group(h5group)
+    elif "ObjectBase" in class_names:
+        geometry, fields = _object_geometry(entity_type, h5group), _object_fields(h5group)
+    else:
+        return None
+    supported = entity_type in SUPPORTED
+    return {
+        "uid": _uid(h5group.attrs["ID"]),
+        "name": _str(h5group.attrs.get("Name", "")),
+        "entity_type": entity_type,
+        "path": path,
+        "supported": supported,
+        "geometry": geometry,
+        "fields": fields,
+        "nbytes": estimate_nbytes(entity_type, geometry, fields) if supported else 0,
+        "_class_names": class_names,
+    }
+
+
+def _walk(h5group, path, entries):
+    """Adds the entries of the objects and drillhole groups held by a group and
+    its subgroups, in the order of geoh5py."""
+    for h5child in h5group.get("Groups", {}).values():
+        class_names = _class_names(h5child)
+        if "DrillholeGroup" in class_names:
+            entries.append(_entry(h5child, class_names, path))
+            continue
+        name = _str(h5child.attrs.get("Name", ""))
+        _walk(h5child, f"{path}/{name}" if path else name, entries)
+    for h5child in h5group.get("Objects", {}).values():
+        entry = _entry(h5child, _class_names(h5child), path)
+        if entry is not None:
+            entries.append(entry)
+
+
+def read_catalog(workspace_path, entity_types=None, names=None, groups=None):
+    """Lists the objects and drillhole groups of a GEOH5 workspace without
+    loading it. Only the HDF5 attributes and the shapes of the datasets are
+    read, never their values, so a large project is listed in milliseconds.
+
+    Each entry is a dictionary with the ``uid``, ``name`` and ``entity_type``
+    (class name) of the entity, the ``path`` of the groups holding it (see
+    :func:`geoh5vista.selection.get_entity_path`), whether geoh5vista can convert
+    it (``supported``), its ``geometry`` counts, e.g. ``n_vertices``,
+    ``n_cells`` and the ``shape`` of grids, its ``fields`` with their
+    ``name``, ``primitive_type``, ``association``, stored ``dtype`` and
+    ``size``, and the estimated memory of its converted mesh (``nbytes``, see
+    :func:`estimate_nbytes`). Drillholes are listed as their group, which is
+    converted as a whole. The fields of concatenated drillhole groups have no
+    ``primitive_type`` nor ``association``, which are not stored as attributes.
+
+    The filters are those of :func:`geoh5vista.selection.select_entities`, and
+    the UIDs of the entries can be passed on as the ``names`` of
+    :func:`geoh5vista.wrapper.read_workspace` to convert only some of them.
+
+    Args:
+        workspace_path (str): path to the geoh5 file
+        entity_types (list): class names to keep, base classes included
+        names (list): glob patterns matched against the entity names and UIDs
+        groups (list): glob patterns matched against the paths of the groups
+            holding each entity
+
+    Example:
+        >>> entries = read_catalog('test_file.geoh5')
+        >>> small = [e["uid"] for e in entries if e["nbytes"] < 100 * 1024**2]
+        >>> project = read_workspace('test_file.geoh5', names=small)
+    """
+    entries = []
+    with h5py.File(workspace_path, "r") as h5file:
+        _walk(h5file[list(h5file)[0]]["Root"], "", entries)
+
+    return [
+        entry
+        for entry in entries
+        if matches_selection(
+            entry.pop("_class_names"),
+            entry["name"],
+            entry["uid"],
+            entry["path"],
+            entity_types=entity_types,
+            names=names,
+            groups=groups,
+        )
+    ]
+
+
+# Now set up the display names for the docs
+read_catalog.__displayname__ = "Read Catalog" # type: ignore
+estimate_nbytes.__displayname__ = "Estimate Memory" # type: ignore
@@ -0,0 +1,103 @@
+"""Methods for the categorical encoding of referenced data"""
+
+
+__all__ = [
+    "get_value_map",
+    "set_value_map",
+    "get_categories",
+    "decode_categories",
+    "categorical_lookup_table",
+]
+
+__displayname__ = "Categorical"
+
+import numpy as np
+import pyvista
+
+
+def get_value_map(data):
+    """Returns the ``{code: name}`` value map of a referenced data.
+
+    Args:
+        data (:class:`geoh5py.data.referenced_data.ReferencedData`): the data
+    """
+    value_map = data.value_map.map
+    return {
+        int(key): value.decode("utf-8") if isinstance(value, bytes) else str(value)
+        for key, value in zip(value_map["Key"], value_map["Value"])
+    }
+
+
+def set_value_map(output, name, value_map):
+    """Stores the value map of a categorical array in
+    ``output.user_dict["value_maps"][name]``, as a ``{"code": name}`` dictionary.
+
+    Args:
+        output: the VTK data object holding the codes
+        name (str): the name of the array of codes
+        value_map (dict): the ``{code: name}`` value map
+    """
+    # The user dict is serialized on assignment, so nested values are replaced whole
+    value_maps = dict(output.user_dict.get("value_maps", {}))
+    value_maps[name] = {str(code): value for code, value in value_map.items()}
+    output.user_dict["value_maps"] = value_maps
+    return output
+
+
+def get_categories(output, name):
+    """Returns the ``{code: name}`` value map of a categorical array.
+
+    Args:
+        output: the VTK data object holding the codes
+        name (str): the name of the array of codes
+    """
+    value_maps = output.user_dict.get("value_maps", {})
+    if name not in value_maps:
+        raise KeyError(f"No value map for the array ({name}).")
+    return {int(code): value for code, value in value_maps[name].items()}
+
+
+def decode_categories(output, name, codes=None, default="N/A"):
+    """Returns the names of the codes of a categorical array. Only one name is
+    looked up per distinct code.
+
+    Args:
+        output: the VTK data object holding the codes
+        name (str): the name of the array of codes
+        codes (:class:`numpy.ndarray`): the codes to decode, e.g. a subset of the
+            cells. Defaults to the whole array.
+        default (str): the name of codes missing from the value map
+    """
+    value_map = get_categories(output, name)
+    if codes is None:
+        codes = output[name]
+    unique_codes, inverse = np.unique(np.asarray(codes), return_inverse=True)
+    names = np.array([value_map.get(int(code), default) for code in unique_codes], dtype=object)
+    return names[inverse.ravel()]
+
+
+def categorical_lookup_table(output, name, cmap="tab20"):
+    """Returns a :class:`pyvista.LookupTable` colouring the codes of a categorical
+    array, with the category names as annotations.
+
+    Args:
+        output: the VTK data object holding the codes
+        name (str): the name of the array of codes
+        cmap (str): the colour map the category colours are drawn from
+
+    Example:
+        >>> lut = categorical_lookup_table(block_model, "lithology")
+        >>> plotter.add_mesh(block_model, scalars="lithology", cmap=lut)
+    """
+    value_map = get_categories(output, name)
+    lut = pyvista.LookupTable(cmap, n_values=max(len(value_map), 1))
+    lut.annotations = value_map
+    lut.SetIndexedLookup(True)
+    return lut
+
+
+get_value_map.__displayname__ = "Value Map" # type: ignore
+set_value_map.__displayname__ = "Set Value Map" # type: ignore
+get_categories.__displayname__ = "Categories" # type: ignore
+decode_categories.__displayname__ = "Decode Categories" # type: ignore
+categorical_lookup_table.__displayname__ = "Categorical Lookup Table" # type: ignore
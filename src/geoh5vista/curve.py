@@ -4,6 +4,8 @@
 __all__ = [
     "curve_to_vtk",
     "curve_geom_to_vtk",
+    "get_line_index",
+    "vtk_line_segments",
     "vtk_geom_to_curve",
     "vtk_to_curve"
 ]
@@ -14,69 +16,166 @@ import numpy as np
 import pyvista
 from geoh5py.objects.curve import Curve
 from geoh5py.workspace.workspace import Workspace
-from geoh5vista.utilities import add_data_to_vtk, add_entity_metadata
+from geoh5vista.utilities import (
+    add_data_to_geoh5,
+    add_data_to_vtk,
+    add_entity_metadata,
+    add_entity_metadata_to_geoh5,
+)
 
 
-def curve_geom_to_vtk(crv):
+def get_line_index(cells, n_vertices=None):
+    """Returns the index of the connected line holding each segment of a curve.
+
+    Lines are the connected components of the graph of segments, labelled with a
+    vectorized union-find: each vertex is linked to the smallest vertex of its
+    segments, and links are shortcut until every vertex points to the smallest
+    vertex of its line. Lines are numbered by decreasing number of segments, like
+    the ``RegionId`` of :meth:`pyvista.DataSetFilters.connectivity`, and lines of
+    the same size in the order of their first segment.
+
+    Args:
+        cells (:class:`numpy.ndarray`): the ``(n, 2)`` vertex indices of the
+            segments
+        n_vertices (int): the number of vertices. Defaults to the largest index
+            plus one.
+    """
+    cells = np.asarray(cells, dtype=np.int64).reshape((-1, 2))
+    if len(cells) == 0:
+        return np.empty(0, dtype=np.int64)
+    if n_vertices is None:
+        n_vertices = int(cells.max()) + 1
+
+    parent = np.arange(n_vertices, dtype=np.int64)
+    start, end = cells[:, 0], cells[:, 1]
+    while True:
+        root_start, root_end = parent[start], parent[end]
+        linked = root_start != root_end
+        if not linked.any():
+            break
+        # Hook the root of each side of a segment to the smaller root
+        smaller = np.minimum(root_start[linked], root_end[linked])
+        np.minimum.at(parent, root_start[linked], smaller)
+        np.minimum.at(parent, root_end[linked], smaller)
+        # Shortcut the links until every vertex points to a root
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+    roots, first, inverse, counts = np.unique(
+        parent[start], return_index=True, return_inverse=True, return_counts=True
+    )
+    order = np.empty(len(roots), dtype=np.int64)
+    order[np.lexsort((first, -counts))] = np.arange(len(roots))
+    return order[inverse.ravel()]
+
+
+def curve_geom_to_vtk(crv, selection=None):
     """Convert the curve to a :class:`pyvista.PolyData` data object.
 
     Args:
         crv (:class:`geoh5py.objects.curve.Curve`): The curve to convert
+        selection (tuple): only convert these vertices and segments, as returned
+            by :meth:`geoh5vista.spatial.Region.select_cells`
 
     Return:
         :class:`pyvista.PolyData`
     """
     ids = crv.cells
+    vertices = crv.vertices
+    # Lines are numbered over the whole curve, whatever the selection
+    line_index = get_line_index(ids, len(vertices))
+    if selection is not None:
+        vertex_index, cell_index, ids = selection
+        vertices, line_index = vertices[vertex_index], line_index[cell_index]
     lines = np.c_[np.full(len(ids), 2, dtype=np.int_), ids]
 
     output = pyvista.PolyData()
-    output.points = crv.vertices
+    output.points = vertices
     output.lines = lines
 
-    indices = output.connectivity().cell_data["RegionId"]
-    output["Line Index"] = indices
+    output.cell_data["Line Index"] = line_index
 
     return output
 
 
-def curve_to_vtk(crv):
+def curve_to_vtk(crv, fields=None, categorical=False, region=None):
     """Convert the curve to a :class:`pyvista.PolyData` data object.
 
     Args:
         crv (:class:`geoh5py.objects.curve.Curve`): The curve to convert
+        fields (list): only read the data with these names, if given
+        categorical (bool): store referenced data as integer codes and a value
+            map, see :func:`geoh5vista.utilities.add_data_to_vtk`
+        region (:class:`geoh5vista.spatial.Region`): only convert the segments
+            with at least one vertex inside this region, if given
 
     Return:
         :class:`pyvista.PolyData`
     """
-   
+    selection = vertices = cells = None
+    if region is not None:
+        selection = region.select_cells(crv.vertices, crv.cells)
+        vertices, cells, _ = selection
+
     # Now add data to lines:
-    output = curve_geom_to_vtk(crv)
-    output = add_data_to_vtk(output, crv)
+    output = curve_geom_to_vtk(crv, selection=selection)
+    output = add_data_to_vtk(
+        output, crv, fields=fields, categorical=categorical, vertices=vertices, cells=cells
+    )
     output = add_entity_metadata(output, crv)
 
     return output
 
 
-def vtk_geom_to_curve(vtk: pyvista.PolyData, workspace: Workspace, name: str) -> Curve:
+def vtk_line_segments(vtk: pyvista.PolyData):
+    """Returns the ``(n, 2)`` point indices of the segments of the lines of a VTK
+    object, and the index of the line holding each segment. Polylines are split
+    into their segments."""
+    if not isinstance(vtk, pyvista.PolyData) or vtk.n_lines == 0:
+        raise ValueError("VTK object should be a PolyData object with lines.")
+    lines = vtk.GetLines()
+    offsets = pyvista.convert_array(lines.GetOffsetsArray()).astype(np.int64)
+    connectivity = pyvista.convert_array(lines.GetConnectivityArray()).astype(np.int64)
+
+    # Every point of a line except its last one starts a segment
+    starts = np.ones(len(connectivity), dtype=bool)
+    starts[offsets[1:][offsets[1:] > offsets[:-1]] - 1] = False
+    starts = np.flatnonzero(starts)
+    segments = np.c_[connectivity[starts], connectivity[starts + 1]]
+    line_index = np.searchsorted(offsets, starts, side="right") - 1
+    return segments, line_index
+
+
+def vtk_geom_to_curve(
+    vtk: pyvista.PolyData, workspace: Workspace, name: str, parent=None
+) -> Curve:
     """Convert a VTK object to a geoh5py Curve object."""
 
     points = vtk.points
-    if isinstance(vtk, pyvista.PolyData) and vtk.lines is not None:
-        lines = vtk.lines.reshape(-1, 3)[:, 1:]
-    else:
-        raise ValueError("VTK object should be a PolyData object with lines.")
+    lines, _ = vtk_line_segments(vtk)
 
-    curve = Curve.create(workspace=workspace, name=name, vertices=points, cells=lines)
+    curve = Curve.create(
+        workspace=workspace, name=name, vertices=points, cells=lines, parent=parent
+    )
     return curve
 
 
-def vtk_to_curve(vtk: pyvista.PolyData, workspace: Workspace, name: str) -> Curve:
-    """Convert a VTK object to a geoh5py Curve object."""
-    curve = vtk_geom_to_curve(vtk=vtk, workspace=workspace, name=name)
+def vtk_to_curve(vtk: pyvista.PolyData, workspace: Workspace, name: str, parent=None) -> Curve:
+    """Convert a VTK object and its point and cell data to a geoh5py Curve object."""
+    curve = vtk_geom_to_curve(vtk=vtk, workspace=workspace, name=name, parent=parent)
+    # Cell data of polylines is repeated on each of their segments
+    _, line_index = vtk_line_segments(vtk)
+    curve = add_data_to_geoh5(curve, vtk, reorder=lambda values: values[line_index])
+    curve = add_entity_metadata_to_geoh5(curve, vtk)
     return curve
 
 
 curve_geom_to_vtk.__displayname__ = "Curve to VTK" # type: ignore
 curve_to_vtk.__displayname__ = "Curve to VTK" # type: ignore
+get_line_index.__displayname__ = "Line Index" # type: ignore
+vtk_line_segments.__displayname__ = "VTK Line Segments" # type: ignore
 vtk_geom_to_curve.__displayname__ = "VTK Geometry to Curve" # type: ignore
 vtk_to_curve.__displayname__ = "VTK to Curve" # type: ignore
@@ -0,0 +1,239 @@
+"""Vectorized desurvey of many drillholes at once"""
+
+
+__all__ = [
+    "desurvey",
+    "desurvey_drillholes",
+]
+
+__displayname__ = "Desurvey"
+
+import numpy as np
+
+from geoh5py.objects.drillhole import INFINITE_RADIUS, MAXIMUM_DEPTH_INTERVAL
+from geoh5py.shared.utils import dip_azimuth_to_vector
+
+
+def _offsets(counts):
+    """Returns the offsets of consecutive blocks of the given sizes."""
+    return np.r_[0, np.cumsum(counts)].astype(np.int64)
+
+
+def _ragged_arange(counts):
+    """Returns ``arange(count)`` for each count, concatenated."""
+    counts = np.asarray(counts, dtype=np.int64)
+    offsets = _offsets(counts)
+    return np.arange(offsets[-1]) - np.repeat(offsets[:-1], counts)
+
+
+def _full_surveys(surveys, survey_offsets, end_of_hole):
+    """Returns the survey rows and hole index of each row, with a row at the
+    collar and one at the end of hole added where missing, in the order of
+    ``Drillhole.densify_survey_values``."""
+    n_holes = len(survey_offsets) - 1
+    holes = np.arange(n_holes)
+    first = surveys[survey_offsets[:-1]].copy()
+    last = surveys[survey_offsets[1:] - 1].copy()
+
+    at_collar = first[:, 0] != 0.0
+    first[:, 0] = 0.0
+    with np.errstate(invalid="ignore"):
+        at_end = end_of_hole > last[:, 0]
+    last[:, 0] = end_of_hole
+
+    rows = np.r_[first[at_collar], surveys, last[at_end]]
+    hole = np.r_[
+        holes[at_collar],
+        np.repeat(holes, np.diff(survey_offsets)),
+        holes[at_end],
+    ]
+    rank = np.r_[
+        np.full(at_collar.sum(), -1),
+        np.arange(len(surveys)),
+        np.full(at_end.sum(), len(surveys)),
+    ]
+    order = np.lexsort((rank, hole))
+    return rows[order], hole[order]
+
+
+def _densify(rows, hole):
+    """Adds survey rows every ``MAXIMUM_DEPTH_INTERVAL`` along the long intervals,
+    then sorts the rows of each hole and drops duplicates, as
+    ``Drillhole.densify_survey_values`` does."""
+    same_hole = hole[1:] == hole[:-1]
+    deltas = np.diff(rows[:, 0])
+    long = same_hole & (deltas >= MAXIMUM_DEPTH_INTERVAL)
+
+    # geoh5py only densifies the holes with more than one long interval
+    n_long = np.bincount(hole[:-1][long], minlength=hole.max() + 1)
+    long &= n_long[hole[:-1]] > 1
+
+    start = np.flatnonzero(long)
+    delta = deltas[start]
+    counts = np.maximum(np.ceil(delta / MAXIMUM_DEPTH_INTERVAL).astype(np.int64) - 1, 0)
+    step = (_ragged_arange(counts) + 1) * MAXIMUM_DEPTH_INTERVAL
+    index = np.repeat(start, counts)
+    delta = np.repeat(delta, counts)
+    d_azm = (rows[index + 1, 1] - rows[index, 1]) / delta
+    d_dip = (rows[index + 1, 2] - rows[index, 2]) / delta
+    new_rows = np.c_[
+        rows[index, 0] + step,
+        rows[index, 1] + d_azm * step,
+        rows[index, 2] + d_dip * step,
+    ]
+
+    rows = np.r_[rows, new_rows]
+    hole = np.r_[hole, hole[index]]
+    order = np.lexsort((rows[:, 2], rows[:, 1], rows[:, 0], hole))
+    rows, hole = rows[order], hole[order]
+    keep = np.ones(len(rows), dtype=bool)
+    keep[1:] = (hole[1:] != hole[:-1]) | np.any(rows[1:] != rows[:-1], axis=1)
+    return rows[keep], hole[keep]
+
+
+def _intervals(collars, rows, hole, row_offsets):
+    """Returns the arcs between the survey rows, as the ``rad``, ``tangential``,
+    ``unit_vector`` and ``locations`` of ``Drillhole.compute_intervals`` stacked
+    over all holes."""
+    unit_vector = dip_azimuth_to_vector(rows[:, 2], rows[:, 1])
+    radius = np.full(len(rows), INFINITE_RADIUS)
+    tangential = np.zeros((len(rows), 3))
+    step = np.zeros((len(rows), 3))
+
+    pair = np.flatnonzero(hole[1:] == hole[:-1])
+    above, below = unit_vector[pair], unit_vector[pair + 1]
+    cross = np.cross(above, below, axis=1)
+    vr = np.linalg.norm(cross, axis=1)
+    dot = np.sum(above * below, axis=1)
+    tangent = below - dot[:, None] * above
+    norm = np.linalg.norm(tangent, axis=1)
+    norm[norm == 0.0] = INFINITE_RADIUS
+    tangent /= norm[:, None]
+    alpha = np.abs(0.5 * np.pi - np.arctan2(dot, vr))
+    alpha[alpha == 0.0] = INFINITE_RADIUS**-1.0
+    radius[pair] = (rows[pair + 1, 0] - rows[pair, 0]) / alpha
+    tangential[pair] = tangent
+    step[pair] = radius[pair, None] * (
+        np.sin(alpha)[:, None] * above + (1 - np.cos(alpha))[:, None] * tangent
+    )
+
+    # Accumulate the arcs down each hole in the order geoh5py sums them, one
+    # row of every hole at a time
+    n_rows = np.diff(row_offsets)
+    total = np.zeros((len(collars), 3))
+    locations = np.empty((len(rows), 3))
+    locations[row_offsets[:-1]] = collars
+    for position in range(1, n_rows.max(initial=0)):
+        holes = np.flatnonzero(n_rows > position)
+        index = row_offsets[holes] + position
+        total[holes] += step[index - 1]
+        locations[index] = collars[holes] + total[holes]
+    return radius, tangential, unit_vector, locations
+
+
+def desurvey(collars, surveys, survey_offsets, depths, depth_offsets, end_of_hole=None):
+    """Returns the ``xyz`` locations of depths along many drillholes, computed
+    together by minimum curvature. The result matches
+    :meth:`geoh5py.objects.drillhole.Drillhole.desurvey` of each hole.
+
+    The surveys and depths of all holes are given as flat arrays, where those of
+    hole ``i`` are the rows ``offsets[i]:offsets[i + 1]``.
+
+    Args:
+        collars (np.ndarray): the ``(n_holes, 3)`` collar locations
+        surveys (np.ndarray): the ``depth, azimuth, dip`` rows of the surveys, at
+            least one per hole
+        survey_offsets (np.ndarray): the ``n_holes + 1`` offsets of the surveys
+        depths (np.ndarray): the depths to locate
+        depth_offsets (np.ndarray): the ``n_holes + 1`` offsets of the depths
+        end_of_hole (np.ndarray): the end of hole depths, ``NaN`` where unknown
+
+    Returns:
+        np.ndarray: the ``(len(depths), 3)`` locations
+    """
+    collars = np.asarray(collars, dtype=float).reshape((-1, 3))
+    surveys = np.asarray(surveys, dtype=float).reshape((-1, 3))
+    survey_offsets = np.asarray(survey_offsets, dtype=np.int64)
+    depths = np.asarray(depths, dtype=float).ravel()
+    depth_offsets = np.asarray(depth_offsets, dtype=np.int64)
+    n_holes = len(collars)
+    if end_of_hole is None:
+        end_of_hole = np.full(n_holes, np.nan)
+    end_of_hole = np.asarray(end_of_hole, dtype=float)
+    n_surveys = np.diff(survey_offsets)
+    if len(survey_offsets) != n_holes + 1 or len(depth_offsets) != n_holes + 1:
+        raise ValueError("Expected one more survey and depth offset than holes.")
+    if np.any(n_surveys < 1):
+        raise ValueError("Every hole needs at least one survey.")
+    if n_holes == 0 or len(depths) == 0:
+        return np.empty((len(depths), 3))
+
+    rows, hole = _full_surveys(surveys, survey_offsets, end_of_hole)
+    rows, hole = _densify(rows, hole)
+
+    # Holes with a single survey go straight down from the collar
+    position = _ragged_arange(np.bincount(hole, minlength=n_holes))
+    keep = (n_surveys[hole] > 1) | (position == 0)
+    rows, hole = rows[keep], hole[keep]
+    row_offsets = _offsets(np.bincount(hole, minlength=n_holes))
+    radius, tangential, unit_vector, locations = _intervals(collars, rows, hole, row_offsets)
+
+    # Index of the last survey row above each depth, from a merged sort of the
+    # rows and depths of every hole. Depths above the first row take the last
+    # row of the hole, like the wrapped index of geoh5py.
+    depth_hole = np.repeat(np.arange(n_holes), np.diff(depth_offsets))
+    kind = np.r_[np.zeros(len(rows), dtype=np.int8), np.ones(len(depths), dtype=np.int8)]
+    order = np.lexsort((kind, np.r_[rows[:, 0], depths], np.r_[hole, depth_hole]))
+    n_above = np.cumsum(kind[order] == 0)
+    is_depth = kind[order] == 1
+    index = np.empty(len(depths), dtype=np.int64)
+    index[order[is_depth] - len(rows)] = n_above[is_depth] - 1
+    wrapped = index < row_offsets[depth_hole]
+    index[wrapped] = row_offsets[depth_hole[wrapped] + 1] - 1
+
+    radii = radius[index]
+    radii[radii == 0.0] = 1.0
+    angle = (depths - rows[index, 0]) / radii
+    return locations[index] + radii[:, None] * (
+        np.sin(angle)[:, None] * unit_vector[index]
+        + (1 - np.cos(angle))[:, None] * tangential[index]
+    )
+
+
+def desurvey_drillholes(holes, depths):
+    """Returns the ``xyz`` locations of depths along each drillhole, computed for
+    all holes in a single pass, see :func:`desurvey`.
+
+    Args:
+        holes (list): the :class:`geoh5py.objects.drillhole.Drillhole` objects
+        depths (list): an array of depths per hole
+
+    Returns:
+        list: a ``(len(depths[i]), 3)`` array per hole
+    """
+    holes = list(holes)
+    depths = [np.asarray(d, dtype=float).ravel() for d in depths]
+    if len(depths) != len(holes):
+        raise ValueError("Expected one array of depths per hole.")
+    if not holes:
+        return []
+    surveys = [dh.surveys for dh in holes]
+    collars = np.array([np.asarray(dh.collar.tolist(), dtype=float) for dh in holes])
+    end_of_hole = np.array(
+        [np.nan if dh.end_of_hole is None else dh.end_of_hole for dh in holes], dtype=float
+    )
+    depth_offsets = _offsets([len(d) for d in depths])
+    locations = desurvey(
+        collars,
+        np.concatenate(surveys) if surveys else np.empty((0, 3)),
+        _offsets([len(s) for s in surveys]),
+        np.concatenate(depths) if depths else np.empty(0),
+        depth_offsets,
+        end_of_hole,
+    )
+    return np.split(locations, depth_offsets[1:-1])
+
+
+# Now set up the display names for the docs
+desurvey.__displayname__ = "Desurvey" # type: ignore
+desurvey_drillholes.__displayname__ = "Desurvey Drillholes" # type: ignore
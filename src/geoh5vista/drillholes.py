@@ -2,7 +2,11 @@
 
 
 __all__ = [
+    "drillhole_traces",
     "drillholes_to_vtk",
+    "drillholes_merged_to_vtk",
+    "load_concatenated_values",
+    "select_drillholes",
 ]
 
 __displayname__ = "Drillholes"
@@ -10,27 +14,225 @@ __displayname__ = "Drillholes"
 import numpy as np
 import pyvista
 
-from geoh5py.objects.drillhole import Drillhole
-from geoh5py.groups.drillhole import DrillholeGroup
-from geoh5py.groups.drillhole import IntegratorDrillholeGroup
-from geoh5vista.utilities import add_drillhole_interval_data_to_vtk
+from geoh5py.shared.concatenation import Concatenator
+from geoh5py.shared.utils import as_str_if_uuid
+from geoh5vista.categorical import set_value_map
+from geoh5vista.desurvey import desurvey_drillholes
+from geoh5vista.instrumentation import stage
+from geoh5vista.spatial import get_bounds
+from geoh5vista.utilities import (
+    add_drillhole_interval_data_to_vtk,
+    get_data_fields,
+    get_drillhole_interval_data,
+)
 
-def drillholes_to_vtk(dhgrp):
-    #TO DO
-    print(dhgrp.name)
-    dh_multi = pyvista.MultiBlock()
-    for dh in dhgrp.children:
-        if len(dh.to_[0].values)>0:
-            data_intervals = np.sort(np.unique(np.concatenate([dh.to_[0].values, dh.from_[0].values, dh.trace_depth])))
-            data_intervals_locations = dh.desurvey(data_intervals)
-            line = pyvista.lines_from_points(data_intervals_locations)
-            line["depth"] = data_intervals
-            line = add_drillhole_interval_data_to_vtk(line, dh)
-            dh_multi.append(line, name=dh.name)
+# Concatenated arrays holding the geometry of each hole, by attribute
+CONCATENATED_GEOMETRY = {"_trace": "Trace", "_surveys": "Surveys"}
+
+
+def _concatenated_field(dhgrp, label):
+    """Returns the values and index of a concatenated field, from the arrays
+    already loaded by geoh5py or else read from the file."""
+    loaded = getattr(dhgrp, "_data", None)
+    if loaded is not None and label in loaded:
+        return loaded[label], dhgrp.index[label]
+    return dhgrp.workspace.fetch_concatenated_values(dhgrp, label) or (None, None)
+
+
+@stage("data")
+def load_concatenated_values(dhgrp, fields=None, holes=None):
+    """Reads the concatenated arrays of a
+    :class:`geoh5py.groups.drillhole.ConcatenatorDrillholeGroup` once each, and
+    hands each hole its slice of them: its trace and surveys, and the values of
+    its interval data. Only the data listed in ``fields`` is read, if given,
+    with the ``FROM`` and ``TO`` depths of their interval tables.
+
+    geoh5py otherwise loads every concatenated field on first access, then looks
+    up the slice of each hole and field with a search through the whole index.
+    Values that are already loaded are left as they are, and groups that are not
+    concatenated are left untouched.
+
+    Args:
+        dhgrp (:class:`geoh5py.groups.drillhole.DrillholeGroup`): the drillhole
+            group
+        fields (list): only read the interval data with these names, if given
+        holes (list): only hand out the data values of these holes, if given.
+            The geometry of every hole is loaded.
+    """
+    if not isinstance(dhgrp, Concatenator):
+        return
+
+    data_by_name = {}
+    for dh in dhgrp.children if holes is None else holes:
+        names = set(get_data_fields(dh, fields))
+        for intervals in (dh.from_, dh.to_):
+            names.update(data.name for data in (intervals or []))
+        for name in names:
+            for data in dh.get_data(name):
+                if getattr(data, "_values", None) is None:
+                    data_by_name.setdefault(name, []).append(data)
+
+    for attribute, label in CONCATENATED_GEOMETRY.items():
+        missing = [dh for dh in dhgrp.children if getattr(dh, attribute, None) is None]
+        values, index = _concatenated_field(dhgrp, label) if missing else (None, None)
+        if values is None:
+            continue
+        slices = {
+            key: (start, size)
+            for start, size, key in zip(index["Start index"], index["Size"], index["Object ID"])
+        }
+        for dh in missing:
+            key = as_str_if_uuid(dh.uid).encode()
+            if key in slices:
+                start, size = slices[key]
+                setattr(dh, attribute, values[start:start + size])
+
+    for name, data_list in data_by_name.items():
+        values, index = _concatenated_field(dhgrp, name)
+        if values is None:
+            continue
+        slices = {
+            key: (start, size)
+            for start, size, key in zip(index["Start index"], index["Size"], index["Data ID"])
+        }
+        for data in data_list:
+            key = as_str_if_uuid(data.uid).encode()
+            if key in slices:
+                start, size = slices[key]
+                data._values = data.validate_values(  # pylint: disable=protected-access
+                    values[start:start + size]
+                )
+
+
+def _first(data):
+    """Returns the data, or the first of a list of data as returned by the
+    ``from_`` and ``to_`` of concatenated drillholes."""
+    if isinstance(data, (list, tuple)):
+        return data[0] if data else None
+    return data
+
+
+def drillhole_traces(holes):
+    """Returns the depths and the desurveyed ``xyz`` locations of the points of
+    the trace of each drillhole, and whether the hole carries interval data.
+
+    Holes with interval data are desurveyed at every interval boundary and trace
+    depth, so each line segment falls within a single interval. The boundaries
+    of all holes are sorted and desurveyed together, see
+    :func:`geoh5vista.desurvey.desurvey_drillholes`.
+
+    Args:
+        holes (list): the :class:`geoh5py.objects.drillhole.Drillhole` objects
+    """
+    holes = list(holes)
+    traces = [None] * len(holes)
+    index, boundaries = [], []
+    for i, dh in enumerate(holes):
+        to_, from_ = _first(dh.to_), _first(dh.from_)
+        if to_ is not None and len(to_.values) > 0:
+            index.append(i)
+            boundaries.append(np.concatenate([to_.values, from_.values, dh.trace_depth]))
         else:
-            line = pyvista.lines_from_points(dh.trace)
-            line["depth"] = dh.trace_depth
-            dh_multi.append(line, name=dh.name)
+            traces[i] = (dh.trace_depth, dh.trace, False)
+    if not index:
+        return traces
+
+    # Sorted unique depths of each hole, from a single sort of all holes
+    hole = np.repeat(np.arange(len(index)), [len(b) for b in boundaries])
+    depths = np.concatenate(boundaries).astype(float)
+    order = np.lexsort((depths, hole))
+    hole, depths = hole[order], depths[order]
+    unique = np.ones(len(depths), dtype=bool)
+    unique[1:] = (hole[1:] != hole[:-1]) | (
+        (depths[1:] != depths[:-1]) & ~(np.isnan(depths[1:]) & np.isnan(depths[:-1]))
+    )
+    hole, depths = hole[unique], depths[unique]
+    depths = np.split(depths, np.searchsorted(hole, np.arange(1, len(index))))
+
+    locations = desurvey_drillholes([holes[i] for i in index], depths)
+    for i, hole_depths, hole_locations in zip(index, depths, locations):
+        traces[i] = (hole_depths, hole_locations, True)
+    return traces
+
+
+def _hole_bounds(dh):
+    """Returns the bounds of the stored trace of a drillhole, or ``None`` if it
+    has none."""
+    trace = dh.trace
+    if trace is None or len(trace) == 0:
+        return None
+    collar = np.asarray(dh.collar.tolist(), dtype=float).reshape((1, 3))
+    return get_bounds(np.r_[collar, np.asarray(trace, dtype=float).reshape((-1, 3))])
+
+
+def select_drillholes(dhgrp, fields=None, region=None):
+    """Returns the holes of a drillhole group to convert, and loads their values
+    with :func:`load_concatenated_values`.
+
+    With a ``region``, only the holes whose stored trace has bounds intersecting
+    the bounding box of the region are kept, and the data of the other holes is
+    never read nor desurveyed.
+
+    Args:
+        dhgrp (:class:`geoh5py.groups.drillhole.DrillholeGroup`): the drillhole
+            group
+        fields (list): only read the interval data with these names, if given
+        region (:class:`geoh5vista.spatial.Region`): the region, if any
+    """
+    holes = list(dhgrp.children)
+    if region is not None:
+        # The traces are needed first to select the holes
+        load_concatenated_values(dhgrp, holes=[])
+        holes = [dh for dh in holes if region.intersects(_hole_bounds(dh))]
+    load_concatenated_values(dhgrp, fields, holes=holes)
+    return holes
+
+
+def _remove_segments_outside(output, region):
+    """Returns line segments with those without any point inside a region
+    removed, along with their cell data and unused points."""
+    segments = output.lines.reshape((-1, 3))[:, 1:]
+    keep = region.contains(output.points)[segments].any(axis=1)
+    if keep.all():
+        return output
+    return output.remove_cells(np.flatnonzero(~keep), inplace=False)
+
+
+def drillholes_to_vtk(dhgrp, merged=False, fields=None, categorical=False, region=None):
+    """Convert a drillhole group to a :class:`pyvista.MultiBlock` holding one
+    :class:`pyvista.PolyData` line per hole.
+
+    Args:
+        dhgrp (:class:`geoh5py.groups.drillhole.DrillholeGroup`): the drillhole
+            group to convert
+        merged (bool): if ``True``, return a single :class:`pyvista.PolyData` for
+            the whole group instead, see :func:`drillholes_merged_to_vtk`
+        fields (list): only read the interval data with these names, if given
+        categorical (bool): store referenced data as integer codes and a value
+            map, see :func:`geoh5vista.utilities.get_drillhole_interval_data`
+        region (:class:`geoh5vista.spatial.Region`): only convert the segments
+            with at least one point inside this region, if given, see
+            :func:`select_drillholes`. Holes without any are left out.
+    """
+    if merged:
+        return drillholes_merged_to_vtk(
+            dhgrp, fields=fields, categorical=categorical, region=region
+        )
+
+    dh_multi = pyvista.MultiBlock()
+    holes = select_drillholes(dhgrp, fields, region)
+    for dh, (depths, locations, has_intervals) in zip(holes, drillhole_traces(holes)):
+        line = pyvista.lines_from_points(locations)
+        line["depth"] = depths
+        if has_intervals:
+            line = add_drillhole_interval_data_to_vtk(
+                line, dh, fields=fields, categorical=categorical
+            )
+        if region is not None:
+            line = _remove_segments_outside(line, region)
+            if line.n_cells == 0:
+                continue
+        dh_multi.append(line, name=dh.name)
 
     dh_multi.user_dict["name"] = dhgrp.name
     dh_multi.user_dict["colour"] = "black"
@@ -38,5 +240,95 @@ def drillholes_to_vtk(dhgrp):
     return dh_multi
 
 
+def drillholes_merged_to_vtk(dhgrp, fields=None, categorical=False, region=None):
+    """Convert a drillhole group to a single :class:`pyvista.PolyData` holding
+    the line segments of every hole.
+
+    The ``hole_id`` cell array gives the index of the hole owning each segment in
+    the ``hole_names`` field data array. Interval data of all holes is
+    concatenated into shared cell arrays, filled with ``NaN`` (float), ``-1``
+    (integer and referenced) or ``"N/A"`` (names) for holes without the field.
+
+    Args:
+        dhgrp (:class:`geoh5py.groups.drillhole.DrillholeGroup`): the drillhole
+            group to convert
+        fields (list): only read the interval data with these names, if given
+        categorical (bool): store referenced data as integer codes and a value
+            map, see :func:`geoh5vista.utilities.get_drillhole_interval_data`
+        region (:class:`geoh5vista.spatial.Region`): only convert the segments
+            with at least one point inside this region, if given, see
+            :func:`select_drillholes`. ``hole_names`` lists the holes selected
+            by their bounds.
+    """
+    names = []
+    value_maps = {}
+    depths = []
+    locations = []
+    # Indices of the holes carrying each field, and their values
+    field_holes = {}
+    field_values = {}
+    holes = select_drillholes(dhgrp, fields, region)
+    for i, (dh, trace) in enumerate(zip(holes, drillhole_traces(holes))):
+        hole_depths, hole_locations, has_intervals = trace
+        names.append(dh.name)
+        depths.append(np.asarray(hole_depths, dtype=float))
+        locations.append(np.asarray(hole_locations, dtype=float).reshape((-1, 3)))
+        if not has_intervals:
+            continue
+        cell_data = get_drillhole_interval_data(hole_depths, dh, fields, categorical, value_maps)
+        for f, values in cell_data.items():
+            field_holes.setdefault(f, []).append(i)
+            field_values.setdefault(f, []).append(values)
+
+    # Offsets of the points and cells of each hole in the merged arrays
+    n_points = np.array([len(d) for d in depths], dtype=np.int64)
+    n_cells = np.maximum(n_points - 1, 0)
+    point_offsets = np.r_[0, np.cumsum(n_points)]
+    cell_offsets = np.r_[0, np.cumsum(n_cells)]
+
+    # Every point except the last one of each hole starts a segment
+    segment_start = np.ones(point_offsets[-1], dtype=bool)
+    segment_start[point_offsets[1:][n_points > 0] - 1] = False
+    starts = np.flatnonzero(segment_start)
+    lines = np.column_stack([np.full(len(starts), 2), starts, starts + 1]).ravel()
+
+    output = pyvista.PolyData()
+    output.points = np.concatenate(locations) if locations else np.empty((0, 3))
+    output.lines = lines
+    output["depth"] = np.concatenate(depths) if depths else np.empty(0)
+    output.cell_data["hole_id"] = np.repeat(np.arange(len(names)), n_cells)
+
+    for f, values in field_values.items():
+        dtype = values[0].dtype
+        if dtype == object:
+            merged_values = np.full(cell_offsets[-1], "N/A", dtype=object)
+        elif np.issubdtype(dtype, np.floating):
+            merged_values = np.full(cell_offsets[-1], np.nan, dtype=dtype)
+        else:
+            merged_values = np.full(cell_offsets[-1], -1, dtype=dtype)
+        # The cells of the holes carrying the field, from their offsets
+        present = np.asarray(field_holes[f], dtype=np.int64)
+        sizes = n_cells[present]
+        shift = cell_offsets[present] - (np.cumsum(sizes) - sizes)
+        merged_values[np.arange(sizes.sum()) + np.repeat(shift, sizes)] = np.concatenate(values)
+        output.cell_data[f] = merged_values
+
+    for f, value_map in value_maps.items():
+        set_value_map(output, f, value_map)
+
+    if region is not None:
+        output = _remove_segments_outside(output, region)
+
+    output.field_data["hole_names"] = np.array(names, dtype=str)
+    output.user_dict["name"] = dhgrp.name
+    output.user_dict["colour"] = "black"
+    output.user_dict["entity_type"] = "Drillholes"
+    return output
+
+
 # Now set up the display names for the docs
 drillholes_to_vtk.__displayname__ = "Drillholes to VTK" # type: ignore
+drillholes_merged_to_vtk.__displayname__ = "Drillholes to Merged VTK" # type: ignore
+drillhole_traces.__displayname__ = "Drillhole Traces" # type: ignore
+load_concatenated_values.__displayname__ = "Load Concatenated Values" # type: ignore
+select_drillholes.__displayname__ = "Select Drillholes" # type: ignore
@@ -0,0 +1,188 @@
+"""Export of whole workspaces to VTK files, one entity at a time"""
+
+
+__all__ = [
+    "export_workspace",
+]
+
+__displayname__ = "Export"
+
+from contextlib import nullcontext
+from functools import partial
+from pathlib import Path
+import re
+import xml.etree.ElementTree as ET
+
+import pyvista
+from geoh5py.workspace.workspace import Workspace
+
+from geoh5vista.blockmodel import get_blockmodel_window
+from geoh5vista.cache import save_vtk
+from geoh5vista.instrumentation import Recorder
+from geoh5vista.spatial import as_region, get_entity_bounds
+from geoh5vista.wrapper import (
+    check_multiblock_options,
+    convert_entity,
+    list_entities,
+    release_entity,
+)
+
+# Number of cells of the slabs block models are written in
+DEFAULT_CHUNK_CELLS = 2_000_000
+
+
+def _file_name(name):
+    """Returns a name usable in a file name."""
+    return re.sub(r"[^\w.-]+", "_", name).strip("._") or "block"
+
+
+def _write_block(output, name, prefix, directory, element):
+    """Writes a converted object to a VTK XML file, or the blocks of a
+    :class:`pyvista.MultiBlock` to one file each, and adds them to a ``.vtm``
+    element."""
+    index = str(len(element))
+    if isinstance(output, pyvista.MultiBlock):
+        block = ET.SubElement(element, "Block", index=index, name=name)
+        for i, child in enumerate(output):
+            if child is not None:
+                _write_block(child, output.get_block_name(i) or f"Block {i}", f"{prefix}_{i}", directory, block)
+        return
+    path = save_vtk(output, directory / f"{prefix}_{_file_name(name)}")
+    ET.SubElement(
+        element,
+        "DataSet",
+        index=index,
+        name=name,
+        file=f"{directory.name}/{path.name}",
+    )
+
+
+def _slabs(entity, converter_options, region, chunk_cells):
+    """Returns the ``ijk`` windows of the slabs a block model is converted in, or
+    ``None`` to convert an entity whole. Slabs are ranges of the ``j`` axis, the
+    slowest varying axis of the data arrays of block models, so each slab of
+    each array is read as a single hyperslab. They cover the window selected by
+    the ``ijk``, ``bounds`` or ``region`` options, if any."""
+    if not chunk_cells or entity.__class__.__name__ != "BlockModel":
+        return None
+    options = (converter_options or {}).get("BlockModel", {})
+    (i0, i1), (j0, j1), (k0, k1) = get_blockmodel_window(
+        entity,
+        ijk=options.get("ijk"),
+        bounds=options.get("bounds"),
+        region=as_region(options.get("region", region)),
+    )
+    if (i1 - i0) * (j1 - j0) * (k1 - k0) <= chunk_cells:
+        return None
+    step = max(int(chunk_cells) // max((i1 - i0) * (k1 - k0), 1), 1)
+    return [((i0, i1), (j, min(j + step, j1)), (k0, k1)) for j in range(j0, j1, step)]
+
+
+def export_workspace(
+    workspace_path,
+    output_path,
+    chunk_cells=DEFAULT_CHUNK_CELLS,
+    converter_options=None,
+    entity_types=None,
+    names=None,
+    groups=None,
+    fields=None,
+    exclude_fields=None,
+    categorical=False,
+    instrumentation=None,
+    region=None,
+):
+    """Exports the entities of a GEOH5 workspace to a ``.vtm`` multiblock file and
+    a directory of VTK XML files, one per block, written as each entity is
+    converted. Returns the path of the ``.vtm`` file.
+
+    Unlike saving the output of :func:`geoh5vista.wrapper.read_workspace`, only
+    one converted entity is held in memory at a time, and the values read for it
+    are released once it is written. Block models with more than
+    ``chunk_cells`` cells are converted and written in slabs of at most
+    ``chunk_cells`` cells along their ``j`` axis, each slab reading only its own
+    hyperslab of the data arrays, so their size does not bound the peak memory.
+    A sliced block model is a nested block of its slabs in the ``.vtm`` file.
+
+    The block files are written to a directory named after the ``.vtm`` file,
+    e.g. ``project/`` for ``project.vtm``, in the formats of
+    :class:`geoh5vista.cache.DiskCache`. Their ``user_dict`` (name, colour,
+    value maps) is kept in the field data, as by :meth:`pyvista.DataSet.save`.
+
+    Args:
+        workspace_path (str): path to the geoh5 file
+        output_path (str): path of the ``.vtm`` file to write
+        chunk_cells (int): the largest number of cells of a block model
+            converted at once, or ``None`` to convert them whole
+        converter_options (dict): keyword arguments for the converters, keyed by
+            entity class name, see :func:`geoh5vista.wrapper.entities_to_vtk`.
+            Block models given an ``ijk`` or ``bounds`` window are sliced within
+            it.
+        entity_types (list): only export entities of these class names
+        names (list): only export entities whose name or UID matches one of
+            these glob patterns
+        groups (list): only export entities held under a group whose path
+            matches one of these glob patterns
+        fields (list or dict): glob patterns of the data fields to export
+        exclude_fields (list or dict): glob patterns of the data fields to skip
+        categorical (bool): store referenced data as integer codes with a value
+            map
+        instrumentation (:class:`geoh5vista.instrumentation.Recorder` or callable):
+            a recorder of the conversions, see
+            :func:`geoh5vista.wrapper.read_workspace`. Block model slabs are
+            recorded as one event each.
+        region (:class:`geoh5vista.spatial.Region` or tuple): only export the
+            parts of the entities inside this region, see
+            :func:`geoh5vista.wrapper.read_workspace`
+
+    Example:
+        >>> export_workspace('test_file.geoh5', 'export/project.vtm', chunk_cells=1_000_000)
+        >>> project = pyvista.read('export/project.vtm')
+    """
+    check_multiblock_options(converter_options)
+    output_path = Path(output_path)
+    if output_path.suffix != ".vtm":
+        raise ValueError(f"The output ({output_path}) must be a .vtm file.")
+    directory = output_path.with_suffix("")
+    directory.mkdir(parents=True, exist_ok=True)
+
+    recorder = instrumentation
+    if recorder is not None and not isinstance(recorder, Recorder):
+        recorder = Recorder(callback=instrumentation)
+
+    root = ET.Element("VTKFile", type="vtkMultiBlockDataSet", version="1.0", byte_order="LittleEndian")
+    blocks = ET.SubElement(root, "vtkMultiBlockDataSet")
+    region = as_region(region)
+    with Workspace(workspace_path, mode="r") as workspace:
+        for entity in list_entities(workspace, entity_types, names, groups):
+            if region is not None and not region.intersects(get_entity_bounds(entity)):
+                continue
+            convert = partial(
+                convert_entity,
+                entity,
+                converter_options,
+                fields,
+                exclude_fields,
+                categorical=categorical,
+                region=region,
+            )
+            prefix = str(len(blocks))
+            slabs = _slabs(entity, converter_options, region, chunk_cells)
+            with recorder.activate() if recorder is not None else nullcontext():
+                if slabs is None:
+                    _write_block(convert(), entity.name, prefix, directory, blocks)
+                else:
+                    element = ET.SubElement(blocks, "Block", index=prefix, name=entity.name)
+                    for i, ijk in enumerate(slabs):
+                        slab = convert(ijk=ijk)
+                        _write_block(slab, f"{entity.name} {i}", f"{prefix}_{i}", directory, element)
+                        del slab
+            release_entity(entity)
+
+    ET.indent(root)
+    ET.ElementTree(root).write(output_path, encoding="utf-8", xml_declaration=True)
+    return output_path
+
+
+# Now set up the display names for the docs
+export_workspace.__displayname__ = "Export Workspace" # type: ignore
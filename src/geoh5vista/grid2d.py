@@ -2,7 +2,9 @@
 
 
 __all__ = [
-    "grid2d_to_vtk"
+    "grid2d_to_vtk",
+    "vtk_geom_to_grid2d",
+    "vtk_to_grid2d",
 ]
 
 __displayname__ = "Grid2D"
@@ -10,8 +12,15 @@ __displayname__ = "Grid2D"
 import numpy as np
 import pyvista
 
+from geoh5py.objects.grid2d import Grid2D
 from geoh5py.shared.utils import xy_rotation_matrix, yz_rotation_matrix
-from geoh5vista.utilities import add_data_to_vtk, add_entity_metadata #, add_texture_coordinates
+from geoh5py.workspace.workspace import Workspace
+from geoh5vista.utilities import (
+    add_data_to_geoh5,
+    add_data_to_vtk,
+    add_entity_metadata,
+    add_entity_metadata_to_geoh5,
+) #, add_texture_coordinates
 
 
 def grid2d_geom_to_vtk(grd):
@@ -41,20 +50,62 @@ def grid2d_geom_to_vtk(grd):
     return output
 
 
-def grid2d_to_vtk(grd):
+def grid2d_to_vtk(grd, fields=None, categorical=False):
     """Convert the 2D grid to a :class:`pyvista.RectilinearGrid` object.
 
     Args:
         grd (:class:`geoh5py.objects.grid2d.Grid2D`): the surface
             grid geometry to convert
+        fields (list): only read the data with these names, if given
+        categorical (bool): store referenced data as integer codes and a value
+            map, see :func:`geoh5vista.utilities.add_data_to_vtk`
 
     """
     output = grid2d_geom_to_vtk(grd)
-    output = add_data_to_vtk(output, grd)
+    output = add_data_to_vtk(output, grd, fields=fields, categorical=categorical)
     output = add_entity_metadata(output, grd)
     
     return output
 
 
+def vtk_geom_to_grid2d(
+    vtk: pyvista.ImageData, workspace: Workspace, name: str, parent=None
+) -> Grid2D:
+    """Convert a flat :class:`pyvista.ImageData`, as made by
+    :func:`grid2d_geom_to_vtk`, to a geoh5py Grid2D object. The grid points are
+    the Grid2D cells, and the rotation is read from the direction matrix."""
+    if not isinstance(vtk, pyvista.ImageData) or vtk.dimensions[2] != 1:
+        raise ValueError("VTK object should be an ImageData object with a single layer.")
+    direction = np.asarray(vtk.direction_matrix)
+    if not np.allclose(direction[:, 2], [0, 0, 1]):
+        raise ValueError("Only grids rotated about the vertical axis are supported.")
+
+    grid = Grid2D.create(
+        workspace,
+        name=name,
+        origin=np.asarray(vtk.origin, dtype=float),
+        u_cell_size=float(vtk.spacing[0]),
+        v_cell_size=float(vtk.spacing[1]),
+        u_count=int(vtk.dimensions[0]),
+        v_count=int(vtk.dimensions[1]),
+        rotation=float(np.rad2deg(np.arctan2(direction[1, 0], direction[0, 0]))),
+        parent=parent,
+    )
+    return grid
+
+
+def vtk_to_grid2d(
+    vtk: pyvista.ImageData, workspace: Workspace, name: str, parent=None
+) -> Grid2D:
+    """Convert a flat :class:`pyvista.ImageData` and its point data to a geoh5py
+    Grid2D object with cell data."""
+    grid = vtk_geom_to_grid2d(vtk, workspace, name, parent=parent)
+    grid = add_data_to_geoh5(grid, vtk, point_association="CELL", cell_association=None)
+    grid = add_entity_metadata_to_geoh5(grid, vtk)
+    return grid
+
+
 grid2d_geom_to_vtk.__displayname__ = "Grid2D Geometry to VTK" # type: ignore
 grid2d_to_vtk.__displayname__ = "Grid2D to VTK" # type: ignore
+vtk_geom_to_grid2d.__displayname__ = "VTK Geometry to Grid2D" # type: ignore
+vtk_to_grid2d.__displayname__ = "VTK to Grid2D" # type: ignore
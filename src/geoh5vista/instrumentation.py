@@ -0,0 +1,339 @@
+"""Per-entity timing and memory instrumentation of the conversions to VTK"""
+
+
+__all__ = [
+    "Recorder",
+    "instrument",
+    "stage",
+    "record_bytes",
+    "record_entity",
+    "mark_cached",
+    "get_recorder",
+]
+
+__displayname__ = "Instrumentation"
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+import threading
+import time
+
+import numpy as np
+
+# Stages of a conversion. The geometry stage is the conversion time not spent in
+# the data and metadata stages.
+STAGES = ("geometry", "data", "metadata")
+
+# The active recorder, and the event of the entity being converted. Both are
+# ``None`` when instrumentation is disabled.
+_RECORDER = ContextVar("geoh5vista_recorder", default=None)
+_EVENT = ContextVar("geoh5vista_event", default=None)
+
+
+def stage(name):
+    """Decorator timing the calls of a function as a stage of the conversion of
+    the current entity. Calls made while another stage is timed count towards
+    that stage only. Does nothing while instrumentation is disabled.
+
+    Args:
+        name (str): ``"data"`` or ``"metadata"``
+    """
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            event = _EVENT.get()
+            if event is None or event["_stage"] is not None:
+                return function(*args, **kwargs)
+            event["_stage"] = name
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                event[name] += time.perf_counter() - start
+                event["_stage"] = None
+        return wrapper
+    return decorator
+
+
+def record_bytes(nbytes):
+    """Adds bytes read from the geoh5 file to the event of the current entity,
+    for reads that do not go through the geoh5py data values."""
+    event = _EVENT.get()
+    if event is not None:
+        event["bytes_read"] += int(nbytes)
+
+
+def _objects(entity):
+    """Returns an entity, or the objects held by a group."""
+    if entity.__class__.__name__.endswith("Group"):
+        return [child for child in entity.children if hasattr(child, "children")]
+    return [entity]
+
+
+def _geometry_arrays(entity):
+    """Returns the geometry arrays of an entity held in memory, e.g. vertices,
+    cells and drillhole traces, by id."""
+    return {
+        id(value): value
+        for obj in _objects(entity)
+        for value in vars(obj).values()
+        if isinstance(value, np.ndarray)
+    }
+
+
+def _loaded_data(entity):
+    """Returns the data of an entity, or of the objects of a group, whose values
+    are loaded in memory."""
+    return {
+        id(data): data
+        for obj in _objects(entity)
+        for data in obj.children
+        if isinstance(getattr(data, "_values", None), np.ndarray)
+    }
+
+
+def _mesh_size(output):
+    """Returns the number of points and cells and the memory size in bytes of a
+    VTK data object, summed over the blocks of a collection."""
+    if output is None:
+        return 0, 0, 0
+    if hasattr(output, "n_blocks") and not hasattr(output, "n_points"):
+        sizes = [_mesh_size(block) for block in output]
+        return tuple(int(sum(size)) for size in zip(*sizes)) if sizes else (0, 0, 0)
+    # VTK reports the memory size in kibibytes
+    return (
+        int(output.GetNumberOfPoints()) if hasattr(output, "GetNumberOfPoints") else 0,
+        int(output.GetNumberOfCells()),
+        int(output.GetActualMemorySize()) * 1024,
+    )
+
+
+def record_entity(entity, convert):
+    """Calls ``convert()`` to convert an entity and returns its output. While a
+    :class:`Recorder` is active, the conversion is timed by stage and an event is
+    sent to the recorder. Otherwise ``convert()`` is returned as is.
+
+    Args:
+        entity: the GEOH5 entity being converted
+        convert (callable): the conversion, without arguments
+    """
+    recorder = _RECORDER.get()
+    if recorder is None:
+        return convert()
+
+    event = {
+        "name": entity.name,
+        "uid": str(entity.uid),
+        "entity_type": entity.__class__.__name__,
+        "cached": False,
+        "total": 0.0,
+        **{name: 0.0 for name in STAGES},
+        "bytes_read": 0,
+        "n_points": 0,
+        "n_cells": 0,
+        "nbytes": 0,
+        "_stage": None,
+    }
+    # Arrays already in memory, e.g. from an earlier conversion, are not read again
+    geometry = _geometry_arrays(entity)
+    loaded = _loaded_data(entity)
+    token = _EVENT.set(event)
+    start = time.perf_counter()
+    output = None
+    try:
+        output = convert()
+    except Exception as error:
+        event["error"] = repr(error)
+        raise
+    finally:
+        event["total"] = time.perf_counter() - start
+        _EVENT.reset(token)
+        event["geometry"] = max(event["total"] - event["data"] - event["metadata"], 0.0)
+        if not event["cached"]:
+            event["bytes_read"] += sum(
+                value.nbytes
+                for key, value in _geometry_arrays(entity).items()
+                if key not in geometry
+            ) + sum(
+                data._values.nbytes  # pylint: disable=protected-access
+                for key, data in _loaded_data(entity).items()
+                if key not in loaded
+            )
+        event["n_points"], event["n_cells"], event["nbytes"] = _mesh_size(output)
+        del event["_stage"]
+        recorder.record(event)
+    return output
+
+
+def mark_cached():
+    """Marks the conversion of the current entity as read from a cache."""
+    event = _EVENT.get()
+    if event is not None:
+        event["cached"] = True
+
+
+class Recorder:
+    """Collects the events of the conversions of entities to VTK.
+
+    One event is recorded per converted entity, as a dictionary with its
+    ``name``, ``uid`` and ``entity_type``, whether it was read from a cache
+    (``cached``), the ``total`` conversion time and the time spent building the
+    ``geometry``, reading the ``data`` arrays and adding the ``metadata``, in
+    seconds, the number of bytes of geometry and data arrays read from the file
+    by the conversion (``bytes_read``), and the ``n_points``, ``n_cells`` and
+    memory size (``nbytes``) of the output. Failed conversions also have an
+    ``error``. Arrays already in memory when the conversion starts are not
+    counted, e.g. those of an earlier conversion of the entity or vertices that
+    geoh5py loads with the entity.
+
+    Events are recorded while the recorder is active, see :meth:`activate` and
+    :func:`instrument`. Without an active recorder the conversions are not
+    instrumented at all.
+
+    Args:
+        callback (callable): function called with each event, e.g. ``print``
+        logger (:class:`logging.Logger`): logger receiving each event at the
+            ``DEBUG`` level, with the event in the ``geoh5vista_event`` attribute
+            of the log record
+
+    Example:
+        >>> recorder = Recorder()
+        >>> project = read_workspace('test_file.geoh5', instrumentation=recorder)
+        >>> print(recorder.report())
+    """
+
+    def __init__(self, callback=None, logger=None):
+        self.callback = callback
+        self.logger = logger
+        self.events = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.events)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({len(self)} events)"
+
+    def record(self, event):
+        """Stores an event and forwards it to the callback and logger."""
+        with self._lock:
+            self.events.append(event)
+        if self.callback is not None:
+            self.callback(event)
+        if self.logger is not None:
+            self.logger.debug(
+                "Converted %s (%s) in %.3f s",
+                event["name"],
+                event["entity_type"],
+                event["total"],
+                extra={"geoh5vista_event": event},
+            )
+
+    @contextmanager
+    def activate(self):
+        """Context manager recording the conversions run within it, including
+        those run by the workers of :func:`geoh5vista.wrapper.entities_to_vtk`."""
+        token = _RECORDER.set(self)
+        try:
+            yield self
+        finally:
+            _RECORDER.reset(token)
+
+    def wrap(self, function):
+        """Returns a function running ``function`` with the recorder active, e.g.
+        for conversions run later by a :class:`geoh5vista.lazy.LazyMultiBlock`."""
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with self.activate():
+                return function(*args, **kwargs)
+        return wrapper
+
+    def clear(self):
+        """Removes every recorded event."""
+        with self._lock:
+            self.events.clear()
+
+    def summary(self):
+        """Returns the number of entities, times, bytes read and output sizes
+        summed over all events and per entity type."""
+        def totals(events):
+            keys = ("total", *STAGES, "bytes_read", "n_points", "n_cells", "nbytes")
+            summary = {key: sum(event[key] for event in events) for key in keys}
+            summary["entities"] = len(events)
+            summary["cached"] = sum(event["cached"] for event in events)
+            return summary
+
+        with self._lock:
+            events = list(self.events)
+        by_type = {}
+        for event in events:
+            by_type.setdefault(event["entity_type"], []).append(event)
+        return {
+            "total": totals(events),
+            "by_type": {name: totals(items) for name, items in by_type.items()},
+        }
+
+    def report(self, top=10):
+        """Returns a text report of the slowest conversions and of the totals per
+        entity type.
+
+        Args:
+            top (int): number of slowest entities listed
+        """
+        with self._lock:
+            events = sorted(self.events, key=lambda event: event["total"], reverse=True)
+        columns = (
+            f"{'total':>9} {'geometry':>9} {'data':>9} {'metadata':>9} "
+            f"{'read MiB':>9} {'mesh MiB':>9}"
+        )
+
+        def row(label, values):
+            return (
+                f"{label[:32]:<32} {values['total']:>9.3f} {values['geometry']:>9.3f} "
+                f"{values['data']:>9.3f} {values['metadata']:>9.3f} "
+                f"{values['bytes_read'] / 1024**2:>9.1f} {values['nbytes'] / 1024**2:>9.1f}"
+            )
+
+        lines = [f"{'entity':<32} {columns}"]
+        for event in events[:top]:
+            label = event["name"] + (" (cached)" if event["cached"] else "")
+            lines.append(row(label, event))
+        summary = self.summary()
+        lines += ["", f"{'entity type':<32} {columns}"]
+        for name, values in sorted(summary["by_type"].items()):
+            lines.append(row(f"{name} x{values['entities']}", values))
+        lines.append(row(f"Total x{summary['total']['entities']}", summary["total"]))
+        return "\n".join(lines)
+
+
+@contextmanager
+def instrument(callback=None, logger=None):
+    """Context manager recording the conversions run within it, see
+    :class:`Recorder`.
+
+    Args:
+        callback (callable): function called with each event
+        logger (:class:`logging.Logger`): logger receiving each event
+
+    Example:
+        >>> with instrument() as recorder:
+        ...     mesh = geoh5wrap(block_model)
+        >>> recorder.events[0]["data"]
+    """
+    recorder = Recorder(callback=callback, logger=logger)
+    with recorder.activate():
+        yield recorder
+
+
+def get_recorder():
+    """Returns the active :class:`Recorder`, or ``None``."""
+    return _RECORDER.get()
+
+
+stage.__displayname__ = "Stage" # type: ignore
+record_bytes.__displayname__ = "Record Bytes" # type: ignore
+record_entity.__displayname__ = "Record Entity" # type: ignore
+mark_cached.__displayname__ = "Mark Cached" # type: ignore
+get_recorder.__displayname__ = "Active Recorder" # type: ignore
+instrument.__displayname__ = "Instrument" # type: ignore
@@ -0,0 +1,153 @@
+"""A lazy collection of GEOH5 entities that are only converted to VTK when accessed"""
+
+
+__all__ = [
+    "LazyMultiBlock",
+]
+
+__displayname__ = "Lazy MultiBlock"
+
+import pyvista
+
+from geoh5vista.utilities import get_entity_info
+
+
+class LazyMultiBlock:
+    """A :class:`pyvista.MultiBlock` compatible container of GEOH5 entities.
+
+    The name, type and UID of every entity are known up front, but an entity is
+    only converted to a VTK data object the first time its block is indexed or
+    iterated. Converted blocks are memoized.
+
+    Args:
+        entity_list (list): the GEOH5 entities to hold
+        converter (callable): function converting a single entity to a VTK data
+            object (e.g. :func:`geoh5vista.wrapper.geoh5wrap`)
+        workspace (:class:`geoh5py.workspace.workspace.Workspace`): the workspace
+            holding the entities. A reference is kept so that the file stays open
+            for as long as blocks can still be loaded, until :meth:`close` is
+            called or the ``with`` block using the container ends.
+
+    Example:
+        >>> with read_workspace('test_file.geoh5', lazy=True) as project:
+        ...     topo = project['Topography']
+    """
+
+    def __init__(self, entity_list, converter, workspace=None):
+        self._entities = list(entity_list)
+        self._converter = converter
+        self._workspace = workspace
+        self._closed = False
+        self._blocks = [None] * len(self._entities)
+        self._loaded = [False] * len(self._entities)
+        self.entity_info = [get_entity_info(e) for e in self._entities]
+
+    def __len__(self):
+        return len(self._entities)
+
+    @property
+    def n_blocks(self):
+        """Number of blocks held by the container"""
+        return len(self)
+
+    @property
+    def n_loaded(self):
+        """Number of blocks that have already been converted"""
+        return sum(self._loaded)
+
+    def keys(self):
+        """Returns the block names, in order"""
+        return [info["name"] for info in self.entity_info]
+
+    def get_block_name(self, index):
+        """Returns the name of the block at the given index"""
+        return self.entity_info[index]["name"]
+
+    def get_index_by_name(self, name):
+        """Returns the index of the first block with the given name"""
+        for index, info in enumerate(self.entity_info):
+            if info["name"] == name:
+                return index
+        raise KeyError(f"Block name ({name}) not found")
+
+    def is_loaded(self, index):
+        """Returns ``True`` if the block at the given index was already converted"""
+        if isinstance(index, str):
+            index = self.get_index_by_name(index)
+        return self._loaded[index]
+
+    def close(self):
+        """Closes the workspace holding the entities. Blocks already converted
+        can still be accessed, the others can no longer be loaded."""
+        if self._workspace is not None:
+            self._workspace.close()
+            self._workspace = None
+        self._entities = [None] * len(self._entities)
+        self._closed = True
+
+    @property
+    def closed(self):
+        """``True`` once :meth:`close` was called"""
+        return self._closed
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _load(self, index):
+        if not self._loaded[index]:
+            if self._closed:
+                raise RuntimeError(
+                    f"Block ({self.get_block_name(index)}) was not loaded before the "
+                    "workspace was closed."
+                )
+            self._blocks[index] = self._converter(self._entities[index])
+            self._loaded[index] = True
+        return self._blocks[index]
+
+    def __getitem__(self, index):
+        if isinstance(index, str):
+            return self._load(self.get_index_by_name(index))
+        if isinstance(index, slice):
+            output = pyvista.MultiBlock()
+            for i in range(*index.indices(len(self))):
+                output.append(self._load(i), name=self.get_block_name(i))
+            return output
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"index ({index}) out of range for this dataset.")
+        return self._load(index)
+
+    def get(self, index, default=None):
+        """Returns the block for the given index or name, or ``default`` if it is
+        not found."""
+        try:
+            return self[index]
+        except (KeyError, IndexError):
+            return default
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._load(i)
+
+    def items(self):
+        """Iterates over ``(name, block)`` pairs, converting blocks as needed"""
+        for i in range(len(self)):
+            yield self.get_block_name(i), self._load(i)
+
+    def to_multiblock(self):
+        """Converts every remaining block and returns a :class:`pyvista.MultiBlock`"""
+        output = pyvista.MultiBlock()
+        for name, block in self.items():
+            output.append(block, name=name)
+        return output
+
+    def __repr__(self):
+        lines = [f"{self.__class__.__name__} ({self.n_loaded}/{self.n_blocks} loaded)"]
+        for i, info in enumerate(self.entity_info):
+            status = "loaded" if self._loaded[i] else "pending"
+            lines.append(f"  {i:>4}  {info['name']:<32} {info['entity_type']:<28} {status}")
+        return "\n".join(lines)
@@ -1,24 +1,366 @@
 """Methods for converting volumetric data objects"""
 
 __all__ = [
+    "get_octree_nodes",
     "octree_grid_geom_to_vtk",
+    "octree_hypertree_geom_to_vtk",
     "octree_to_vtk",
 ]
 
 __displayname__ = "Octree"
 
+import json
+
 import numpy as np
 import pyvista
+from vtkmodules.util.numpy_support import numpy_to_vtk
+from vtkmodules.vtkCommonCore import vtkBitArray, vtkStringArray
+from vtkmodules.vtkCommonDataModel import vtkHyperTreeGrid, vtkHyperTreeGridNonOrientedCursor
+
+from geoh5py.shared.utils import xy_rotation_matrix
+from geoh5vista.instrumentation import stage
+from geoh5vista.utilities import add_data_to_vtk, add_entity_metadata, get_ga_entity_colour
+
+# Corner offsets of a hexahedron, in the VTK_HEXAHEDRON point order
+HEXAHEDRON_CORNERS = np.array(
+    [
+        [0, 0, 0],
+        [1, 0, 0],
+        [1, 1, 0],
+        [0, 1, 0],
+        [0, 0, 1],
+        [1, 0, 1],
+        [1, 1, 1],
+        [0, 1, 1],
+    ]
+)
+
+
+def create_octree_rot_matrix(octree):
+    return xy_rotation_matrix(np.deg2rad(octree.rotation))
+
+
+def get_octree_nodes(octree):
+    """Returns the unique nodes of the cells of an octree, as ``(i, j, k)`` indices
+    on the lattice of its smallest cells, and the ``(n_cells, 8)`` indices of the
+    corners of every cell into them, in VTK hexahedron order.
+
+    Args:
+        octree (:class:`geoh5py.objects.octree.Octree`): the octree mesh
+    """
+    cells = octree.octree_cells
+    size = cells["NCells"].astype(np.int64)[:, None, None]
+    ijk = np.c_[cells["I"], cells["J"], cells["K"]].astype(np.int64)[:, None, :]
+
+    # Negative cell sizes mirror an axis: swap the corners to keep positive volumes
+    corners = HEXAHEDRON_CORNERS
+    if np.prod(np.sign([octree.u_cell_size, octree.v_cell_size, octree.w_cell_size])) < 0:
+        corners = corners[[4, 5, 6, 7, 0, 1, 2, 3]]
+
+    lattice = (ijk + corners[None, :, :] * size).reshape((-1, 3))
+
+    # Nodes shared by neighbouring cells have the same lattice key
+    n_u = np.int64(octree.u_count) + 1
+    n_v = np.int64(octree.v_count) + 1
+    n_w = np.int64(octree.w_count) + 1
+    keys = lattice[:, 0] + n_u * (lattice[:, 1] + n_v * lattice[:, 2])
+
+    if n_u * n_v * n_w <= 4 * len(keys):
+        # Dense lattice: index the used keys directly, without sorting
+        used = np.zeros(n_u * n_v * n_w, dtype=bool)
+        used[keys] = True
+        unique_keys = np.flatnonzero(used)
+        del used
+        node_index = np.empty(n_u * n_v * n_w, dtype=np.int64)
+        node_index[unique_keys] = np.arange(len(unique_keys))
+        connectivity = node_index[keys]
+    else:
+        unique_keys, connectivity = np.unique(keys, return_inverse=True)
+
+    nodes = np.c_[
+        unique_keys % n_u, (unique_keys // n_u) % n_v, unique_keys // (n_u * n_v)
+    ]
+    return nodes, connectivity.reshape((-1, 8))
+
+
+def octree_grid_geom_to_vtk(octree, rotation_matrix=None):
+    """Convert the octree mesh to a :class:`pyvista.UnstructuredGrid` of
+    hexahedra, in the order of the octree cells.
+
+    All cells are built at once from the octree cell arrays, with the nodes shared
+    by neighbouring cells merged.
+
+    Args:
+        octree (:class:`geoh5py.objects.octree.Octree`): the octree mesh to convert
+        rotation_matrix (:class:`numpy.ndarray`): the rotation of the mesh about the
+            vertical axis, built from ``octree.rotation`` if not given
+    """
+    if rotation_matrix is None:
+        rotation_matrix = create_octree_rot_matrix(octree)
+
+    nodes, connectivity = get_octree_nodes(octree)
+    cell_size = np.array([octree.u_cell_size, octree.v_cell_size, octree.w_cell_size])
+    origin = np.array([octree.origin["x"], octree.origin["y"], octree.origin["z"]], dtype=float)
+    # Same convention as the octree centroids of geoh5py
+    points = (nodes * cell_size).dot(np.asarray(rotation_matrix).T) + origin
+
+    n_cells = connectivity.shape[0]
+    cells = np.c_[np.full(n_cells, 8, dtype=connectivity.dtype), connectivity].ravel()
+    cell_types = np.full(n_cells, pyvista.CellType.HEXAHEDRON, dtype=np.uint8)
+    return pyvista.UnstructuredGrid(cells, cell_types, points)
+
+
+def _octree_hypertree(octree):
+    """Returns the arrays describing an octree as a hyper tree grid: the number of
+    root cells along each axis and their size in cells of the smallest size, the
+    hyper tree index, level and child path code of every vertex in breadth first
+    order, the parent of every vertex, whether it is refined, and the vertex of
+    every octree cell."""
+    cells = octree.octree_cells
+    counts = np.array([octree.u_count, octree.v_count, octree.w_count], dtype=np.int64)
+    sizes = cells["NCells"].astype(np.int64)
+    ijk = np.c_[cells["I"], cells["J"], cells["K"]].astype(np.int64)
+
+    root_size = int(sizes.max())
+    if np.any(counts % root_size) or np.any(ijk % sizes[:, None]):
+        raise ValueError("Octree cells are not aligned on a regular grid of root cells.")
+    if np.sum(sizes**3) != np.prod(counts):
+        raise ValueError("Octree cells do not fill the extent of the octree.")
+
+    # Index along mirrored axes (negative cell sizes) so the coordinates increase
+    cell_sizes = np.array([octree.u_cell_size, octree.v_cell_size, octree.w_cell_size])
+    mirrored = cell_sizes < 0
+    ijk[:, mirrored] = counts[mirrored] - ijk[:, mirrored] - sizes[:, None]
+
+    n_roots = counts // root_size
+    root = ijk // root_size
+    trees = root[:, 0] + n_roots[0] * (root[:, 1] + n_roots[1] * root[:, 2])
+    levels = np.round(np.log2(root_size / sizes)).astype(np.int64)
+    max_level = int(levels.max())
+
+    # Child path codes: one octal digit per level, x fastest like VTK children
+    local = ijk - root * root_size
+    codes = np.zeros(len(sizes), dtype=np.int64)
+    for level in range(1, max_level + 1):
+        refined = levels >= level
+        digit = (local[refined] // (root_size >> level)) & 1
+        codes[refined] = codes[refined] * 8 + digit.dot([1, 2, 4])
+
+    # Breadth first keys: vertices sort by tree, then level, then path code
+    level_offsets = np.array([(8**level - 1) // 7 for level in range(max_level + 2)])
+    tree_stride = int(level_offsets[-1])
+    if int(trees.max() + 1) * tree_stride >= np.iinfo(np.int64).max:
+        raise ValueError(f"Octree with {max_level} levels is too deep to index.")
+
+    # Every ancestor of a cell is a refined vertex
+    keys = [trees * tree_stride + level_offsets[levels] + codes]
+    for level in range(max_level):
+        deeper = levels > level
+        prefixes = codes[deeper] >> (3 * (levels[deeper] - level))
+        keys.append(np.unique(trees[deeper] * tree_stride + level_offsets[level] + prefixes))
+    keys = np.concatenate(keys)
+
+    order = np.argsort(keys)
+    cell_vertex = np.empty(len(keys), dtype=np.int64)
+    cell_vertex[order] = np.arange(len(keys))
+    cell_vertex = cell_vertex[: len(sizes)]
+    keys = keys[order]
+    is_parent = np.ones(len(keys), dtype=bool)
+    is_parent[cell_vertex] = False
+
+    vertex_trees, in_tree = np.divmod(keys, tree_stride)
+    vertex_levels = np.searchsorted(level_offsets, in_tree, side="right") - 1
+    vertex_codes = in_tree - level_offsets[vertex_levels]
+
+    parents = np.full(len(keys), -1, dtype=np.int64)
+    children = vertex_levels > 0
+    parent_keys = (
+        vertex_trees[children] * tree_stride
+        + level_offsets[vertex_levels[children] - 1]
+        + (vertex_codes[children] >> 3)
+    )
+    parents[children] = np.searchsorted(keys, parent_keys)
+
+    vertices = {
+        "tree": vertex_trees,
+        "level": vertex_levels,
+        "code": vertex_codes,
+        "parent": parents,
+    }
+    return n_roots, root_size, vertices, is_parent, cell_vertex
+
+
+class _CellArrays(dict):
+    """Data arrays of the octree cells, read with :func:`add_data_to_vtk` before
+    being added to a hyper tree grid. Holds a ``user_dict`` like pyvista objects."""
+
+    def __init__(self):
+        super().__init__()
+        self.user_dict = {}
+
+
+def _set_user_dict(output, user_dict):
+    """Stores a ``user_dict`` on a VTK object not wrapped by pyvista, as pyvista does."""
+    array = vtkStringArray()
+    array.SetName("_PYVISTA_USER_DICT")
+    array.InsertNextValue(json.dumps(user_dict))
+    output.GetFieldData().AddArray(array)
+
+
+def octree_hypertree_geom_to_vtk(octree, rotation_matrix=None):
+    """Convert the octree mesh to a :class:`vtkHyperTreeGrid`, keeping its tree
+    structure instead of building independent hexahedra.
+
+    The largest octree cells are the roots of the hyper trees. The grid is built in
+    the local (rotated) frame of the octree, with the 4x4 local to world transform
+    stored with the ``user_dict`` in the field data. Hyper tree grid vertices are
+    indexed in breadth first order and the ``octree_cell`` cell array gives the
+    octree cell of every leaf (-1 for refined vertices).
+
+    Args:
+        octree (:class:`geoh5py.objects.octree.Octree`): the octree mesh to convert
+        rotation_matrix (:class:`numpy.ndarray`): the rotation of the mesh about the
+            vertical axis, built from ``octree.rotation`` if not given
+    """
+    output, geometry = _octree_hypertree_geom(octree, rotation_matrix)
+    _set_user_dict(output, {"transform": geometry["transform"]})
+    return output
+
+
+def _octree_hypertree_geom(octree, rotation_matrix=None):
+    if rotation_matrix is None:
+        rotation_matrix = create_octree_rot_matrix(octree)
+
+    n_roots, root_size, vertices, is_parent, cell_vertex = _octree_hypertree(octree)
+    counts = np.array([octree.u_count, octree.v_count, octree.w_count])
+    cell_sizes = np.array([octree.u_cell_size, octree.v_cell_size, octree.w_cell_size])
+
+    output = vtkHyperTreeGrid()
+    output.SetBranchFactor(2)
+    output.SetDimensions(*(n_roots + 1))
+    # Coordinates along mirrored axes start from the far end of the octree
+    start = np.where(cell_sizes < 0, cell_sizes * counts, 0.0)
+    steps = np.abs(cell_sizes) * root_size
+    output.SetXCoordinates(numpy_to_vtk(start[0] + steps[0] * np.arange(n_roots[0] + 1), deep=True))
+    output.SetYCoordinates(numpy_to_vtk(start[1] + steps[1] * np.arange(n_roots[1] + 1), deep=True))
+    output.SetZCoordinates(numpy_to_vtk(start[2] + steps[2] * np.arange(n_roots[2] + 1), deep=True))
+
+    # Breadth first descriptors of all trees, read back from one bit array. The
+    # deepest level of each tree is left out, as its vertices are all leaves.
+    packed = np.packbits(is_parent)
+    descriptor = vtkBitArray()
+    descriptor.SetVoidArray(packed, len(is_parent), 1)
+    trees, tree_starts = np.unique(vertices["tree"], return_index=True)
+    tree_ends = np.r_[tree_starts[1:], len(is_parent)]
+    max_levels = np.maximum.reduceat(vertices["level"], tree_starts)
+    for tree, tree_start, tree_end, max_level in zip(trees, tree_starts, tree_ends, max_levels):
+        n_bits = np.searchsorted(vertices["level"][tree_start:tree_end], max_level)
+        cursor = vtkHyperTreeGridNonOrientedCursor()
+        output.InitializeNonOrientedCursor(cursor, int(tree), True)
+        cursor.SetGlobalIndexStart(int(tree_start))
+        cursor.GetTree().BuildFromBreadthFirstOrderDescriptor(
+            descriptor, int(n_bits), int(tree_start)
+        )
+
+    octree_cell = np.full(len(is_parent), -1, dtype=np.int64)
+    octree_cell[cell_vertex] = np.arange(len(cell_vertex))
+    array = numpy_to_vtk(octree_cell, deep=True)
+    array.SetName("octree_cell")
+    output.GetCellData().AddArray(array)
+
+    transform = np.eye(4)
+    transform[:3, :3] = rotation_matrix
+    transform[:3, 3] = [octree.origin["x"], octree.origin["y"], octree.origin["z"]]
+    return output, {
+        "transform": transform.tolist(),
+        "vertices": vertices,
+        "cell_vertex": cell_vertex,
+    }
+
+
+@stage("data")
+def _add_data_to_hypertree(output, geometry, values):
+    """Adds octree cell data to the vertices of a hyper tree grid. Refined vertices
+    get the mean of their children for float data, and the value of their first
+    child otherwise, so coarse levels can be shown by adaptive filters."""
+    vertices = geometry["vertices"]
+    parents = vertices["parent"]
+    # Leaf represented by each vertex, filled from the deepest level up
+    n_vertices = len(parents)
+    representative = np.full(n_vertices, -1, dtype=np.int64)
+    representative[geometry["cell_vertex"]] = geometry["cell_vertex"]
+    cell_of_vertex = np.full(n_vertices, -1, dtype=np.int64)
+    cell_of_vertex[geometry["cell_vertex"]] = np.arange(len(geometry["cell_vertex"]))
+    levels = np.unique(vertices["level"])[::-1]
+    for level in levels[:-1]:
+        first_children = np.flatnonzero((vertices["level"] == level) & (vertices["code"] % 8 == 0))
+        representative[parents[first_children]] = representative[first_children]
+
+    for name, cell_values in values.items():
+        cell_values = np.asarray(cell_values)
+        if np.issubdtype(cell_values.dtype, np.floating):
+            vertex_values = np.full(n_vertices, np.nan)
+            vertex_values[geometry["cell_vertex"]] = cell_values
+            for level in levels[:-1]:
+                children = np.flatnonzero(vertices["level"] == level)
+                valid = children[~np.isnan(vertex_values[children])]
+                total = np.bincount(parents[valid], vertex_values[valid], n_vertices)
+                count = np.bincount(parents[valid], minlength=n_vertices)
+                parent_ids = np.unique(parents[children])
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    vertex_values[parent_ids] = total[parent_ids] / count[parent_ids]
+        else:
+            vertex_values = cell_values[cell_of_vertex[representative]]
+
+        if vertex_values.dtype.kind in "OUS":
+            array = pyvista.convert_string_array(vertex_values.astype(str))
+        else:
+            array = numpy_to_vtk(np.ascontiguousarray(vertex_values), deep=True)
+        array.SetName(name)
+        output.GetCellData().AddArray(array)
+    return output
+
 
-from geoh5vista.utilities import check_orientation
+def octree_to_vtk(octree, fields=None, hypertree=False, categorical=False):
+    """Convert the octree mesh and its data to a :class:`pyvista.UnstructuredGrid`.
 
+    Args:
+        octree (:class:`geoh5py.objects.octree.Octree`): the octree mesh to convert
+        fields (list): only read the data with these names, if given
+        categorical (bool): store referenced data as integer codes and a value
+            map, see :func:`geoh5vista.utilities.add_data_to_vtk`
+        hypertree (bool): if ``True``, return a :class:`vtkHyperTreeGrid` instead,
+            see :func:`octree_hypertree_geom_to_vtk`. Memory then scales with the
+            tree rather than with the cell corners, and VTK's hyper tree grid
+            filters can render it adaptively. Hyper tree grids are not wrapped by
+            pyvista, so they cannot be held in a :class:`pyvista.MultiBlock`:
+            :func:`geoh5vista.wrapper.read_workspace` raises a ``ValueError`` for
+            this option, use :func:`geoh5vista.wrapper.iter_workspace` instead.
+    """
+    if hypertree:
+        output, geometry = _octree_hypertree_geom(octree)
+        values = add_data_to_vtk(_CellArrays(), octree, fields=fields, categorical=categorical)
+        output = _add_data_to_hypertree(output, geometry, values)
+        _set_user_dict(
+            output,
+            {
+                "colour": get_ga_entity_colour(octree),
+                "name": octree.name,
+                "entity_type": octree.__class__.__name__,
+                "transform": geometry["transform"],
+                **values.user_dict,
+            },
+        )
+        return output
 
-def octree_grid_geom_to_vtk(gi, origin=(0.0, 0.0, 0.0)):
-    pass
+    output = octree_grid_geom_to_vtk(octree)
+    output = add_data_to_vtk(output, octree, fields=fields, categorical=categorical)
+    output = add_entity_metadata(output, octree)
+    return output
 
-def octree_to_vtk(gi, origin=(0.0, 0.0, 0.0)):
-    pass
 
 # Now set up the display names for the docs
+get_octree_nodes.__displayname__ = "Octree Nodes" # type: ignore
 octree_grid_geom_to_vtk.__displayname__ = "Octree Geometry to VTK" # type: ignore
+octree_hypertree_geom_to_vtk.__displayname__ = "Octree Geometry to Hyper Tree Grid" # type: ignore
 octree_to_vtk.__displayname__ = "Octree to VTK" # type: ignore
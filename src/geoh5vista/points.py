@@ -4,11 +4,19 @@ import numpy as np
 import pyvista
 from geoh5py.objects.points import Points
 from geoh5py.workspace.workspace import Workspace
-from typing import Tuple
-
-from geoh5vista.utilities import add_data_to_vtk, add_entity_metadata
+from typing import TYPE_CHECKING, Tuple
+
+from geoh5vista.utilities import (
+    add_data_to_geoh5,
+    add_data_to_vtk,
+    add_entity_metadata,
+    add_entity_metadata_to_geoh5,
+)
 # from geoh5vista.utilities import add_texture_coordinates
 
+if TYPE_CHECKING:
+    from geoh5vista.spatial import Region
+
 __all__ = [
     "points_geom_to_vtk",
     "points_to_vtk",
@@ -18,30 +26,47 @@ __all__ = [
 __displayname__ = "Points"
 
 
-def points_geom_to_vtk(pts: Points) -> pyvista.PointSet:
+def points_geom_to_vtk(pts: Points, vertices: np.ndarray | None = None) -> pyvista.PointSet:
     """Convert the points to a :class:`pyvista.PointSet` data object.
     Args:
         pts: The points to convert
+        vertices: Only convert the points at these indices, if given
     Return:
         A :class:`pyvista.PointSet`
     """
     points = pts.vertices
+    if vertices is not None:
+        points = points[vertices]
     output = pyvista.PointSet(points)
 
     return output
 
 
-def points_to_vtk(pts: Points) -> pyvista.PointSet:
+def points_to_vtk(
+    pts: Points,
+    fields: list[str] | None = None,
+    categorical: bool = False,
+    region: "Region | None" = None,
+) -> pyvista.PointSet:
     """Convert the points to a :class:`pyvista.PointSet` data object.
     Args:
         pts: The points to convert
+        fields: Only read the data with these names, if given
+        categorical: Store referenced data as integer codes and a value map,
+            see :func:`geoh5vista.utilities.add_data_to_vtk`
+        region: Only convert the points inside this region, if given
     Return:
         A :class:`pyvista.PointSet`
     """
-    output = points_geom_to_vtk(pts)
+    vertices = None
+    if region is not None:
+        vertices = np.flatnonzero(region.contains(pts.vertices))
+    output = points_geom_to_vtk(pts, vertices=vertices)
 
     # Now add point data:
-    output = add_data_to_vtk(output, pts)
+    output = add_data_to_vtk(
+        output, pts, fields=fields, categorical=categorical, vertices=vertices
+    )
     output = add_entity_metadata(output, pts)
 
     # add_texture_coordinates(output, pts.textures, pts.name)
@@ -49,16 +74,20 @@ def points_to_vtk(pts: Points) -> pyvista.PointSet:
     return output
 
 
-def vtk_geom_to_points(vtk: pyvista.PointSet, workspace: Workspace, name: str) -> Points:
+def vtk_geom_to_points(
+    vtk: pyvista.PointSet, workspace: Workspace, name: str, parent=None
+) -> Points:
     """Convert a VTK object to a geoh5py Points object."""
 
-    points = Points.create(workspace=workspace, name=name, vertices=vtk.points)
+    points = Points.create(workspace=workspace, name=name, vertices=vtk.points, parent=parent)
     return points
 
 
-def vtk_to_points(vtk: pyvista.PointSet, workspace: Workspace, name: str) -> Points:
-    """Convert a VTK object to a geoh5py Points object."""
-    points = vtk_geom_to_points(vtk=vtk, workspace=workspace, name=name)
+def vtk_to_points(vtk: pyvista.PointSet, workspace: Workspace, name: str, parent=None) -> Points:
+    """Convert a VTK object and its point data to a geoh5py Points object."""
+    points = vtk_geom_to_points(vtk=vtk, workspace=workspace, name=name, parent=parent)
+    points = add_data_to_geoh5(points, vtk, cell_association=None)
+    points = add_entity_metadata_to_geoh5(points, vtk)
     return points
 
 
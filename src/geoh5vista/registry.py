@@ -0,0 +1,131 @@
+"""Registry of the converters of each entity type, imported on first use"""
+
+
+__all__ = [
+    "get_converter",
+    "get_writer",
+]
+
+__displayname__ = "Registry"
+
+from importlib import import_module
+
+# Converters to VTK of each entity class name, as ``"module:function"`` so that
+# their modules and dependencies are only imported once an entity of the type
+# is converted
+GEOH5WRAPPERS = {
+    ## Basic entities
+    "Points": "geoh5vista.points:points_to_vtk",
+    "Curve": "geoh5vista.curve:curve_to_vtk",
+    "Surface": "geoh5vista.surface:surface_to_vtk",
+    ## Grid entities
+    "Grid2D": "geoh5vista.grid2d:grid2d_to_vtk",
+    "GeoImage": "geoh5vista.geoimage:geoimage_to_vtk",
+    ## Volume entities
+    "BlockModel": "geoh5vista.blockmodel:blockmodel_to_vtk",
+    "Octree": "geoh5vista.octree:octree_to_vtk",
+    ## Container entities
+    "Drillhole": "geoh5vista.drillholes:drillholes_to_vtk",
+    "DrillholeGroup": "geoh5vista.drillholes:drillholes_to_vtk",
+    "ConcatenatorDrillholeGroup": "geoh5vista.drillholes:drillholes_to_vtk",
+    "ConcatenatedDrillhole": "geoh5vista.drillholes:drillholes_to_vtk",
+    #"ContainerGroup": "geoh5vista.group:group_to_vtk",
+}
+
+# Writers of VTK data objects to each entity type, see ``GEOH5WRAPPERS``
+VTKWRITERS = {
+    "Points": "geoh5vista.points:vtk_to_points",
+    "Curve": "geoh5vista.curve:vtk_to_curve",
+    "Surface": "geoh5vista.surface:vtk_to_surface",
+    "Grid2D": "geoh5vista.grid2d:vtk_to_grid2d",
+    "BlockModel": "geoh5vista.blockmodel:vtk_to_blockmodel",
+}
+
+# Entity types whose converters take a ``region`` to subset their vertices and cells
+SPATIAL = [
+    "Points",
+    "Curve",
+    "Surface",
+    "BlockModel",
+    "DrillholeGroup",
+    "ConcatenatorDrillholeGroup",
+]
+
+
+SUPPORTED = [
+    "Points",
+    "Curve",
+    "Surface",
+    "Grid2D",
+    "BlockModel",
+    "Octree",
+    "DrillholeGroup",
+    "ConcatenatorDrillholeGroup",
+]
+
+GEOH5SKIP = [
+    "ReferencedData",
+    "TextData",
+    "FloatData",
+    "IntegerData",
+    "FilenameData",
+    "ContainerGroup",
+    "VisualParameters",
+    "GeometricDataConstants",
+    "GeoImage",
+    "Drillholes",
+    "DrapeModel",
+    "AirborneMagnetics",
+    "PotentialElectrode",
+    "AirborneEMSurvey",
+    "AirborneTEMSurvey",
+    "AirborneTEMReceivers",
+    "AirborneFEMTransmitters",
+    "VP Model",
+    "UIJsonGroup",
+    "InterpretationSection",
+    "Slicer",
+    "BooleanData",
+    "PropertyGroup",
+    "CommentsData",
+    "ConcatenatorDrillholeGroup",
+    "ConcatenatedDrillhole",
+    "CustomGroup"
+]
+
+_RESOLVED = {}
+
+
+def _resolve(path):
+    """Returns the function of a ``"module:function"`` path, importing its module
+    the first time."""
+    function = _RESOLVED.get(path)
+    if function is None:
+        module, name = path.split(":")
+        function = _RESOLVED[path] = getattr(import_module(module), name)
+    return function
+
+
+def get_converter(entity_type):
+    """Returns the function converting entities of a class name to VTK data
+    objects. Raises a ``KeyError`` for unsupported types.
+
+    Args:
+        entity_type (str): the class name of the entity
+    """
+    return _resolve(GEOH5WRAPPERS[entity_type])
+
+
+def get_writer(entity_type):
+    """Returns the function writing VTK data objects to entities of a class name.
+    Raises a ``KeyError`` for unsupported types.
+
+    Args:
+        entity_type (str): the class name of the entity
+    """
+    return _resolve(VTKWRITERS[entity_type])
+
+
+# Now set up the display names for the docs
+get_converter.__displayname__ = "Get Converter" # type: ignore
+get_writer.__displayname__ = "Get Writer" # type: ignore
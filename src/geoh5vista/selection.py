@@ -0,0 +1,177 @@
+"""Methods to select the entities and data fields of a workspace to convert"""
+
+
+__all__ = [
+    "get_entity_path",
+    "matches_selection",
+    "select_entities",
+    "select_fields",
+]
+
+__displayname__ = "Selection"
+
+from fnmatch import fnmatchcase
+
+from geoh5py.groups.base import Group
+from geoh5py.groups.root import RootGroup
+
+from geoh5vista.utilities import SKIPDATA
+
+
+def _as_patterns(patterns):
+    """Returns a list of patterns from a single pattern or an iterable of them."""
+    if patterns is None:
+        return None
+    if isinstance(patterns, str):
+        return [patterns]
+    return [str(p) for p in patterns]
+
+
+def _match_any(value, patterns):
+    return any(fnmatchcase(value, p) for p in patterns)
+
+
+def _match_entity(entity, patterns):
+    """Returns ``True`` if the name or UID of an entity matches any of the glob
+    patterns."""
+    return _match_any(entity.name, patterns) or _match_any(str(entity.uid), patterns)
+
+
+def get_entity_path(entity):
+    """Returns the path of the groups holding an entity, e.g. ``"Project/Holes"``.
+    Entities directly under the workspace root have an empty path."""
+    names = []
+    parent = entity.parent
+    while parent is not None and not isinstance(parent, RootGroup):
+        names.append(parent.name)
+        parent = parent.parent
+    return "/".join(reversed(names))
+
+
+def matches_selection(class_names, name, uid, path, entity_types=None, names=None, groups=None):
+    """Returns ``True`` if an entity passes the filters of
+    :func:`select_entities`. The entity is given by its attributes, so that
+    entities listed without being loaded can be filtered too.
+
+    Args:
+        class_names (list): the class name of the entity and those of its base
+            classes
+        name (str): the name of the entity
+        uid (str): the UID of the entity
+        path (str): the path of the groups holding the entity, see
+            :func:`get_entity_path`
+        entity_types (list): class names to keep
+        names (list): glob patterns matched against the name and UID
+        groups (list): glob patterns matched against the path of the groups
+            holding the entity, or of any group above it
+
+    Filters left to ``None`` keep every entity.
+    """
+    entity_types = _as_patterns(entity_types)
+    names = _as_patterns(names)
+    groups = _as_patterns(groups)
+    if entity_types is not None and not any(c in entity_types for c in class_names):
+        return False
+    if names is not None and not (_match_any(name, names) or _match_any(uid, names)):
+        return False
+    if groups is not None:
+        path = path.split("/")
+        parents = ["/".join(path[:i]) for i in range(1, len(path) + 1)]
+        if not any(_match_any(p, groups) for p in parents if p):
+            return False
+    return True
+
+
+def select_entities(entity_list, entity_types=None, names=None, groups=None):
+    """Filters a list of GEOH5 entities. Only entity attributes are used, so no
+    values are read.
+
+    Args:
+        entity_list (list): the entities to filter
+        entity_types (list): class names to keep, e.g. ``["Points", "BlockModel"]``.
+            Base class names also match, so ``"DrillholeGroup"`` keeps
+            ``ConcatenatorDrillholeGroup`` entities.
+        names (list): glob patterns matched against the entity names and UIDs
+        groups (list): glob patterns matched against the path of the groups
+            holding each entity (see :func:`get_entity_path`). An entity is kept
+            if any of the groups above it matches, e.g. ``"Project/Holes*"``.
+
+    Filters left to ``None`` keep every entity.
+    """
+    entity_types = _as_patterns(entity_types)
+    names = _as_patterns(names)
+    groups = _as_patterns(groups)
+
+    return [
+        entity
+        for entity in entity_list
+        if matches_selection(
+            [cls.__name__ for cls in entity.__class__.__mro__],
+            entity.name,
+            str(entity.uid),
+            get_entity_path(entity) if groups is not None else "",
+            entity_types=entity_types,
+            names=names,
+            groups=groups,
+        )
+    ]
+
+
+def _field_patterns(entity, fields):
+    """Returns the field patterns that apply to an entity. ``fields`` is either a
+    list of patterns for every entity, or a dictionary of entity name/UID
+    patterns to lists of field patterns."""
+    if isinstance(fields, dict):
+        matched = [value for key, value in fields.items() if _match_entity(entity, [str(key)])]
+        if not matched:
+            return None
+        return [p for value in matched for p in _as_patterns(value)]
+    return _as_patterns(fields)
+
+
+def _data_names(entity):
+    """Returns the data names of an entity, or of the children of a group."""
+    if isinstance(entity, Group):
+        names = {}
+        for child in entity.children:
+            if hasattr(child, "get_data_list"):
+                names.update(dict.fromkeys(child.get_data_list()))
+        return list(names)
+    return entity.get_data_list()
+
+
+def select_fields(entity, fields=None, exclude_fields=None):
+    """Returns the names of the data fields to convert for an entity, or ``None``
+    to convert all of them. Only data names are read, never values.
+
+    Args:
+        entity: the GEOH5 entity. For a group (e.g. drillholes) the names of the
+            data of its children are used.
+        fields: glob patterns of the fields to keep, either as a list for every
+            entity or as a dictionary of entity name/UID patterns to lists of field
+            patterns. Entities not matching any key of the dictionary keep all
+            their fields.
+        exclude_fields: glob patterns of the fields to drop, in the same forms as
+            ``fields``
+    """
+    include = _field_patterns(entity, fields)
+    exclude = _field_patterns(entity, exclude_fields)
+    if include is None and exclude is None:
+        return None
+
+    selected = []
+    for name in _data_names(entity):
+        if name in SKIPDATA:
+            continue
+        if include is not None and not _match_any(name, include):
+            continue
+        if exclude is not None and _match_any(name, exclude):
+            continue
+        selected.append(name)
+    return selected
+
+
+get_entity_path.__displayname__ = "Entity Path"  # type: ignore
+matches_selection.__displayname__ = "Matches Selection"  # type: ignore
+select_entities.__displayname__ = "Select Entities"  # type: ignore
+select_fields.__displayname__ = "Select Fields"  # type: ignore
@@ -0,0 +1,279 @@
+"""Spatial filters selecting the part of a workspace to convert"""
+
+
+__all__ = [
+    "Region",
+    "Box",
+    "OrientedBox",
+    "Polygon",
+    "as_region",
+    "get_bounds",
+    "get_entity_bounds",
+]
+
+__displayname__ = "Spatial"
+
+from abc import ABC, abstractmethod
+from itertools import product
+
+import numpy as np
+
+from geoh5py.groups.base import Group
+from geoh5py.shared.utils import xy_rotation_matrix
+
+from geoh5vista.blockmodel import create_blockmodel_rot_matrix, get_blockmodel_delimiters
+
+
+def get_bounds(points):
+    """Returns the ``(xmin, xmax, ymin, ymax, zmin, zmax)`` bounds of points.
+
+    Args:
+        points (np.ndarray): the ``(n, 3)`` points
+    """
+    lower, upper = points.min(axis=0), points.max(axis=0)
+    return tuple(float(value) for pair in zip(lower, upper) for value in pair)
+
+
+class Region(ABC):
+    """A region of space, applied to the entities of a workspace before they are
+    converted. Entities whose bounds miss the bounding box of the region are
+    skipped, and the vertices and cells of the others are tested against the
+    region itself with vectorized tests.
+
+    Subclasses implement :meth:`contains` and :meth:`corners`.
+    """
+
+    @abstractmethod
+    def contains(self, points):
+        """Returns the mask of the ``(n, 3)`` points inside the region."""
+
+    @abstractmethod
+    def corners(self):
+        """Returns points whose convex hull holds the region."""
+
+    @property
+    def bounds(self):
+        """The ``(xmin, xmax, ymin, ymax, zmin, zmax)`` bounding box of the region"""
+        return get_bounds(self.corners())
+
+    def intersects(self, bounds):
+        """Returns ``False`` if a ``(xmin, xmax, ymin, ymax, zmin, zmax)``
+        bounding box misses the bounding box of the region, and ``True``
+        otherwise, or for unknown (``None``) bounds."""
+        if bounds is None:
+            return True
+        region = self.bounds
+        return all(
+            bounds[2 * axis] <= region[2 * axis + 1] and region[2 * axis] <= bounds[2 * axis + 1]
+            for axis in range(3)
+        )
+
+    def select_cells(self, vertices, cells):
+        """Selects the cells with at least one vertex inside the region.
+
+        Args:
+            vertices (np.ndarray): the ``(n, 3)`` vertices
+            cells (np.ndarray): the ``(m, k)`` vertex indices of the cells
+
+        Returns:
+            tuple: the sorted indices of the vertices used by the selected cells,
+            the indices of the selected cells, and their cells renumbered into the
+            selected vertices
+        """
+        cells = np.asarray(cells, dtype=np.int64).reshape((len(cells), -1))
+        inside = self.contains(np.asarray(vertices, dtype=float).reshape((-1, 3)))
+        cell_index = np.flatnonzero(inside[cells].any(axis=1))
+        vertex_index = np.unique(cells[cell_index])
+        return vertex_index, cell_index, np.searchsorted(vertex_index, cells[cell_index])
+
+
+class Box(Region):
+    """An axis-aligned box.
+
+    Args:
+        bounds (tuple): the ``(xmin, xmax, ymin, ymax, zmin, zmax)`` bounds
+    """
+
+    def __init__(self, bounds):
+        bounds = np.asarray(bounds, dtype=float).ravel()
+        if bounds.shape != (6,):
+            raise ValueError(f"Bounds ({bounds}) must be (xmin, xmax, ymin, ymax, zmin, zmax).")
+        self.lower = bounds[0::2]
+        self.upper = bounds[1::2]
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(bounds={self.bounds})"
+
+    def contains(self, points):
+        points = np.asarray(points, dtype=float).reshape((-1, 3))
+        return np.all((points >= self.lower) & (points <= self.upper), axis=1)
+
+    def corners(self):
+        return np.array(list(product(*zip(self.lower, self.upper))), dtype=float)
+
+
+class OrientedBox(Region):
+    """A box rotated about its center, e.g. a corridor along a section line.
+
+    Args:
+        center (tuple): the ``(x, y, z)`` center of the box
+        size (tuple): the lengths of the box along its three axes
+        azimuth (float): the azimuth of the first axis, in degrees clockwise
+            from north. The second axis is horizontal and the third vertical.
+        axes (np.ndarray): the ``(3, 3)`` unit vectors of the axes of the box as
+            rows, instead of ``azimuth``
+    """
+
+    def __init__(self, center, size, azimuth=0.0, axes=None):
+        self.center = np.asarray(center, dtype=float).ravel()
+        self.size = np.asarray(size, dtype=float).ravel()
+        if axes is None:
+            angle = np.radians(azimuth)
+            axes = [
+                [np.sin(angle), np.cos(angle), 0.0],
+                [-np.cos(angle), np.sin(angle), 0.0],
+                [0.0, 0.0, 1.0],
+            ]
+        axes = np.asarray(axes, dtype=float).reshape((3, 3))
+        self.axes = axes / np.linalg.norm(axes, axis=1)[:, None]
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(center={self.center.tolist()}, "
+            f"size={self.size.tolist()}, axes={self.axes.tolist()})"
+        )
+
+    def contains(self, points):
+        points = np.asarray(points, dtype=float).reshape((-1, 3))
+        local = (points - self.center).dot(self.axes.T)
+        return np.all(np.abs(local) <= 0.5 * self.size, axis=1)
+
+    def corners(self):
+        signs = np.array(list(product((-0.5, 0.5), repeat=3)))
+        return self.center + (signs * self.size).dot(self.axes)
+
+
+class Polygon(Region):
+    """A polygon in plan view, extruded over a range of elevations.
+
+    Args:
+        xy (np.ndarray): the ``(n, 2)`` vertices of the polygon, in order. The
+            polygon is closed from the last vertex to the first.
+        z_range (tuple): the ``(zmin, zmax)`` elevations, by default unbounded
+    """
+
+    def __init__(self, xy, z_range=None):
+        self.xy = np.asarray(xy, dtype=float).reshape((-1, 2))
+        if len(self.xy) < 3:
+            raise ValueError("A polygon needs at least three vertices.")
+        self.z_range = (-np.inf, np.inf) if z_range is None else tuple(float(z) for z in z_range)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(xy={self.xy.tolist()}, z_range={self.z_range})"
+
+    def contains(self, points):
+        points = np.asarray(points, dtype=float).reshape((-1, 3))
+        (xmin, ymin), (xmax, ymax) = self.xy.min(axis=0), self.xy.max(axis=0)
+        inside = (
+            (points[:, 0] >= xmin)
+            & (points[:, 0] <= xmax)
+            & (points[:, 1] >= ymin)
+            & (points[:, 1] <= ymax)
+            & (points[:, 2] >= self.z_range[0])
+            & (points[:, 2] <= self.z_range[1])
+        )
+        candidates = np.flatnonzero(inside)
+        x, y = points[candidates, 0], points[candidates, 1]
+
+        # Even-odd rule: count the edges crossed by a ray from each point towards +x
+        crossings = np.zeros(len(candidates), dtype=bool)
+        for (x0, y0), (x1, y1) in zip(self.xy, np.roll(self.xy, -1, axis=0)):
+            if y0 == y1:
+                continue
+            straddles = (y0 > y) != (y1 > y)
+            crossings ^= straddles & (x < x0 + (y - y0) * (x1 - x0) / (y1 - y0))
+        inside[candidates] = crossings
+        return inside
+
+    def corners(self):
+        return np.array(
+            [[x, y, z] for x, y in self.xy for z in self.z_range], dtype=float
+        )
+
+
+def as_region(region):
+    """Returns a :class:`Region` from a region, or from the
+    ``(xmin, xmax, ymin, ymax, zmin, zmax)`` bounds of a :class:`Box`.
+
+    Args:
+        region (Region or tuple): the region, or ``None``
+    """
+    if region is None or isinstance(region, Region):
+        return region
+    return Box(region)
+
+
+def _grid_bounds(entity, lengths):
+    """Returns the bounds of the box spanning ``lengths`` along the axes of a
+    grid rotated about the vertical axis at its origin."""
+    local = np.array(list(product(*[(0.0, length) for length in lengths])), dtype=float)
+    rotation = xy_rotation_matrix(np.deg2rad(entity.rotation))
+    origin = np.array([entity.origin["x"], entity.origin["y"], entity.origin["z"]], dtype=float)
+    return get_bounds(local.dot(np.asarray(rotation).T) + origin)
+
+
+def get_entity_bounds(entity):
+    """Returns the ``(xmin, xmax, ymin, ymax, zmin, zmax)`` bounds of an object,
+    or ``None`` for groups and objects without locations. Drillhole groups are
+    filtered hole by hole by their converter instead.
+
+    The bounds are those of the mesh built by the converter: the corners of
+    block models and octrees, the outer cell centers of 2D grids, which are the
+    points of their image data, and the vertices or cell centers of other
+    objects.
+
+    Args:
+        entity: the GEOH5 entity
+    """
+    name = entity.__class__.__name__
+    if name == "Grid2D":
+        # Points at the cell centers, from the origin, see grid2d_geom_to_vtk
+        return _grid_bounds(
+            entity,
+            [
+                (entity.u_count - 1) * entity.u_cell_size,
+                (entity.v_count - 1) * entity.v_cell_size,
+                0.0,
+            ],
+        )
+    if name == "Octree":
+        # Cell corners, see octree_grid_geom_to_vtk
+        return _grid_bounds(
+            entity,
+            [
+                entity.u_count * entity.u_cell_size,
+                entity.v_count * entity.v_cell_size,
+                entity.w_count * entity.w_cell_size,
+            ],
+        )
+    if name == "BlockModel":
+        delimiters = get_blockmodel_delimiters(entity)
+        local = np.array(
+            list(product(*[(d.min(), d.max()) for d in delimiters])), dtype=float
+        )
+        origin = np.array([entity.origin[0], entity.origin[1], entity.origin[2]], dtype=float)
+        # Nodes are placed with ``local.dot(rotation_matrix) + origin``
+        return get_bounds(local.dot(create_blockmodel_rot_matrix(entity)) + origin)
+    if isinstance(entity, Group):
+        # The extent of a drillhole group only spans the collars
+        return None
+    extent = getattr(entity, "extent", None)
+    if extent is None:
+        return None
+    return get_bounds(np.asarray(extent, dtype=float))
+
+
+# Now set up the display names for the docs
+as_region.__displayname__ = "As Region" # type: ignore
+get_bounds.__displayname__ = "Bounds" # type: ignore
+get_entity_bounds.__displayname__ = "Entity Bounds" # type: ignore
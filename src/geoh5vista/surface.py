@@ -5,67 +5,389 @@ __all__ = [
     "surface_geom_to_vtk",
     "surface_to_vtk",
     "vtk_geom_to_surface",
-    "vtk_to_surface"
+    "vtk_to_surface",
+    "decimate_surface",
+    "surface_error",
+    "SurfaceLOD",
 ]
 
 __displayname__ = "Surface"
 
 import numpy as np
 import pyvista
+from vtkmodules.vtkCommonCore import reference
+from vtkmodules.vtkCommonDataModel import vtkStaticCellLocator, vtkStaticPointLocator
+from vtkmodules.vtkFiltersCore import vtkQuadricDecimation
+from vtkmodules.vtkFiltersPoints import vtkPointInterpolator, vtkVoronoiKernel
 from geoh5py.objects.surface import Surface
 from geoh5py.workspace.workspace import Workspace
-from geoh5vista.utilities import add_data_to_vtk, add_entity_metadata #, add_texture_coordinates
+from geoh5vista.utilities import (
+    add_data_to_geoh5,
+    add_data_to_vtk,
+    add_entity_metadata,
+    add_entity_metadata_to_geoh5,
+) #, add_texture_coordinates
 
 
-def surface_geom_to_vtk(trisurf):
+def surface_geom_to_vtk(trisurf, selection=None):
     """Convert the triangulated surface to a :class:`pyvista.PolyData`
     object
 
     Args:
         trisurf (:class:`geoh5py.objects.surface.Surface`): the surface to
             convert
+        selection (tuple): only convert these vertices and triangles, as
+            returned by :meth:`geoh5vista.spatial.Region.select_cells`
     """
     pts = trisurf.vertices
     faces = trisurf.cells
+    if selection is not None:
+        vertex_index, _, faces = selection
+        pts = pts[vertex_index]
     output = pyvista.make_tri_mesh(pts, faces)
     return output
 
 
-def surface_to_vtk(trisurf):
+def surface_to_vtk(trisurf, fields=None, categorical=False, lod=None, region=None):
     """Convert the surface to a its appropriate VTK data object type.
 
     Args:
         trisurf (:class:`geoh5py.objects.surface.Surface`): the surface element to
             convert
+        fields (list): only read the data with these names, if given
+        categorical (bool): store referenced data as integer codes and a value
+            map, see :func:`geoh5vista.utilities.add_data_to_vtk`
+        lod (int): if given, return a surface decimated to about this number of
+            triangles instead, see :func:`decimate_surface`. Its
+            ``user_dict["lod"]`` holds the number of triangles of the full
+            resolution surface and the geometric error of the decimation. The
+            decimated surface is cached like any conversion when a cache is used.
+        region (:class:`geoh5vista.spatial.Region`): only convert the triangles
+            with at least one vertex inside this region, if given. The surface is
+            decimated after the selection.
     """
+    selection = vertices = cells = None
+    if region is not None:
+        selection = region.select_cells(trisurf.vertices, trisurf.cells)
+        vertices, cells, _ = selection
 
-    output = surface_geom_to_vtk(trisurf)
+    output = surface_geom_to_vtk(trisurf, selection=selection)
 
     # Now add point data:
-    output = add_data_to_vtk(output, trisurf)
+    output = add_data_to_vtk(
+        output, trisurf, fields=fields, categorical=categorical, vertices=vertices, cells=cells
+    )
     output = add_entity_metadata(output, trisurf)
     #add_texture_coordinates(output, trisurf.textures, trisurf.name)
 
+    if lod is not None and lod < output.n_cells:
+        decimated = decimate_surface(output, n_triangles=lod)
+        decimated.user_dict["lod"] = {
+            "n_triangles": decimated.n_cells,
+            "full_n_triangles": output.n_cells,
+            "error": surface_error(output, decimated),
+        }
+        output = decimated
+
     return output
 
 
-def vtk_geom_to_surface(vtk: pyvista.PolyData, workspace: Workspace, name: str) -> Surface:
+def _nearest_index(source, target_points, locator=None):
+    """Returns the index of the closest point of ``source`` to each target point.
+
+    Args:
+        source (:class:`pyvista.PointSet`): the points to search, with their
+            ``"index"`` point array
+        target_points (:class:`numpy.ndarray`): the ``(n, 3)`` target points
+        locator (:class:`vtkStaticPointLocator`): a locator of the source points,
+            reused between calls
+    """
+    interpolator = vtkPointInterpolator()
+    interpolator.SetInputData(pyvista.PointSet(np.asarray(target_points)))
+    interpolator.SetSourceData(source)
+    # The Voronoi kernel takes the value of the closest point only
+    interpolator.SetKernel(vtkVoronoiKernel())
+    interpolator.SetNullPointsStrategy(vtkPointInterpolator.CLOSEST_POINT)
+    if locator is not None:
+        interpolator.SetLocator(locator)
+    interpolator.Update()
+    index = pyvista.wrap(interpolator.GetOutput()).point_data["index"]
+    return np.rint(index).astype(np.int64)
+
+
+def _index_source(points):
+    """Returns the points and locator searched by :func:`_nearest_index`."""
+    source = pyvista.PointSet(np.asarray(points))
+    source.point_data["index"] = np.arange(source.n_points, dtype=float)
+    locator = vtkStaticPointLocator()
+    locator.SetDataSet(source)
+    locator.BuildLocator()
+    return source, locator
+
+
+def decimate_surface(output, n_triangles=None, reduction=None, source=None, search=None):
+    """Decimates a triangulated surface with quadric error decimation.
+
+    Float point data arrays are interpolated onto the kept vertices. Other point
+    data arrays (integer and referenced codes, names) take the value of the
+    closest vertex of the source surface, and cell data arrays that of the
+    source triangle whose centre is the closest to each triangle centre. Field
+    data, with the ``user_dict``, is copied.
+
+    Args:
+        output (:class:`pyvista.PolyData`): the triangulated surface to decimate
+        n_triangles (int): the target number of triangles
+        reduction (float): the fraction of the triangles to remove instead, e.g.
+            ``0.75`` keeps a quarter of them
+        source (:class:`pyvista.PolyData`): the surface the integer and cell data
+            is mapped from. Defaults to ``output``. Give the full resolution
+            surface when decimating an already decimated one.
+        search (dict): search structures of the source points and cell centres,
+            filled on the first call and reused by later calls with the same
+            source
+    """
+    if source is None:
+        source = output
+    if reduction is None:
+        if n_triangles is None:
+            raise ValueError("Either n_triangles or reduction must be given.")
+        reduction = 1.0 - n_triangles / max(output.n_cells, 1)
+    reduction = float(np.clip(reduction, 0.0, 1.0))
+
+    # Only the float point arrays are interpolated by the decimation
+    mesh = pyvista.PolyData(output.points, faces=output.faces)
+    for name in output.point_data.keys():
+        values = output.point_data[name]
+        if values.dtype.kind == "f":
+            mesh.point_data[name] = values
+    decimation = vtkQuadricDecimation()
+    decimation.SetInputData(mesh)
+    decimation.SetTargetReduction(reduction)
+    decimation.VolumePreservationOn()
+    decimation.MapPointDataOn()
+    decimation.Update()
+    decimated = pyvista.wrap(decimation.GetOutput())
+
+    if search is None:
+        search = {}
+    point_names = [
+        name for name in source.point_data.keys() if name not in decimated.point_data
+    ]
+    if point_names:
+        if "points" not in search:
+            search["points"] = _index_source(source.points)
+        index = _nearest_index(
+            search["points"][0], decimated.points, search["points"][1]
+        )
+        for name in point_names:
+            decimated.point_data[name] = source.point_data[name][index]
+    if source.cell_data.keys():
+        if "cells" not in search:
+            search["cells"] = _index_source(source.cell_centers().points)
+        index = _nearest_index(
+            search["cells"][0], decimated.cell_centers().points, search["cells"][1]
+        )
+        for name in source.cell_data.keys():
+            decimated.cell_data[name] = source.cell_data[name][index]
+    for name in output.field_data.keys():
+        decimated.field_data[name] = output.field_data[name]
+    return decimated
+
+
+def surface_error(full, decimated, n_samples=10_000, seed=0):
+    """Returns the geometric error of a decimated surface: the largest distance
+    from the vertices of the full resolution surface to the decimated surface,
+    estimated from a random sample of the vertices.
+
+    Args:
+        full (:class:`pyvista.PolyData`): the full resolution surface
+        decimated (:class:`pyvista.PolyData`): the decimated surface
+        n_samples (int): number of vertices sampled
+        seed (int): seed of the sampling
+    """
+    points = np.asarray(full.points)
+    if len(points) > n_samples:
+        points = points[np.random.default_rng(seed).choice(len(points), n_samples, replace=False)]
+    distance = pyvista.PointSet(points).compute_implicit_distance(decimated)
+    return float(np.abs(distance["implicit_distance"]).max()) if len(points) else 0.0
+
+
+class SurfaceLOD:
+    """A level of detail pyramid of a triangulated surface.
+
+    Level 0 is the full resolution surface, and each following level keeps
+    ``1 - reduction`` of the triangles of the previous one, down to
+    ``min_triangles``. Levels are decimated on demand, when first requested, with
+    :func:`decimate_surface`, and carry the data arrays of the surface. The
+    geometric error of each level is kept in :attr:`errors`.
+
+    Args:
+        output (:class:`pyvista.PolyData`): the full resolution surface, e.g. from
+            :func:`surface_to_vtk`
+        reduction (float): the fraction of the triangles removed at each level
+        min_triangles (int): the number of triangles under which no coarser level
+            is made
+        n_samples (int): number of vertices sampled to estimate the errors, see
+            :func:`surface_error`
+
+    Example:
+        >>> lod = SurfaceLOD(surface_to_vtk(topography))
+        >>> mesh = lod.select(screen_error=2.0, distance=5000.0)
+        >>> lod.pick(picked_point)["Elevation"]
+    """
+
+    def __init__(self, output, reduction=0.5, min_triangles=10_000, n_samples=10_000):
+        if not 0.0 < reduction < 1.0:
+            raise ValueError(f"Reduction ({reduction}) must be between 0 and 1.")
+        self.full = output
+        self.reduction = reduction
+        self.min_triangles = min_triangles
+        self.n_samples = n_samples
+        self.levels = [output]
+        self.errors = [0.0]
+        self._search = {}
+        self._cell_locator = None
+
+    def __len__(self):
+        return self.n_levels
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}({self.n_levels} levels, "
+            f"{len(self.levels)} built, {self.full.n_cells} triangles)"
+        )
+
+    @property
+    def n_levels(self):
+        """Number of levels of the pyramid, including the full resolution"""
+        n_levels = 1
+        n_triangles = self.full.n_cells
+        while n_triangles * (1 - self.reduction) >= self.min_triangles:
+            n_triangles *= 1 - self.reduction
+            n_levels += 1
+        return n_levels
+
+    def level(self, index):
+        """Returns a level of the pyramid, decimating the missing levels."""
+        if not 0 <= index < self.n_levels:
+            raise IndexError(f"Level ({index}) out of range.")
+        while len(self.levels) <= index:
+            decimated = decimate_surface(
+                self.levels[-1],
+                n_triangles=int(self.full.n_cells * (1 - self.reduction) ** len(self.levels)),
+                source=self.full,
+                search=self._search,
+            )
+            self.errors.append(surface_error(self.full, decimated, self.n_samples))
+            decimated.user_dict["lod"] = {
+                "level": len(self.levels),
+                "n_triangles": decimated.n_cells,
+                "full_n_triangles": self.full.n_cells,
+                "error": self.errors[-1],
+            }
+            self.levels.append(decimated)
+        return self.levels[index]
+
+    def build(self):
+        """Decimates every level of the pyramid and returns them."""
+        self.level(self.n_levels - 1)
+        return self.levels
+
+    def select(
+        self,
+        n_triangles=None,
+        screen_error=None,
+        distance=None,
+        fov=30.0,
+        viewport_height=1080,
+    ):
+        """Returns the coarsest level meeting a target number of triangles or a
+        screen-space error.
+
+        Args:
+            n_triangles (int): the largest number of triangles. The finest level
+                with at most this many triangles is returned.
+            screen_error (float): the largest geometric error on screen, in
+                pixels, for a camera at ``distance`` from the surface
+            distance (float): the distance from the camera to the surface
+            fov (float): the vertical view angle of the camera, in degrees
+            viewport_height (int): the height of the view, in pixels
+        """
+        if n_triangles is not None:
+            for index in range(self.n_levels):
+                # Levels only have about the targeted number of triangles
+                if self.full.n_cells * (1 - self.reduction) ** index <= n_triangles:
+                    return self.level(index)
+            return self.level(self.n_levels - 1)
+        if screen_error is None or distance is None:
+            raise ValueError("Either n_triangles or screen_error and distance must be given.")
+
+        # World size of a pixel at the distance of the surface
+        pixel_size = 2.0 * distance * np.tan(np.deg2rad(fov) / 2.0) / viewport_height
+        selected = 0
+        for index in range(1, self.n_levels):
+            self.level(index)
+            if self.errors[index] / pixel_size > screen_error:
+                break
+            selected = index
+        return self.level(selected)
+
+    def pick(self, point):
+        """Returns the data of the full resolution surface at a picked point: the
+        id of the closest triangle and vertex, with the cell data of the triangle
+        and the point data of the vertex.
+
+        Args:
+            point (tuple): the ``(x, y, z)`` picked location, e.g. on a decimated
+                level
+        """
+        if self._cell_locator is None:
+            self._cell_locator = vtkStaticCellLocator()
+            self._cell_locator.SetDataSet(self.full)
+            self._cell_locator.BuildLocator()
+        closest = [0.0, 0.0, 0.0]
+        cell_id, sub_id, distance = reference(0), reference(0), reference(0.0)
+        self._cell_locator.FindClosestPoint(list(point), closest, cell_id, sub_id, distance)
+        cell_id = int(cell_id)
+
+        # Closest vertex of the picked triangle
+        vertices = self.full.get_cell(cell_id).point_ids
+        offsets = np.asarray(self.full.points[vertices]) - closest
+        point_id = int(vertices[int(np.argmin(np.linalg.norm(offsets, axis=1)))])
+
+        picked = {"cell_id": cell_id, "point_id": point_id, "point": tuple(closest)}
+        for name in self.full.cell_data.keys():
+            picked[name] = self.full.cell_data[name][cell_id]
+        for name in self.full.point_data.keys():
+            picked[name] = self.full.point_data[name][point_id]
+        return picked
+
+
+def vtk_geom_to_surface(
+    vtk: pyvista.PolyData, workspace: Workspace, name: str, parent=None
+) -> Surface:
     """Convert a VTK PolyData object to a geoh5py Surface object."""
 
     points = vtk.points
     # extract triangle faces without VTK padding
     if isinstance(vtk, pyvista.PolyData) and vtk.is_all_triangles:
-        cells = vtk.faces.reshape((vtk.n_faces, 4))[:, 1:]
+        cells = vtk.faces.reshape((-1, 4))[:, 1:]
     else:
         raise ValueError("Convert VTK object to all triangular mesh PolyData object.")
 
-    surface = Surface.create(workspace=workspace, name=name, vertices=points, cells=cells)
+    surface = Surface.create(
+        workspace=workspace, name=name, vertices=points, cells=cells, parent=parent
+    )
     return surface
 
 
-def vtk_to_surface(vtk: pyvista.PolyData, workspace: Workspace, name: str) -> Surface:
-    """Convert a VTK object to a geoh5py Surface object."""
-    surface = vtk_geom_to_surface(vtk=vtk, workspace=workspace, name=name)
+def vtk_to_surface(
+    vtk: pyvista.PolyData, workspace: Workspace, name: str, parent=None
+) -> Surface:
+    """Convert a VTK object and its point and cell data to a geoh5py Surface object."""
+    surface = vtk_geom_to_surface(vtk=vtk, workspace=workspace, name=name, parent=parent)
+    surface = add_data_to_geoh5(surface, vtk)
+    surface = add_entity_metadata_to_geoh5(surface, vtk)
     return surface
 
 
@@ -74,3 +396,5 @@ surface_to_vtk.__displayname__ = "Surface to VTK" # type: ignore
 surface_geom_to_vtk.__displayname__ = "Surface Geometry to VTK" # type: ignore
 vtk_geom_to_surface.__displayname__ = "VTK Geometry to Surface" # type: ignore
 vtk_to_surface.__displayname__ = "VTK to Surface" # type: ignore
+decimate_surface.__displayname__ = "Decimate Surface" # type: ignore
+surface_error.__displayname__ = "Surface Error" # type: ignore
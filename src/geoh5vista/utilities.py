@@ -3,16 +3,30 @@ __all__ = [
     "check_orthogonal",
     "add_data_to_vtk",
     "add_data_to_vtk_grid",
+    "add_drillhole_interval_data_to_vtk",
+    "get_drillhole_interval_data",
+    "get_interval_index",
+    "get_entity_info",
+    "get_data_fields",
+    "read_data_values",
+    "add_data_to_geoh5",
+    "add_entity_metadata_to_geoh5",
     #"add_texture_coordinates",
 ]
 
 
 #import pyvista
 import numpy as np
+from h5py import h5s
 #from PIL import Image
 from geoh5py.data.referenced_data import ReferencedData
 from geoh5py.data.float_data import FloatData
 from geoh5py.data.integer_data import IntegerData
+from geoh5py.shared import FLOAT_NDV
+from geoh5py.shared.utils import as_str_if_uuid
+
+from geoh5vista.categorical import get_value_map, set_value_map
+from geoh5vista.instrumentation import record_bytes, stage
 
 #try:
 #    from pyvista import is_pyvista_obj as is_pyvista_dataset
@@ -45,11 +59,44 @@ def check_orthogonal(axis_u, axis_v, axis_w):
     return True
 
 
-def add_data_to_vtk(output, entity):
+def get_data_fields(entity, fields=None):
+    """Returns the names of the data fields of an entity to convert: all of them
+    except those in ``SKIPDATA`` or, if ``fields`` is given, only those listed.
+    Only names are read, never values."""
+    names = [f for f in entity.get_data_list() if f not in SKIPDATA]
+    if fields is not None:
+        names = [f for f in names if f in fields]
+    return names
+
+
+def _data_values(data, vertices=None, cells=None):
+    """Returns the values of data, taken at the given vertex or cell indices
+    according to its association."""
+    values = data.values
+    association = getattr(data.association, "name", None)
+    if vertices is not None and association == "VERTEX":
+        return values[vertices]
+    if cells is not None and association == "CELL":
+        return values[cells]
+    return values
+
+
+@stage("data")
+def add_data_to_vtk(output, entity, fields=None, categorical=False, vertices=None, cells=None):
     """Adds data arrays to an output VTK data object. Assigns data to cells or points
-    based on number of data values compared to number of cells or points."""
+    based on number of data values compared to number of cells or points.
+
+    Only the data listed in ``fields`` is read, if given. Referenced data gets a
+    ``{field}_names`` array of names, or with ``categorical`` only its integer codes
+    and a value map in ``user_dict["value_maps"]``, see
+    :mod:`geoh5vista.categorical`.
 
-    fields = [f for f in entity.get_data_list() if f not in SKIPDATA]
+    Outputs holding a subset of the entity, e.g. selected by
+    :meth:`geoh5vista.spatial.Region.select_cells`, give the indices of their
+    ``vertices`` and ``cells``, where the values of vertex and cell data are
+    taken."""
+
+    fields = get_data_fields(entity, fields)
     #fields = [i.name for i in entity.children]
     #if "Visual Parameters" in fields:
     #    fields.remove("Visual Parameters")
@@ -62,12 +109,15 @@ def add_data_to_vtk(output, entity):
             data = data_obj[0]
             if isinstance(data, ReferencedData):
                 data_value_map = data.value_map
-                output[f] = data.values
-                output[f"{f}_names"] = data_value_map.map_values(output[f])
+                output[f] = _data_values(data, vertices, cells)
+                if categorical:
+                    set_value_map(output, f, get_value_map(data))
+                else:
+                    output[f"{f}_names"] = data_value_map.map_values(output[f])
             elif isinstance(data, FloatData):
-                output[f] = data.values
+                output[f] = _data_values(data, vertices, cells)
             elif isinstance(data, IntegerData):
-                output[f] = data.values
+                output[f] = _data_values(data, vertices, cells)
             else:
                 pass
         else:
@@ -76,19 +126,90 @@ def add_data_to_vtk(output, entity):
     return output
 
 
-def add_drillhole_interval_data_to_vtk(output, entity):
-    """Adds data arrays to Polydata line objects. Assigns data to cells or points
-    based on number of data values compared to number of cells or points."""
+def get_interval_index(depths, interval_from, interval_to, overlap="last"):
+    """Returns the index of the interval containing each depth, or -1 where a depth
+    falls in a gap between intervals. An interval contains the depths with
+    ``from <= depth < to``.
 
-    if 'depth' not in output.point_data:
-        raise ValueError("The line object must have a 'depth' point data array.")
+    The intervals are sorted once and looked up with :func:`numpy.searchsorted`,
+    so the cost is O((cells + intervals) log intervals) instead of building a mask
+    per interval.
 
-    point_depths = output.point_data['depth']
+    Args:
+        depths (:class:`numpy.ndarray`): the depths to look up
+        interval_from (:class:`numpy.ndarray`): top depth of each interval
+        interval_to (:class:`numpy.ndarray`): bottom depth of each interval
+        overlap (str): which interval wins where intervals overlap, either
+            ``"last"`` or ``"first"`` in the order they are stored. Intervals with
+            a missing or non-positive length are ignored.
+    """
+    if overlap not in ("last", "first"):
+        raise ValueError(f"Overlap rule ({overlap}) must be 'last' or 'first'.")
+
+    depths = np.asarray(depths, dtype=float)
+    interval_from = np.asarray(interval_from, dtype=float)
+    interval_to = np.asarray(interval_to, dtype=float)
+    index = np.full(depths.shape, -1, dtype=np.int64)
+
+    valid = np.flatnonzero(
+        np.isfinite(interval_from) & np.isfinite(interval_to) & (interval_to > interval_from)
+    )
+    if len(valid) == 0:
+        return index
+
+    order = valid[np.argsort(interval_from[valid], kind="stable")]
+    starts = interval_from[order]
+    ends = interval_to[order]
+
+    if np.all(starts[1:] >= ends[:-1]):
+        # Sorted intervals do not overlap: the candidate for each depth is the last
+        # interval starting above it, which only needs checking against its bottom
+        pos = np.searchsorted(starts, depths, side="right") - 1
+        inside = pos >= 0
+        inside[inside] = depths[inside] < ends[pos[inside]]
+        index[inside] = order[pos[inside]]
+        return index
+
+    # Overlapping intervals: split the hole into elementary segments between all
+    # interval bounds and resolve the owner of each segment once
+    bounds = np.unique(np.r_[starts, ends])
+    owner = np.full(len(bounds) - 1, -1, dtype=np.int64)
+    first = np.searchsorted(bounds, interval_from[valid])
+    last = np.searchsorted(bounds, interval_to[valid])
+    paint = range(len(valid)) if overlap == "last" else range(len(valid) - 1, -1, -1)
+    for i in paint:
+        owner[first[i]:last[i]] = valid[i]
+
+    pos = np.searchsorted(bounds, depths, side="right") - 1
+    inside = (pos >= 0) & (pos < len(owner))
+    index[inside] = owner[pos[inside]]
+    return index
+
+
+@stage("data")
+def get_drillhole_interval_data(
+    point_depths, entity, fields=None, categorical=False, value_maps=None
+):
+    """Returns a dictionary of cell data arrays for a drillhole trace made of line
+    segments between consecutive ``point_depths``. Each segment takes the values
+    of the interval containing its depth midpoint.
+
+    The cell to interval lookup is computed once per interval table of the hole
+    and reused for every field of that table, see :func:`get_interval_index`.
+    Only the data listed in ``fields`` is read, if given.
+
+    With ``categorical``, referenced data only gets its array of integer codes and
+    no ``{field}_names`` array. The ``{code: name}`` value map of each referenced
+    field is then added to the ``value_maps`` dictionary, if given."""
+
+    point_depths = np.asarray(point_depths)
     cell_depth_midpoints = (point_depths[:-1] + point_depths[1:]) / 2.0
+    n_cells = len(cell_depth_midpoints)
 
-    fields = [f for f in entity.get_data_list() if f not in SKIPDATA]
-    interval_from = entity.from_[0].values
-    interval_to = entity.to_[0].values
+    fields = get_data_fields(entity, fields)
+    default_intervals = (entity.from_[0], entity.to_[0])
+    cell_index_by_table = {}
+    cell_data = {}
 
     for f in fields:
         data_obj = entity.get_data(f)
@@ -96,58 +217,171 @@ def add_drillhole_interval_data_to_vtk(output, entity):
             continue
         
         data = data_obj[0]
-        data_values = data.values
-
         if isinstance(data, FloatData):
-            new_cell_data = np.full(output.n_cells, np.nan, dtype=float)
+            new_cell_data = np.full(n_cells, np.nan, dtype=float)
         elif isinstance(data, IntegerData):
-            new_cell_data = np.full(output.n_cells, -1, dtype=int)
+            new_cell_data = np.full(n_cells, -1, dtype=int)
         elif isinstance(data, ReferencedData):
-            new_cell_data = np.full(output.n_cells, -1, dtype=int)
+            new_cell_data = np.full(n_cells, -1, dtype=int)
         else:
             continue
 
-        for i in range(len(interval_from)):
-            start, end = interval_from[i], interval_to[i]
-            mask = (cell_depth_midpoints >= start) & (cell_depth_midpoints < end)
-            new_cell_data[mask] = data_values[i]
+        # Use the interval table the data belongs to, if it has its own
+        property_group = getattr(data, "property_group", None)
+        interval_from = getattr(property_group, "from_", None)
+        interval_to = getattr(property_group, "to_", None)
+        if interval_from is None or interval_to is None:
+            interval_from, interval_to = default_intervals
 
-        output.cell_data[f] = new_cell_data
+        table = interval_from.uid
+        if table not in cell_index_by_table:
+            cell_index_by_table[table] = get_interval_index(
+                cell_depth_midpoints, interval_from.values, interval_to.values
+            )
+        cell_index = cell_index_by_table[table]
 
-        if isinstance(data, ReferencedData):
+        data_values = data.values
+        if len(data_values) != len(interval_from.values):
+            continue
+
+        has_interval = cell_index >= 0
+        new_cell_data[has_interval] = data_values[cell_index[has_interval]]
+        cell_data[f] = new_cell_data
+
+        if isinstance(data, ReferencedData) and categorical:
+            if value_maps is not None:
+                value_maps.setdefault(f, {}).update(get_value_map(data))
+        elif isinstance(data, ReferencedData):
             value_map = data.value_map
-            names_array = np.full(output.n_cells, "N/A", dtype=object)
+            names_array = np.full(n_cells, "N/A", dtype=object)
             valid_mask = new_cell_data != -1
             names_array[valid_mask] = value_map.map_values(new_cell_data[valid_mask])
-            output.cell_data[f"{f}_names"] = names_array
+            cell_data[f"{f}_names"] = names_array
+
+    return cell_data
+
+
+@stage("data")
+def add_drillhole_interval_data_to_vtk(output, entity, fields=None, categorical=False):
+    """Adds data arrays to Polydata line objects. Assigns data to cells or points
+    based on number of data values compared to number of cells or points.
+
+    See :func:`get_drillhole_interval_data`."""
+
+    if 'depth' not in output.point_data:
+        raise ValueError("The line object must have a 'depth' point data array.")
+
+    value_maps = {}
+    cell_data = get_drillhole_interval_data(
+        output.point_data['depth'], entity, fields, categorical, value_maps
+    )
+    for f, values in cell_data.items():
+        output.cell_data[f] = values
+    for f, value_map in value_maps.items():
+        set_value_map(output, f, value_map)
 
     return output
 
 
-def add_data_to_vtk_grid(output, entity):
+def read_data_values(data, hyperslabs=None):
+    """Reads the values of a data object, or only part of them, from the geoh5 file.
+
+    The selection is given as 1D hyperslabs of ``(start, stride, count, block)``:
+    ``count`` blocks of ``block`` consecutive values, the first one starting at
+    ``start`` and each following one ``stride`` values after the previous one.
+    Only the selected values are read from HDF5, in file order, and they are
+    formatted the same way as :attr:`geoh5py.data.data.Data.values`.
+
+    Args:
+        data (:class:`geoh5py.data.data.Data`): the data object to read
+        hyperslabs (list): the ``(start, stride, count, block)`` selections. If
+            ``None``, all values are returned.
+    """
+    if hyperslabs is None:
+        return data.values
+
+    hyperslabs = np.asarray(hyperslabs, dtype=np.int64).reshape((-1, 4))
+    loaded = getattr(data, "_values", None)
+    if loaded is not None:
+        # Already in memory, so select without going back to the file
+        index = np.concatenate([
+            (start + stride * np.arange(count)[:, None] + np.arange(block)).ravel()
+            for start, stride, count, block in hyperslabs
+        ]) if len(hyperslabs) else np.empty(0, dtype=np.int64)
+        return loaded[np.unique(index)]
+
+    h5file = data.workspace.geoh5
+    dataset = h5file[list(h5file)[0]]["Data"][as_str_if_uuid(data.uid)]["Data"]
+
+    space = dataset.id.get_space()
+    space.select_none()
+    for start, stride, count, block in hyperslabs:
+        if count > 0 and block > 0:
+            space.select_hyperslab(
+                (int(start),), (int(count),), (int(max(stride, block)),), (int(block),),
+                op=h5s.SELECT_OR,
+            )
+    n_values = space.get_select_npoints()
+    values = np.empty(n_values, dtype=dataset.dtype)
+    if n_values > 0:
+        dataset.id.read(h5s.create_simple((n_values,)), space, values)
+    record_bytes(values.nbytes)
+
+    # Same formatting as geoh5py applies when fetching all values
+    if values.dtype in [float, "float64", "float32"]:
+        values[values == FLOAT_NDV] = np.nan
+    values = values.astype(float)
+    values[np.isnan(values)] = data.nan_value
+    return data.format_type(values)
+
+
+@stage("data")
+def add_data_to_vtk_grid(output, entity, window=None, fields=None, categorical=False):
     """Adds data arrays to an output VTK data object. Assigns data to cells or points
-    based on number of data values compared to number of cells or points."""
+    based on number of data values compared to number of cells or points.
 
-    fields = [f for f in entity.get_data_list() if f not in SKIPDATA]
+    Args:
+        output: the VTK grid of the block model
+        entity (:class:`geoh5py.objects.block_model.BlockModel`): the block model
+        window (tuple): optional ``((i0, i1), (j0, j1), (k0, k1))`` cell index
+            ranges. Only the matching hyperslab of each data array is read.
+        fields (list): only read the data with these names, if given
+        categorical (bool): if ``True``, store the integer codes of referenced
+            data with their value map instead of a ``{field}_names`` array, see
+            :func:`add_data_to_vtk`
+    """
+
+    fields = get_data_fields(entity, fields)
     #fields = [i.name for i in entity.children]
     #if "Visual Parameters" in fields:
     #    fields.remove("Visual Parameters")
     #if "UserComments" in fields:
     #    fields.remove("UserComments")
     
+    # For block models, we need to reshape to match the grid structure
+    # geoh5 uses (n_u, n_v, n_z) ordering, but we need to match PyVista's cell ordering
+    n_u, n_v, n_z = entity.shape
+    if window is None:
+        window = ((0, n_u), (0, n_v), (0, n_z))
+    (i0, i1), (j0, j1), (k0, k1) = window
+
+    hyperslabs = None
+    if window != ((0, n_u), (0, n_v), (0, n_z)):
+        # Values are stored with z fastest, then u, then v: every v row of the
+        # window is a strided run of u columns holding a block of z values
+        hyperslabs = [
+            ((j * n_u + i0) * n_z + k0, n_z, i1 - i0, k1 - k0) for j in range(j0, j1)
+        ]
+
     for f in fields:
         data = entity.get_data(f)[0]
-        values = data.values
-        
-        # For block models, we need to reshape to match the grid structure
-        # geoh5 uses (n_u, n_v, n_z) ordering, but we need to match PyVista's cell ordering
-        n_u, n_v, n_z = entity.shape
+        values = read_data_values(data, hyperslabs)
         
         # Reshape values to 3D array with proper dimensions
         # This order seems to be the inverse of what one might expect
         # but it works to get the correct orientation in PyVista when
         # combined with the transpose below
-        values_3d = values.reshape((n_v, n_u, n_z), order='C')
+        values_3d = values.reshape((j1 - j0, i1 - i0, k1 - k0), order='C')
         
         # PyVista structured grids expect cell data in a specific order
         # We need to transpose and flatten to match VTK cell ordering
@@ -156,7 +390,10 @@ def add_data_to_vtk_grid(output, entity):
         if isinstance(data, ReferencedData):
             data_value_map = data.value_map
             output[f] = values_vtk
-            output[f"{f}_names"] = data_value_map.map_values(output.cell_data[f])
+            if categorical:
+                set_value_map(output, f, get_value_map(data))
+            else:
+                output[f"{f}_names"] = data_value_map.map_values(output.cell_data[f])
         elif isinstance(data, FloatData):
             output[f] = values_vtk
         else:
@@ -227,6 +464,7 @@ def get_ga_entity_colour(ga_entity):
     return true_color
 
 
+@stage("metadata")
 def add_entity_metadata(output, entity):
     """Add the GA entity colour to the output VTK object."""
     colour = get_ga_entity_colour(entity)
@@ -236,10 +474,114 @@ def add_entity_metadata(output, entity):
     return output
 
 
-def add_data_to_geoh5(output, data):
-    """Add data to the output VTK object."""
-    pass
+def get_entity_info(entity):
+    """Returns the name, class name and UID of a GEOH5 entity without reading
+    any of its values."""
+    return {
+        "name": entity.name,
+        "entity_type": entity.__class__.__name__,
+        "uid": str(entity.uid),
+    }
+
+
+def _vtk_array_to_geoh5(output, name, values, association, reorder=None):
+    """Returns the geoh5py ``add_data`` arguments of the components of a VTK data
+    array, skipping arrays that cannot be stored."""
+    values = np.asarray(values)
+    if values.dtype.kind not in "biuf":
+        return {}
+    if values.ndim > 1:
+        components = {}
+        for i in range(values.shape[1]):
+            components.update(
+                _vtk_array_to_geoh5(output, f"{name}_{i}", values[:, i], association, reorder)
+            )
+        return components
+
+    if reorder is not None:
+        values = reorder(values)
+    if values.dtype.kind == "b":
+        values = values.astype(np.int32)
+    attributes = {"values": values, "association": association}
+
+    value_maps = output.user_dict.get("value_maps", {})
+    names = f"{name}_names"
+    if name in value_maps:
+        attributes["type"] = "referenced"
+        attributes["value_map"] = {int(code): value for code, value in value_maps[name].items()}
+    elif names in output.array_names and values.dtype.kind in "iu":
+        # Rebuild the value map from the name of the first cell of each code
+        codes, first = np.unique(output[name], return_index=True)
+        attributes["type"] = "referenced"
+        attributes["value_map"] = {
+            int(code): str(value) for code, value in zip(codes, output[names][first]) if code > 0
+        }
+    if "value_map" in attributes:
+        # Negative codes, e.g. the gaps between drillhole intervals, are unknown
+        attributes["values"] = np.where(values < 0, 0, values).astype(np.uint32)
+        attributes["value_map"] = {
+            code: value for code, value in attributes["value_map"].items() if code > 0
+        }
+        attributes["value_map"].setdefault(0, "Unknown")
+    return {name: attributes}
+
+
+def add_data_to_geoh5(
+    entity, output, point_association="VERTEX", cell_association="CELL", reorder=None
+):
+    """Adds the point and cell data arrays of a VTK data object to a GEOH5 entity,
+    in a single ``add_data`` call.
+
+    Float, integer and boolean arrays are written as float and integer data, and
+    referenced data is rebuilt from the value maps of ``user_dict["value_maps"]``
+    (see :mod:`geoh5vista.categorical`) or from ``{field}_names`` arrays. Arrays
+    with several components are split into one data per component. Other arrays,
+    e.g. strings, are skipped.
 
+    Args:
+        entity: the GEOH5 object to add the data to
+        output: the VTK data object holding the arrays
+        point_association (str): the GEOH5 association of point data, or ``None``
+            to skip it
+        cell_association (str): the GEOH5 association of cell data, or ``None`` to
+            skip it
+        reorder (callable): function putting the cell data arrays in the cell order
+            of the GEOH5 entity, if it differs from the VTK order
+    """
+    data = {}
+    arrays = [
+        (output.point_data, point_association, None),
+        (output.cell_data, cell_association, reorder),
+    ]
+    for arrays_data, association, reorder_values in arrays:
+        if association is None:
+            continue
+        for name in arrays_data.keys():
+            if name.endswith("_names") or name.startswith("vtk") or name in data:
+                continue
+            data.update(
+                _vtk_array_to_geoh5(output, name, arrays_data[name], association, reorder_values)
+            )
+
+    if data:
+        entity.add_data(data)
+    return entity
+
+
+def add_entity_metadata_to_geoh5(entity, output):
+    """Adds visual parameters to a GEOH5 entity, with the colour of
+    ``output.user_dict["colour"]`` if it is given as RGB values, grey otherwise."""
+    visual_parameters = entity.add_default_visual_parameters()
+    colour = output.user_dict.get("colour")
+    if not (isinstance(colour, (list, tuple)) and len(colour) == 3):
+        colour = DEFAULT_COLOUR
+    # Colour order is BGR, see get_ga_entity_colour
+    visual_parameters.colour = [int(c) for c in colour[::-1]]
+    return entity
+
+
+# RGB colour of written entities without a colour
+DEFAULT_COLOUR = [128, 128, 128]
 
 SKIPDATA = [
     'Azimuth',
@@ -4,138 +4,704 @@
 
 __all__ = [
     "geoh5wrap",
+    "convert_entity",
+    "list_entities",
+    "release_entity",
+    "check_multiblock_options",
     "entities_to_vtk",
     "read_workspace",
+    "iter_workspace",
+    "write_workspace",
 ]
 
 __displayname__ = "Wrapper"
 
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import contextvars
+from contextlib import nullcontext
+from functools import partial
+import multiprocessing
+from pathlib import Path
+import queue
+import warnings
+
 import pyvista
+from geoh5py.groups import ContainerGroup
 from geoh5py.workspace.workspace import Workspace
 
-from geoh5vista.curve import curve_to_vtk
-from geoh5vista.points import points_to_vtk
-from geoh5vista.surface import surface_to_vtk
-from geoh5vista.grid2d import grid2d_to_vtk
-from geoh5vista.geoimage import geoimage_to_vtk
-from geoh5vista.blockmodel import blockmodel_to_vtk
-from geoh5vista.octree import octree_to_vtk
-from geoh5vista.drillholes import drillholes_to_vtk
+from geoh5vista.cache import DiskCache, as_cache
+from geoh5vista.instrumentation import (
+    Recorder,
+    get_recorder,
+    instrument,
+    mark_cached,
+    record_entity,
+)
+from geoh5vista.lazy import LazyMultiBlock
+from geoh5vista.registry import (  # pylint: disable=unused-import
+    GEOH5SKIP,
+    GEOH5WRAPPERS,
+    SPATIAL,
+    SUPPORTED,
+    get_converter,
+    get_writer,
+)
+from geoh5vista.selection import select_entities, select_fields
+from geoh5vista.spatial import as_region, get_entity_bounds
+from geoh5vista.utilities import get_entity_info
 #from geoh5vista.utilities import get_textures, texture_to_vtk
 
 
-def geoh5wrap(data):
+def geoh5wrap(data, cache=None, region=None, **kwargs):
     """Wraps the GEOH5 data object as a VTK data object. This is the
     primary function that an end user will harness.
 
+    Any keyword arguments are passed on to the converter of the entity type,
+    e.g. ``geoh5wrap(drillhole_group, merged=True)``.
+
+    Args:
+        data: the GEOH5 entity to convert
+        cache (:class:`geoh5vista.cache.DiskCache`, :class:`geoh5vista.cache.ConversionCache`
+            or str): a cache of converted entities, or the path of a cache
+            directory. The conversion is read from the cache when it holds an up
+            to date entry, and stored in it otherwise.
+        region (:class:`geoh5vista.spatial.Region` or tuple): a region of space,
+            or the ``(xmin, xmax, ymin, ymax, zmin, zmax)`` bounds of a box.
+            Entities whose bounds miss the bounding box of the region are not
+            converted and ``None`` is returned. The converters of the types in
+            ``SPATIAL`` also subset the vertices and cells, or the holes and
+            segments, of the others before reading their data.
+
     """
     if data is None:
         return None
     else:
         key = data.__class__.__name__ # get the class name
         try:
-            return GEOH5WRAPPERS[key](data)
+            converter = get_converter(key)
         except KeyError:
             raise RuntimeError(f"Data of type ({key}) is not  currently supported.")
+        region = as_region(region)
+        if region is not None:
+            if not region.intersects(get_entity_bounds(data)):
+                return None
+            if key in SPATIAL:
+                kwargs["region"] = region
+        return record_entity(data, partial(_convert, data, converter, as_cache(cache), kwargs))
+
+
+def _convert(data, converter, cache, kwargs):
+    """Converts an entity, through the cache if given."""
+    if cache is not None:
+        output = cache.get(data, kwargs)
+        if output is not None:
+            mark_cached()
+            return output
+    output = converter(data, **kwargs)
+    if cache is not None:
+        cache.put(data, kwargs, output)
+    return output
 
 
-def entities_to_vtk(entity_list):
+def _converter_kwargs(
+    entity, converter_options, fields=None, exclude_fields=None, categorical=False, region=None
+):
+    """Returns the converter keyword arguments of an entity: those given for its
+    type in a ``converter_options`` mapping of entity class names to keyword
+    arguments, plus the data ``fields`` selected for it and the ``region`` taken
+    by :func:`geoh5wrap`."""
+    kwargs = {"categorical": True} if categorical else {}
+    if region is not None:
+        kwargs["region"] = region
+    if converter_options:
+        kwargs.update(converter_options.get(entity.__class__.__name__, {}))
+    selected = select_fields(entity, fields, exclude_fields)
+    if selected is not None:
+        kwargs["fields"] = selected
+    return kwargs
+
+
+def check_multiblock_options(converter_options):
+    """Raises a ``ValueError`` for converter options giving objects that cannot
+    be held in a :class:`pyvista.MultiBlock` nor written to VTK XML files, i.e.
+    octrees as ``vtkHyperTreeGrid``. Use :func:`geoh5wrap` or
+    :func:`iter_workspace` for those.
+
+    Args:
+        converter_options (dict): keyword arguments for the converters, keyed by
+            entity class name
+    """
+    if converter_options and converter_options.get("Octree", {}).get("hypertree"):
+        raise ValueError(
+            "Octrees converted with hypertree=True are not supported by pyvista and "
+            "cannot be held in a MultiBlock. Convert them with geoh5wrap or "
+            "iter_workspace instead."
+        )
+
+
+def convert_entity(
+    entity,
+    converter_options=None,
+    fields=None,
+    exclude_fields=None,
+    cache=None,
+    categorical=False,
+    region=None,
+    **kwargs,
+):
+    """Converts an entity with the converter options and fields selected for it,
+    as each entity of :func:`read_workspace`. Returns ``None`` for entities
+    outside of the ``region``.
+
+    Args:
+        entity: the GEOH5 entity to convert
+        converter_options (dict): keyword arguments for the converters, keyed by
+            entity class name, see :func:`entities_to_vtk`
+        fields (list or dict): glob patterns of the data fields to read
+        exclude_fields (list or dict): glob patterns of the data fields to skip
+        cache (DiskCache, ConversionCache or str): a cache of converted
+            entities, or the path of a cache directory, see :func:`geoh5wrap`
+        categorical (bool): store referenced data as integer codes with a value
+            map, see :func:`entities_to_vtk`
+        region (:class:`geoh5vista.spatial.Region` or tuple): only convert the
+            parts of the entity inside this region, see :func:`geoh5wrap`
+
+    Any other keyword arguments are passed on to the converter, over those of
+    ``converter_options``, e.g. the ``ijk`` window of a block model.
+    """
+    options = _converter_kwargs(
+        entity, converter_options, fields, exclude_fields, categorical, region
+    )
+    return geoh5wrap(entity, cache=cache, **{**options, **kwargs})
+
+
+def entities_to_vtk(
+    entity_list,
+    workers=None,
+    executor="thread",
+    converter_options=None,
+    fields=None,
+    exclude_fields=None,
+    cache=None,
+    categorical=False,
+    region=None,
+):
 #def entities_to_vtk(entity_list, load_textures=False):
     """Converts an list of GEOH5 entities to collection in a :class:`pyvista.MultiBlock` 
     data object.
 
+    Args:
+        entity_list (list): the GEOH5 entities to convert
+        workers (int): number of parallel workers. ``None`` or ``1`` converts the
+            entities one by one in the calling thread.
+        executor (str or :class:`concurrent.futures.Executor`): ``"thread"`` to use
+            a thread pool, ``"process"`` to use a process pool (better suited to
+            CPU-bound block models), or an existing executor instance.
+        converter_options (dict): keyword arguments for the converters, keyed by
+            entity class name, e.g.
+            ``{"ConcatenatorDrillholeGroup": {"merged": True}}``.
+        fields (list or dict): glob patterns of the data fields to read, for
+            every entity or per entity name/UID pattern, see
+            :func:`geoh5vista.selection.select_fields`
+        exclude_fields (list or dict): glob patterns of the data fields to skip
+        cache (DiskCache, ConversionCache or str): a cache of converted
+            entities, or the path of a cache directory, see :func:`geoh5wrap`
+        categorical (bool): if ``True``, referenced data is stored as integer
+            codes with a value map in ``user_dict["value_maps"]``, instead of an
+            array of names per cell. See :mod:`geoh5vista.categorical`.
+        region (:class:`geoh5vista.spatial.Region` or tuple): only convert the
+            parts of the entities inside this region, see :func:`geoh5wrap`.
+            Entities outside of it are left out.
+
+    Each parallel worker reads from its own read-only
+    :class:`geoh5py.workspace.workspace.Workspace` opened on the same file, so the
+    workspace handle of the caller is never shared between workers. The blocks
+    keep the order and names of ``entity_list``.
+
     """
+    check_multiblock_options(converter_options)
+    entity_list = [item for item in entity_list if item.__class__.__name__ in SUPPORTED]
+    cache = as_cache(cache)
+    if workers is None or workers == 1:
+        converted = [
+            convert_entity(
+                item, converter_options, fields, exclude_fields, cache, categorical, region
+            )
+            for item in entity_list
+        ]
+    else:
+        converted = _parallel_geoh5wrap(
+            entity_list,
+            workers,
+            executor,
+            converter_options,
+            fields,
+            exclude_fields,
+            cache,
+            categorical,
+            region,
+        )
+
     # Iterate over the elements and add converted VTK objects a MultiBlock
     data = pyvista.MultiBlock()
     #textures = {}
-    for item in entity_list:
-        key = item.__class__.__name__
-        if key in SUPPORTED:
-            e = geoh5wrap(item)
-            data.append(e, name=e.user_dict["name"])
-            #if hasattr(e, "textures") and e.textures:
-            #    textures[d.user_dict["name"]] = get_textures(e)
-        else:
-            pass
+    for e in converted:
+        if e is None:
+            continue
+        data.append(e, name=e.user_dict["name"])
+        #if hasattr(e, "textures") and e.textures:
+        #    textures[d.user_dict["name"]] = get_textures(e)
     #if load_textures:
     #    return data, textures
     return data
 
 
-def read_workspace(workspace_path, load_textures=False):
+def _workspace_file(entity):
+    """Returns the path of the geoh5 file holding an entity, or ``None`` if the
+    entity lives in a workspace that cannot be re-opened by a worker."""
+    h5file = entity.workspace.h5file
+    if isinstance(h5file, (str, Path)) and Path(h5file).is_file():
+        return str(h5file)
+    return None
+
+
+# Read-only workspaces opened by the current process when used as a pool worker
+_PROCESS_WORKSPACES = {}
+
+
+def _process_geoh5wrap(h5file, uid, kwargs, cache=None, instrumented=False):
+    """Process pool task converting a single entity found by its UID. With
+    ``instrumented``, the events of the conversion are sent back too."""
+    workspace = _PROCESS_WORKSPACES.get(h5file)
+    if workspace is None:
+        workspace = _PROCESS_WORKSPACES[h5file] = Workspace(h5file, mode="r")
+    with instrument() if instrumented else nullcontext() as recorder:
+        output = geoh5wrap(workspace.get_entity(uid)[0], cache=cache, **kwargs)
+    # Pickling goes through the legacy VTK writers, which cannot write a PointSet
+    # nor the direction matrix of an ImageData. Send those separately.
+    extras = {}
+    if recorder is not None:
+        extras["events"] = recorder.events
+    if isinstance(output, pyvista.PointSet):
+        extras["user_dict"] = dict(output.user_dict)
+        output = output.cast_to_polydata(deep=False)
+    elif isinstance(output, pyvista.ImageData):
+        extras["direction_matrix"] = output.direction_matrix
+    return output, extras
+
+
+def _process_result(future):
+    """Rebuilds the VTK object returned by :func:`_process_geoh5wrap`."""
+    output, extras = future.result()
+    recorder = get_recorder()
+    for event in extras.get("events", []):
+        if recorder is not None:
+            recorder.record(event)
+    if "user_dict" in extras:
+        output = output.cast_to_pointset()
+        output.user_dict = extras["user_dict"]
+    if "direction_matrix" in extras:
+        output.direction_matrix = extras["direction_matrix"]
+    return output
+
+
+def _parallel_geoh5wrap(
+    entity_list,
+    workers,
+    executor,
+    converter_options=None,
+    fields=None,
+    exclude_fields=None,
+    cache=None,
+    categorical=False,
+    region=None,
+):
+    """Converts the entities on a pool of workers and returns the VTK objects in
+    the order of ``entity_list``."""
+    use_processes = executor == "process" or isinstance(executor, ProcessPoolExecutor)
+    if isinstance(executor, str):
+        if executor == "thread":
+            pool = ThreadPoolExecutor(max_workers=workers)
+        elif executor == "process":
+            # Forking a process holding open HDF5 handles is unsafe, so spawn
+            pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        else:
+            raise ValueError(f"Executor ({executor}) must be 'thread' or 'process'.")
+    elif isinstance(executor, Executor):
+        pool = executor
+    else:
+        raise TypeError(f"Executor of type ({type(executor)}) is not supported.")
+
+    # A pool of read-only workspaces, one per busy thread, shared by the thread tasks
+    workspaces = {}
+    idle = {}
+
+    def thread_geoh5wrap(h5file, uid, kwargs):
+        try:
+            workspace = idle[h5file].get_nowait()
+        except queue.Empty:
+            workspace = Workspace(h5file, mode="r")
+            workspaces[h5file].append(workspace)
+        try:
+            return geoh5wrap(workspace.get_entity(uid)[0], cache=cache, **kwargs)
+        finally:
+            idle[h5file].put(workspace)
+
+    # Workers of a process pool each get a copy of the cache, so an in-memory cache
+    # is looked up and filled in the calling process instead
+    parent_cache = None
+    if use_processes and cache is not None and not isinstance(cache, DiskCache):
+        parent_cache, cache = cache, None
+
+    futures = []
+    item_kwargs = []
+    cached = {}
+    instrumented = get_recorder() is not None
+    try:
+        for index, item in enumerate(entity_list):
+            h5file = _workspace_file(item)
+            kwargs = _converter_kwargs(
+                item, converter_options, fields, exclude_fields, categorical, region
+            )
+            item_kwargs.append(kwargs)
+            if h5file is None:
+                # In-memory workspace: convert with the caller's handle instead
+                futures.append(None)
+            elif use_processes:
+                if parent_cache is not None:
+                    cached[index] = parent_cache.get(item, kwargs)
+                    if cached[index] is not None:
+                        futures.append(None)
+                        continue
+                futures.append(
+                    pool.submit(
+                        _process_geoh5wrap, h5file, item.uid, kwargs, cache, instrumented
+                    )
+                )
+            else:
+                workspaces.setdefault(h5file, [])
+                idle.setdefault(h5file, queue.SimpleQueue())
+                # Run in a copy of the caller's context, so an active recorder is kept
+                futures.append(
+                    pool.submit(
+                        contextvars.copy_context().run, thread_geoh5wrap, h5file, item.uid, kwargs
+                    )
+                )
+
+        converted = []
+        for index, (item, future) in enumerate(zip(entity_list, futures)):
+            if cached.get(index) is not None:
+                converted.append(cached[index])
+            elif future is None:
+                converted.append(
+                    geoh5wrap(item, cache=cache or parent_cache, **item_kwargs[index])
+                )
+            elif use_processes:
+                converted.append(_process_result(future))
+                if parent_cache is not None and converted[-1] is not None:
+                    parent_cache.put(item, item_kwargs[index], converted[-1])
+            else:
+                converted.append(future.result())
+    finally:
+        for future in futures:
+            if future is not None:
+                future.cancel()
+        if pool is not executor:
+            pool.shutdown(cancel_futures=True)
+        for opened in workspaces.values():
+            for workspace in opened:
+                workspace.close()
+
+    return converted
+
+
+def read_workspace(
+    workspace_path,
+    load_textures=False,
+    lazy=False,
+    workers=None,
+    executor="thread",
+    converter_options=None,
+    entity_types=None,
+    names=None,
+    groups=None,
+    fields=None,
+    exclude_fields=None,
+    cache=None,
+    categorical=False,
+    instrumentation=None,
+    region=None,
+):
     """Loads an GEOH5 workspace from a filepath to return a list of child entities.
 
+    Args:
+        workspace_path (str): path to the geoh5 file
+        lazy (bool): if ``True``, return a :class:`geoh5vista.lazy.LazyMultiBlock`
+            that only converts each entity when its block is first accessed,
+            instead of converting the whole workspace up front. The workspace is
+            kept open until :meth:`geoh5vista.lazy.LazyMultiBlock.close` is
+            called. Blocks are converted one by one, so ``workers`` and
+            ``executor`` cannot be given.
+        workers (int): number of parallel workers, see :func:`entities_to_vtk`
+        executor (str or :class:`concurrent.futures.Executor`): the parallel
+            backend, see :func:`entities_to_vtk`
+        converter_options (dict): keyword arguments for the converters, keyed by
+            entity class name, see :func:`entities_to_vtk`
+        entity_types (list): only load entities of these class names
+        names (list): only load entities whose name or UID matches one of these
+            glob patterns
+        groups (list): only load entities held under a group whose path matches
+            one of these glob patterns, e.g. ``"Project/Holes*"``
+        fields (list or dict): glob patterns of the data fields to read, for
+            every entity or as a dictionary of entity name/UID patterns to field
+            patterns
+        exclude_fields (list or dict): glob patterns of the data fields to skip
+        cache (DiskCache, ConversionCache or str): a cache of converted
+            entities, or the path of a cache directory. A warm reload of an
+            unchanged workspace reads every entity back from the cache instead of
+            converting it again.
+        categorical (bool): if ``True``, referenced data is stored as integer
+            codes with a value map instead of an array of names per cell, see
+            :func:`entities_to_vtk`
+        instrumentation (:class:`geoh5vista.instrumentation.Recorder` or callable):
+            a recorder of the timings, bytes read and output sizes of the
+            conversion of each entity, or a function called with each event. Use
+            :meth:`geoh5vista.instrumentation.Recorder.report` for a summary
+            report once the workspace is read. Lazy blocks are recorded when they
+            are converted.
+        region (:class:`geoh5vista.spatial.Region` or tuple): only convert the
+            parts of the entities inside this region: an axis-aligned box, e.g.
+            ``(xmin, xmax, ymin, ymax, zmin, zmax)``, an oriented box or a
+            polygon with a range of elevations, see :mod:`geoh5vista.spatial`.
+            Entities outside of it are left out, or are ``None`` lazy blocks.
+
+    The selections are applied from entity and data names only, before any values
+    are read. See :mod:`geoh5vista.selection`.
+
     """
-    wp = Workspace(workspace_path)
-    entities = wp.fetch_children(wp.root, recursively=True)
-    supported_entities = [e for e in entities if e.__class__.__name__ in SUPPORTED]
+    if lazy and (workers not in (None, 1) or executor != "thread"):
+        raise ValueError(
+            "Lazy blocks are converted one by one when accessed, so workers and "
+            "executor cannot be given with lazy=True."
+        )
+    recorder = instrumentation
+    if recorder is not None and not isinstance(recorder, Recorder):
+        recorder = Recorder(callback=instrumentation)
+
+    wp = Workspace(workspace_path, mode="r")
+    supported_entities = list_entities(wp, entity_types, names, groups)
+
+    if lazy:
+        converter = partial(
+            convert_entity,
+            converter_options=converter_options,
+            fields=fields,
+            exclude_fields=exclude_fields,
+            cache=as_cache(cache),
+            categorical=categorical,
+            region=as_region(region),
+        )
+        if recorder is not None:
+            converter = recorder.wrap(converter)
+        return LazyMultiBlock(supported_entities, converter, workspace=wp)
 
     #return entities_to_vtk(entities, load_textures=load_textures)
-    return entities_to_vtk(supported_entities)
-
-
-GEOH5WRAPPERS = {
-    ## Basic entities
-    "Points": points_to_vtk,
-    "Curve": curve_to_vtk,
-    "Surface": surface_to_vtk,
-    ## Grid entities
-    "Grid2D": grid2d_to_vtk,
-    "GeoImage": geoimage_to_vtk,
-    ## Volume entities
-    "BlockModel": blockmodel_to_vtk,
-    "Octree": octree_to_vtk,
-    ## Container entities
-    "Drillhole": drillholes_to_vtk,
-    "DrillholeGroup": drillholes_to_vtk,
-    "ConcatenatorDrillholeGroup": drillholes_to_vtk,
-    "ConcatenatedDrillhole": drillholes_to_vtk,
-    #"ContainerGroup": group_to_vtk,
-}
-
-
-SUPPORTED = [
-    "Points",
-    "Curve",
-    "Surface",
-    "Grid2D",
-    "BlockModel",
-    "Octree",
-    "DrillholeGroup",
-    "ConcatenatorDrillholeGroup",
-]
+    with recorder.activate() if recorder is not None else nullcontext():
+        return entities_to_vtk(
+            supported_entities,
+            workers=workers,
+            executor=executor,
+            converter_options=converter_options,
+            fields=fields,
+            exclude_fields=exclude_fields,
+            cache=cache,
+            categorical=categorical,
+            region=as_region(region),
+        )
+
+
+def list_entities(workspace, entity_types=None, names=None, groups=None):
+    """Returns the supported entities of a workspace, in the order of
+    :func:`read_workspace`, with its selections applied.
+
+    Args:
+        workspace (:class:`geoh5py.workspace.workspace.Workspace`): the open
+            workspace
+        entity_types (list): only list entities of these class names
+        names (list): only list entities whose name or UID matches one of these
+            glob patterns
+        groups (list): only list entities held under a group whose path matches
+            one of these glob patterns
+    """
+    entities = workspace.fetch_children(workspace.root, recursively=True)
+    supported_entities = [e for e in entities if e.__class__.__name__ in SUPPORTED]
+    return select_entities(
+        supported_entities, entity_types=entity_types, names=names, groups=groups
+    )
+
+
+def release_entity(entity):
+    """Drops the data values geoh5py keeps in memory once they are read, for an
+    entity or the objects of a group.
+
+    Args:
+        entity: the converted GEOH5 entity
+    """
+    objects = [entity]
+    if entity.__class__.__name__.endswith("Group"):
+        objects = [child for child in entity.children if hasattr(child, "children")]
+    for obj in objects:
+        for data in obj.children:
+            if getattr(data, "_values", None) is not None:
+                data._values = None  # pylint: disable=protected-access
+
+
+def iter_workspace(
+    workspace_path,
+    converter_options=None,
+    entity_types=None,
+    names=None,
+    groups=None,
+    fields=None,
+    exclude_fields=None,
+    cache=None,
+    categorical=False,
+    instrumentation=None,
+    region=None,
+):
+    """Iterates over the entities of a GEOH5 workspace, converting them one at a
+    time. Yields ``(entity_info, mesh)`` pairs in the order of
+    :func:`read_workspace`, where ``entity_info`` holds the ``name``,
+    ``entity_type`` and ``uid`` of the entity.
+
+    Each entity is only converted once the previous mesh was processed, and the
+    data values read for it are released from the workspace, so the peak memory
+    is that of the largest entity as long as the caller drops each mesh in turn.
+    The workspace is closed once the iteration ends or the generator is closed.
+
+    Args:
+        workspace_path (str): path to the geoh5 file
+        converter_options (dict): keyword arguments for the converters, keyed by
+            entity class name, see :func:`entities_to_vtk`
+        entity_types (list): only load entities of these class names
+        names (list): only load entities whose name or UID matches one of these
+            glob patterns
+        groups (list): only load entities held under a group whose path matches
+            one of these glob patterns
+        fields (list or dict): glob patterns of the data fields to read
+        exclude_fields (list or dict): glob patterns of the data fields to skip
+        cache (DiskCache, ConversionCache or str): a cache of converted
+            entities, or the path of a cache directory, see :func:`geoh5wrap`
+        categorical (bool): store referenced data as integer codes with a value
+            map, see :func:`entities_to_vtk`
+        instrumentation (:class:`geoh5vista.instrumentation.Recorder` or callable):
+            a recorder of the conversions, see :func:`read_workspace`
+        region (:class:`geoh5vista.spatial.Region` or tuple): only convert the
+            parts of the entities inside this region, see :func:`read_workspace`.
+            Entities outside of it are not yielded.
+
+    Example:
+        >>> for info, mesh in iter_workspace('test_file.geoh5', entity_types=['BlockModel']):
+        ...     mesh.save(f"{info['name']}.vts")
+    """
+    recorder = instrumentation
+    if recorder is not None and not isinstance(recorder, Recorder):
+        recorder = Recorder(callback=instrumentation)
+    cache = as_cache(cache)
+    region = as_region(region)
+
+    with Workspace(workspace_path, mode="r") as workspace:
+        for entity in list_entities(workspace, entity_types, names, groups):
+            with recorder.activate() if recorder is not None else nullcontext():
+                mesh = convert_entity(
+                    entity, converter_options, fields, exclude_fields, cache, categorical, region
+                )
+            release_entity(entity)
+            if mesh is None:
+                continue
+            yield get_entity_info(entity), mesh
+            del mesh
+
+
+def _vtk_entity_type(block):
+    """Returns the class name of the geoh5 entity a VTK data object is written to,
+    or ``None`` if the type of the object is not supported."""
+    if isinstance(block, pyvista.PointSet):
+        return "Points"
+    if isinstance(block, pyvista.PolyData):
+        if block.n_faces_strict > 0:
+            return "Surface"
+        if block.n_lines > 0:
+            return "Curve"
+        return "Points"
+    if isinstance(block, pyvista.ImageData) and block.dimensions[2] == 1:
+        return "Grid2D"
+    if isinstance(block, (pyvista.StructuredGrid, pyvista.RectilinearGrid, pyvista.ImageData)):
+        return "BlockModel"
+    return None
+
+
+def _write_blocks(multiblock, workspace, parent=None):
+    """Writes the blocks of a :class:`pyvista.MultiBlock` to an open workspace,
+    nested collections as container groups."""
+    entities = []
+    for index, block in enumerate(multiblock):
+        if block is None:
+            continue
+        name = multiblock.get_block_name(index) or f"Block {index}"
+        if isinstance(block, pyvista.MultiBlock):
+            group = ContainerGroup.create(workspace, name=name, parent=parent)
+            entities += _write_blocks(block, workspace, parent=group)
+            continue
+        entity_type = _vtk_entity_type(block)
+        if entity_type is None:
+            warnings.warn(f"Block ({name}) of type ({block.__class__.__name__}) cannot be written.")
+            continue
+        if entity_type == "Surface" and not block.is_all_triangles:
+            block = block.triangulate()
+        entities.append(get_writer(entity_type)(block, workspace, name, parent=parent))
+    return entities
+
+
+def write_workspace(multiblock, workspace_path):
+    """Writes the blocks of a :class:`pyvista.MultiBlock` to a geoh5 workspace, in
+    a single session of the workspace. Returns the created entities.
+
+    Blocks are written as the entity matching their type: point sets as Points,
+    poly data as Surface, Curve or Points objects (with faces, lines or vertices
+    only), flat image data as Grid2D objects and other grids as BlockModel
+    objects. Nested collections are written as container groups, and blocks of
+    other types are skipped with a warning. Point and cell data are written as
+    float, integer or referenced data, with the value maps of categorical arrays
+    (see :mod:`geoh5vista.categorical`) or the names of their ``*_names`` arrays.
+    Entities take the names of their blocks.
+
+    Args:
+        multiblock (:class:`pyvista.MultiBlock`): the data objects to write
+        workspace_path (str): path to the geoh5 file, created if needed. The
+            entities are added to an existing workspace.
+
+    Example:
+        >>> project = geoh5vista.read_workspace('test_file.geoh5', categorical=True)
+        >>> geoh5vista.write_workspace(project, 'copy.geoh5')
+    """
+    if Path(workspace_path).is_file():
+        workspace = Workspace(workspace_path, mode="r+")
+    else:
+        workspace = Workspace.create(workspace_path)
+    with workspace:
+        return _write_blocks(multiblock, workspace)
 
-GEOH5SKIP = [
-    "ReferencedData",
-    "TextData",
-    "FloatData",
-    "IntegerData",
-    "FilenameData",
-    "ContainerGroup",
-    "VisualParameters",
-    "GeometricDataConstants",
-    "GeoImage",
-    "Drillholes",
-    "DrapeModel",
-    "AirborneMagnetics",
-    "PotentialElectrode",
-    "AirborneEMSurvey",
-    "AirborneTEMSurvey",
-    "AirborneTEMReceivers",
-    "AirborneFEMTransmitters",
-    "VP Model",
-    "UIJsonGroup",
-    "InterpretationSection",
-    "Slicer",
-    "BooleanData",
-    "PropertyGroup",
-    "CommentsData",
-    "ConcatenatorDrillholeGroup",
-    "ConcatenatedDrillhole",
-    "CustomGroup"
-]
 
 # Now set up the display names for the docs
 read_workspace.__displayname__ = "Load a GEOH5 Workspace File" # type: ignore
 entities_to_vtk.__displayname__ = "Entities to VTK" # type: ignore
+iter_workspace.__displayname__ = "Iterate over a GEOH5 Workspace File" # type: ignore
+write_workspace.__displayname__ = "Write a GEOH5 Workspace File" # type: ignore
 geoh5wrap.__displayname__ = "GEOH5 Entity Wrapper" # type: ignore
+convert_entity.__displayname__ = "Convert an Entity" # type: ignore
+list_entities.__displayname__ = "List the Entities of a Workspace" # type: ignore
+release_entity.__displayname__ = "Release an Entity" # type: ignore
+check_multiblock_options.__displayname__ = "Check MultiBlock Options" # type: ignore
@@ -0,0 +1,63 @@
+"""Tests of the minimum curvature desurvey of geoh5vista.desurvey against geoh5py"""
+
+import numpy as np
+import pytest
+
+from geoh5py.objects import Drillhole
+from geoh5py.workspace import Workspace
+
+from geoh5vista.desurvey import desurvey_drillholes
+
+
+def _random_hole(workspace, rng, index):
+    """A hole with random surveys: from the collar or below it, at regular or
+    sparse depths to be densified, with or without an end of hole depth."""
+    n_surveys = rng.integers(1, 6)
+    first = 0.0 if index % 2 else rng.uniform(5.0, 30.0)
+    spacing = rng.uniform(5.0, 20.0) if index % 3 else rng.uniform(100.0, 300.0)
+    survey_depths = first + np.arange(n_surveys) * spacing
+    hole = Drillhole.create(
+        workspace,
+        name=f"DH{index}",
+        collar=rng.uniform(-1000.0, 1000.0, 3),
+        surveys=np.c_[
+            survey_depths,
+            rng.uniform(0.0, 360.0, n_surveys),
+            rng.uniform(-90.0, -30.0, n_surveys),
+        ],
+        end_of_hole=float(survey_depths[-1] + rng.uniform(0.0, 100.0)),
+    )
+    if index % 4 == 0:
+        # Unknown end of hole
+        hole.end_of_hole = np.nan
+    return hole
+
+
+@pytest.fixture(name="holes")
+def fixture_holes(tmp_path):
+    rng = np.random.default_rng(0)
+    workspace = Workspace.create(tmp_path / "holes.geoh5")
+    yield [_random_hole(workspace, rng, index) for index in range(30)]
+    workspace.close()
+
+
+def test_desurvey_matches_geoh5py(holes):
+    rng = np.random.default_rng(1)
+    depths = [
+        np.sort(np.r_[0.0, rng.uniform(0.0, 1.5 * hole.surveys[-1, 0] + 50.0, 40)])
+        for hole in holes
+    ]
+    locations = desurvey_drillholes(holes, depths)
+    for hole, hole_depths, hole_locations in zip(holes, depths, locations):
+        np.testing.assert_allclose(hole_locations, hole.desurvey(hole_depths), atol=1e-9)
+
+
+def test_desurvey_without_depths(holes):
+    locations = desurvey_drillholes(holes[:3], [np.empty(0)] * 3)
+    assert [location.shape for location in locations] == [(0, 3)] * 3
+    assert not desurvey_drillholes([], [])
+
+
+def test_desurvey_checks_depths(holes):
+    with pytest.raises(ValueError):
+        desurvey_drillholes(holes[:2], [np.zeros(1)])
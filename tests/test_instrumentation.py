@@ -0,0 +1,30 @@
+"""Tests of the conversion events of geoh5vista.instrumentation"""
+
+import numpy as np
+
+from geoh5py.objects import Points
+from geoh5py.workspace import Workspace
+
+from geoh5vista.instrumentation import Recorder
+from geoh5vista.wrapper import geoh5wrap
+
+
+def test_bytes_read_once(tmp_path):
+    path = tmp_path / "points.geoh5"
+    with Workspace.create(path) as workspace:
+        points = Points.create(workspace, name="points", vertices=np.random.rand(100, 3))
+        points.add_default_visual_parameters()
+        points.visual_parameters.colour = [10, 20, 30]
+        points.add_data({"values": {"values": np.random.rand(100)}})
+
+    recorder = Recorder()
+    with Workspace(path, mode="r") as workspace, recorder.activate():
+        entity = workspace.get_entity("points")[0]
+        geoh5wrap(entity)
+        geoh5wrap(entity)
+
+    first, second = recorder.events
+    # The values, the vertices being loaded by geoh5py with the entity
+    assert first["bytes_read"] == 100 * 8
+    # Nothing is read again by the second conversion
+    assert second["bytes_read"] == 0
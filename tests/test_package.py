@@ -0,0 +1,40 @@
+"""Tests of the lazy imports of the geoh5vista package"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+import geoh5vista
+
+
+def test_import_loads_no_heavy_dependency():
+    script = (
+        "import sys, geoh5vista; "
+        "print(sorted(m for m in ('pyvista', 'geoh5py', 'h5py', 'PIL') if m in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    ).stdout
+    assert output.strip() == "[]"
+
+
+def test_public_names():
+    for name in geoh5vista.__all__:
+        assert getattr(geoh5vista, name) is not None
+
+
+def test_submodule_attributes():
+    assert geoh5vista.wrapper.read_workspace is geoh5vista.read_workspace
+    assert geoh5vista.utilities.__name__ == "geoh5vista.utilities"
+    assert geoh5vista.catalog.read_catalog is geoh5vista.read_catalog
+
+
+def test_missing_attribute():
+    with pytest.raises(AttributeError):
+        geoh5vista.not_a_module  # pylint: disable=pointless-statement
@@ -0,0 +1,76 @@
+"""Tests of the spatial filters of geoh5vista.spatial"""
+
+import numpy as np
+import pytest
+
+from geoh5py.objects import Grid2D, Octree
+from geoh5py.workspace import Workspace
+
+from geoh5vista.spatial import Box, Region, get_entity_bounds
+from geoh5vista.wrapper import geoh5wrap, read_workspace
+
+
+def _add_colour(entity):
+    entity.add_default_visual_parameters()
+    entity.visual_parameters.colour = [10, 20, 30]
+
+
+@pytest.fixture(name="grid_workspace")
+def fixture_grid_workspace(tmp_path):
+    """A workspace holding a 10 x 10 grid of 10 m cells and an octree of 4 x 4 x 4
+    cells of 10 m, both at the origin."""
+    path = tmp_path / "grids.geoh5"
+    with Workspace.create(path) as workspace:
+        grid = Grid2D.create(
+            workspace,
+            name="grid",
+            origin=[0.0, 0.0, 0.0],
+            u_cell_size=10.0,
+            v_cell_size=10.0,
+            u_count=10,
+            v_count=10,
+        )
+        _add_colour(grid)
+        octree = Octree.create(
+            workspace,
+            name="octree",
+            origin=[200.0, 0.0, 0.0],
+            u_count=4,
+            v_count=4,
+            w_count=4,
+            u_cell_size=10.0,
+            v_cell_size=10.0,
+            w_cell_size=-10.0,
+            rotation=30.0,
+        )
+        _add_colour(octree)
+    return path
+
+
+def test_entity_bounds_match_meshes(grid_workspace):
+    with Workspace(grid_workspace, mode="r") as workspace:
+        for name in ("grid", "octree"):
+            entity = workspace.get_entity(name)[0]
+            np.testing.assert_allclose(get_entity_bounds(entity), geoh5wrap(entity).bounds)
+
+
+def test_region_overlapping_edge_cell_only(grid_workspace):
+    # The grid points start at the origin, before the first cell center of geoh5py
+    project = read_workspace(grid_workspace, region=(-5, 2, -5, 2, -1, 1))
+    assert project.keys() == ["grid"]
+
+    # Only the outer corner of the rotated octree is within 1 m of its lower x bound
+    with Workspace(grid_workspace, mode="r") as workspace:
+        xmin = geoh5wrap(workspace.get_entity("octree")[0]).bounds[0]
+    project = read_workspace(grid_workspace, region=(xmin - 5, xmin + 1, -100, 300, -50, 10))
+    assert project.keys() == ["octree"]
+
+
+def test_region_missing_grid(grid_workspace):
+    project = read_workspace(grid_workspace, region=Box((-50, -1, -50, -1, -1, 1)))
+    assert len(project) == 0
+
+
+def test_region_is_abstract():
+    with pytest.raises(TypeError):
+        Region()  # pylint: disable=abstract-class-instantiated
@@ -0,0 +1,77 @@
+"""Tests of the interval lookup of geoh5vista.utilities"""
+
+import numpy as np
+import pytest
+
+from geoh5vista.utilities import get_interval_index
+
+
+def _reference_index(depths, interval_from, interval_to, overlap):
+    """Masks every interval in turn, as the lookup did before it was sorted"""
+    index = np.full(len(depths), -1)
+    order = range(len(interval_from))
+    if overlap == "first":
+        order = reversed(order)
+    for i in order:
+        index[(depths >= interval_from[i]) & (depths < interval_to[i])] = i
+    return index
+
+
+def _random_intervals(rng, count, overlapping):
+    """Intervals in random order with gaps between them, overlapping if asked"""
+    lengths = rng.uniform(1, 10, count)
+    gaps = rng.uniform(0, 5, count) * (rng.random(count) < 0.5)
+    interval_from = np.cumsum(lengths + gaps) - lengths
+    interval_to = interval_from + lengths
+    if overlapping:
+        interval_to += rng.uniform(0, 20, count) * (rng.random(count) < 0.5)
+    order = rng.permutation(count)
+    return interval_from[order], interval_to[order]
+
+
+@pytest.mark.parametrize("overlap", ["last", "first"])
+@pytest.mark.parametrize("overlapping", [False, True])
+def test_interval_index_matches_masks(overlap, overlapping):
+    rng = np.random.default_rng(3)
+    for _ in range(20):
+        interval_from, interval_to = _random_intervals(rng, 50, overlapping)
+        # Depths on every bound, between them and beyond the intervals
+        depths = np.r_[
+            interval_from,
+            interval_to,
+            rng.uniform(-10, interval_to.max() + 10, 200),
+        ]
+        np.testing.assert_array_equal(
+            get_interval_index(depths, interval_from, interval_to, overlap=overlap),
+            _reference_index(depths, interval_from, interval_to, overlap),
+        )
+
+
+def test_interval_index_gaps():
+    interval_from = np.array([10.0, 0.0, 20.0])
+    interval_to = np.array([15.0, 5.0, 30.0])
+    depths = np.array([-1.0, 0.0, 4.9, 5.0, 7.0, 10.0, 15.0, 17.0, 20.0, 29.9, 30.0, 40.0])
+    np.testing.assert_array_equal(
+        get_interval_index(depths, interval_from, interval_to),
+        [-1, 1, 1, -1, -1, 0, -1, -1, 2, 2, -1, -1],
+    )
+
+
+@pytest.mark.parametrize("overlap, expected", [("last", [0, 1, 1, 1]), ("first", [0, 0, 0, 1])])
+def test_interval_index_overlap(overlap, expected):
+    depths = np.array([1.0, 6.0, 9.0, 12.0])
+    index = get_interval_index(depths, [0.0, 5.0], [10.0, 15.0], overlap=overlap)
+    np.testing.assert_array_equal(index, expected)
+
+
+def test_interval_index_ignores_invalid_intervals():
+    interval_from = np.array([0.0, np.nan, 5.0, 8.0])
+    interval_to = np.array([10.0, 20.0, 5.0, 4.0])
+    index = get_interval_index([1.0, 5.0, 9.0], interval_from, interval_to)
+    np.testing.assert_array_equal(index, [0, 0, 0])
+    assert np.all(get_interval_index([1.0], [np.nan], [np.nan]) == -1)
+
+
+def test_interval_index_checks_overlap():
+    with pytest.raises(ValueError):
+        get_interval_index([1.0], [0.0], [2.0], overlap="deepest")